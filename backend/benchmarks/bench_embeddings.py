@@ -0,0 +1,92 @@
+"""
+Бенчмарк матчинга на эмбеддингах против TF-IDF на одном корпусе:
+- скорость кодирования вакансий пачками;
+- задержка поиска top-k: TF-IDF (VacancyIndex.search), точный поиск по
+  эмбеддингам (матрица float16) и HNSW;
+- recall@k HNSW относительно точного поиска по эмбеддингам;
+- пересечение top-k эмбеддингов с top-k по текущим оценкам TF-IDF.
+
+Нужны sentence-transformers и hnswlib. --encoder projection заменяет модель
+случайной проекцией TF-IDF векторов — чтобы проверить ANN и хранение без модели
+(пересечение с TF-IDF в этом режиме ничего не говорит о качестве).
+
+Запуск из папки backend:
+    python -m benchmarks.bench_embeddings [--vacancies 20000] [--queries 50] [--k 20]
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_retrieval import make_docs
+from embedding_index import EMBEDDING_MODEL, EmbeddingIndex, sentence_transformer_encoder
+from vacancy_index import VacancyIndex
+
+
+def projection_encoder(index: VacancyIndex, dim: int = 384, seed: int = 0):
+    """Случайная проекция TF-IDF векторов в dim измерений (заменитель модели)"""
+    rng = np.random.default_rng(seed)
+    projection = rng.standard_normal((index.n_features, dim)).astype(np.float32)
+
+    def encode(texts):
+        return np.asarray(index._apply_idf(index.vectorize(texts)) @ projection)
+
+    return encode
+
+
+def timed(fn, queries: list) -> tuple:
+    started = time.perf_counter()
+    results = [fn(query) for query in queries]
+    return (time.perf_counter() - started) / len(queries) * 1000, results
+
+
+def overlap(expected: list, actual: list) -> float:
+    hits = [len({v for v, _ in e} & {v for v, _ in a}) / max(len(e), 1) for e, a in zip(expected, actual) if e]
+    return float(np.mean(hits)) if hits else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vacancies", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--encoder", choices=["model", "projection"], default="model")
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    args = parser.parse_args()
+
+    vacancies = [(str(i), text) for i, text in enumerate(make_docs(args.vacancies, 80, seed=2))]
+    resumes = make_docs(args.queries, 300, seed=1)
+
+    tfidf = VacancyIndex(preprocessor=str.lower, max_vacancies=args.vacancies)
+    tfidf.add(vacancies)
+    tfidf.search(resumes[0])  # построение IDF и постингов
+
+    if args.encoder == "model":
+        encoder, model_name = sentence_transformer_encoder(args.model), args.model
+    else:
+        encoder, model_name = projection_encoder(tfidf), "projection"
+
+    with tempfile.TemporaryDirectory() as directory:
+        ann = EmbeddingIndex(encoder, directory=directory, model_name=model_name)
+        started = time.perf_counter()
+        ann.add(vacancies)
+        elapsed = time.perf_counter() - started
+        print(f"{args.vacancies} vacancies encoded and indexed in {elapsed:.1f} s "
+              f"({args.vacancies / elapsed:.0f} docs/s, batch size {getattr(encoder, 'batch_size', '-')})")
+
+        queries = ann.encode(resumes)  # кодирование резюме не входит в задержку поиска
+        exact = EmbeddingIndex(encoder, directory=directory, model_name=model_name, use_ann=False)
+
+        k = args.k
+        tfidf_ms, tfidf_top = timed(lambda r: tfidf.search(r, k), resumes)
+        exact_ms, exact_top = timed(lambda q: exact.search(q, k), list(queries))
+        ann_ms, ann_top = timed(lambda q: ann.search(q, k), list(queries))
+
+        print(f"search k={k}: tfidf {tfidf_ms:.1f} ms  embeddings exact {exact_ms:.1f} ms  hnsw {ann_ms:.2f} ms")
+        print(f"recall@{k} hnsw vs exact embeddings: {overlap(exact_top, ann_top):.3f}")
+        print(f"overlap@{k} embeddings vs tfidf: {overlap(tfidf_top, exact_top):.3f}")
+
+
+if __name__ == "__main__":
+    main()
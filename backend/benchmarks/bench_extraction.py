@@ -0,0 +1,83 @@
+"""
+Бенчмарк извлечения текста из PDF: pdfplumber против PyMuPDF
+(последовательно и с параллельным разбором страниц).
+Каждый замер — в отдельном процессе, чтобы пиковая память не смешивалась.
+
+Запуск из папки backend:
+    python -m benchmarks.bench_extraction [--pages 1 5 50 200] [--repeat 3]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import fitz
+
+import text_extraction
+
+LINE = ("Python developer, 5 лет опыта: FastAPI, Django, PostgreSQL, Docker, Kubernetes, "
+        "CI/CD, asyncio, Redis, RabbitMQ. ")
+
+
+def make_pdf(path: str, pages: int) -> None:
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        text = f"Страница {number + 1}\n" + "\n".join(LINE for _ in range(40))
+        page.insert_textbox(page.rect + (36, 36, -36, -36), text, fontsize=9, fontname="helv")
+    doc.save(path)
+    doc.close()
+
+
+def _measure(engine: str, workers, path: str, queue) -> None:
+    started = time.perf_counter()
+    text = text_extraction.extract_pdf_text(path, engine=engine, workers=workers)
+    elapsed = time.perf_counter() - started
+    # ru_maxrss в КБ (Linux); дочерние процессы пула учитываются отдельно
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    queue.put((elapsed, len(text), own / 1024, children / 1024))
+
+
+def measure(engine: str, workers, path: str) -> tuple:
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_measure, args=(engine, workers, path, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 50, 200])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=max(2, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    variants = [
+        ("pdfplumber", "pdfplumber", None),
+        ("fitz", "fitz", 1),
+        ("fitz parallel", "fitz", args.workers),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = os.path.join(tmp, f"resume_{pages}.pdf")
+            make_pdf(path, pages)
+            print(f"\n{pages} pages ({os.path.getsize(path) / 1024:.0f} KB)")
+            for label, engine, workers in variants:
+                if label == "fitz parallel" and pages < text_extraction.PARALLEL_PAGE_THRESHOLD:
+                    continue
+                runs = [measure(engine, workers, path) for _ in range(args.repeat)]
+                best = min(run[0] for run in runs)
+                _, chars, own, children = runs[-1]
+                print(f"  {label:14s} {best * 1000:9.1f} ms  {chars:8d} chars  "
+                      f"peak RSS {own:6.1f} MB (+{children:.1f} MB workers)")
+
+
+if __name__ == "__main__":
+    main()
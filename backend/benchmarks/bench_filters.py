@@ -0,0 +1,129 @@
+"""
+Бенчмарк фильтров по зарплате и опыту (vacancy_filters) перед текстовым скорингом.
+
+Для нескольких фильтров разной селективности сравнивает:
+  - выдачу HH: векторизация + скоринг всех вакансий против фильтра и скоринга оставшихся;
+  - сохраненные вакансии: SELECT id по индексам колонок + VacancyIndex.search
+    по кандидатам против search по всему индексу.
+Проверяет, что фильтр на списке и условие SQL отбирают одни и те же вакансии.
+
+Запуск из папки backend:
+    python -m benchmarks.bench_filters [--vacancies 20000] [--queries 20]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.bench_retrieval import make_docs
+from models.database import Base, Vacancy
+from services.vacancy_store import upsert_vacancies
+from vacancy_filters import VacancyFilter
+from vacancy_index import VacancyIndex
+
+FILTERS = [
+    ("none", VacancyFilter()),
+    ("experience <= 3", VacancyFilter(max_experience_years=3)),
+    ("salary >= 150k", VacancyFilter(salary_min=150_000)),
+    ("salary >= 150k, exp <= 3", VacancyFilter(salary_min=150_000, max_experience_years=3)),
+    ("with salary >= 250k", VacancyFilter(salary_min=250_000, only_with_salary=True)),
+]
+EXPERIENCE = ["noExperience", "between1And3", "between1And3", "between3And6", "between3And6", "moreThan6"]
+CURRENCIES = ["RUR"] * 8 + ["USD", "EUR", "KZT"]
+
+
+def make_vacancies(n: int, seed: int = 7) -> list:
+    rnd = random.Random(seed)
+    texts = make_docs(n, 120, seed=seed)
+    items = []
+    for i, body in enumerate(texts):
+        salary = None
+        if rnd.random() < 0.7:
+            currency = rnd.choice(CURRENCIES)
+            scale = {"RUR": 1, "USD": 1 / 90, "EUR": 1 / 98, "KZT": 1 / 0.18}[currency]
+            low = rnd.choice([None, 60_000, 100_000, 150_000, 200_000, 300_000])
+            high = rnd.choice([None, (low or 100_000) * 1.5])
+            if low is None and high is None:
+                low = 120_000
+            salary = {"from": low and round(low * scale), "to": high and round(high * scale),
+                      "currency": currency, "gross": rnd.choice([True, False, None])}
+        items.append({
+            "id": str(i + 1), "name": f"vacancy {i + 1}", "salary": salary,
+            "experience": {"id": rnd.choice(EXPERIENCE)},
+            "area": {"id": "1"}, "employer": {"name": f"Company {i % 97}"},
+            "snippet": {"requirement": body, "responsibility": ""},
+        })
+    return items
+
+
+def vacancy_text(item: dict) -> str:
+    return item["snippet"]["requirement"]
+
+
+def timed(fn) -> tuple:
+    started = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vacancies", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--k", type=int, default=20)
+    args = parser.parse_args()
+
+    items = make_vacancies(args.vacancies)
+    resumes = make_docs(args.queries, 300, seed=1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        upsert_vacancies(db, items)
+
+        stored = VacancyIndex(preprocessor=str.lower, max_vacancies=len(items))
+        stored.add((item["id"], vacancy_text(item)) for item in items)
+
+        stored.search(resumes[0])  # построение IDF и постингов
+        print(f"{args.vacancies} vacancies, {args.queries} resumes, top-{args.k}")
+        print(f"{'filter':<26} {'share':>6} {'HH all ms':>10} {'HH filtered ms':>15} "
+              f"{'SQL ms':>7} {'top all ms':>11} {'top filtered ms':>16}")
+        for name, vacancy_filter in FILTERS:
+            candidates = vacancy_filter.apply(items)
+            sql_ms, sql_ids = timed(lambda: [v for (v,) in db.execute(
+                select(Vacancy.id).where(*vacancy_filter.conditions()))])
+            assert set(sql_ids) == {item["id"] for item in candidates}, name
+
+            # выдача HH: вакансии векторизуются и оцениваются при каждом поиске
+            def score(subset: list) -> None:
+                index = VacancyIndex(preprocessor=str.lower, max_vacancies=len(items))
+                ids = [item["id"] for item in subset]
+                index.add(zip(ids, map(vacancy_text, subset)))
+                for resume in resumes:
+                    index.score_ids(resume, ids)
+
+            all_ms, _ = timed(lambda: score(items))
+            filtered_ms, _ = timed(lambda: (vacancy_filter.apply(items), score(candidates)))
+
+            # сохраненные вакансии: индекс уже построен, фильтр сужает кандидатов
+            top_all_ms, _ = timed(lambda: [stored.search(r, args.k) for r in resumes])
+            allowed = sql_ids if vacancy_filter.active else None  # как в /match-vacancies/top
+            top_filtered_ms, _ = timed(lambda: [stored.search(r, args.k, 0.0, allowed) for r in resumes])
+
+            print(f"{name:<26} {len(candidates) / len(items):>6.0%} {all_ms:>10.0f} {filtered_ms:>15.0f} "
+                  f"{sql_ms:>7.1f} {top_all_ms / len(resumes):>11.1f} {top_filtered_ms / len(resumes):>16.1f}")
+
+        plan = db.execute(text("EXPLAIN QUERY PLAN " + str(
+            select(Vacancy.id).where(*FILTERS[3][1].conditions()).compile(
+                engine, compile_kwargs={"literal_binds": True})))).all()
+        print("SQL plan:", "; ".join(row[-1] for row in plan))
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Нагрузочный тест HHClient против локальной заглушки HH (benchmarks/hh_stub.py).
+
+Запуск из папки backend:
+    python -m benchmarks.bench_hh_client [--requests 500] [--concurrency 1 10 50]
+"""
+import argparse
+import asyncio
+import time
+
+import requests
+
+from benchmarks.hh_stub import run_stub_server
+from services.hh_client import HHClient
+
+
+def bench_blocking(base_url: str, n: int) -> float:
+    """Старый вариант: requests.get без сессии, по одному"""
+    started = time.perf_counter()
+    for i in range(n):
+        requests.get(f"{base_url}/vacancies", params={"text": "python", "page": i % 40, "per_page": 50})
+    return time.perf_counter() - started
+
+
+async def bench_async(base_url: str, n: int, concurrency: int) -> float:
+    client = HHClient(base_url=base_url, max_connections=concurrency, max_keepalive_connections=concurrency,
+                      use_cache=False, use_rate_limit=False)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            await client.search_vacancies({"text": "python", "page": i % 40, "per_page": 50})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    elapsed = time.perf_counter() - started
+    await client.aclose()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    with run_stub_server(port=args.port) as base_url:
+        n_blocking = min(args.requests, 100)
+        elapsed = bench_blocking(base_url, n_blocking)
+        print(f"{'requests.get (serial)':<28} {n_blocking / elapsed:8.1f} req/s")
+        for concurrency in args.concurrency:
+            elapsed = asyncio.run(bench_async(base_url, args.requests, concurrency))
+            print(f"{'HHClient c=' + str(concurrency):<28} {args.requests / elapsed:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
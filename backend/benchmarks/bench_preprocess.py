@@ -0,0 +1,76 @@
+"""
+Микробенчмарк препроцессинга: старая matcher.preprocess против TextPreprocessor.
+
+Запуск из папки backend:
+    python -m benchmarks.bench_preprocess [--docs 10000]
+"""
+import argparse
+import random
+import re
+import time
+
+from nltk.corpus import stopwords
+from nltk.stem import WordNetLemmatizer
+
+from preprocessing import TextPreprocessor
+
+WORDS_EN = [
+    'developer', 'frontend', 'backend', 'react', 'typescript', 'javascript', 'python',
+    'experience', 'teams', 'building', 'applications', 'services', 'years', 'senior',
+    'working', 'components', 'interfaces', 'testing', 'requirements', 'the', 'and', 'with',
+]
+WORDS_RU = [
+    'разработка', 'разработчик', 'опыт', 'работы', 'приложений', 'интерфейсов', 'команде',
+    'требования', 'знание', 'уверенное', 'проектов', 'обязанности', 'и', 'в', 'с', 'для',
+]
+
+
+def legacy_preprocess(text: str) -> str:
+    """Реализация matcher.preprocess до оптимизации"""
+    text = text.lower()
+    text = re.sub(r'\W+', ' ', text)
+    tokens = text.split()
+    stop_words = set(stopwords.words('english'))
+    lemmatizer = WordNetLemmatizer()
+    tokens = [lemmatizer.lemmatize(t) for t in tokens if t not in stop_words and len(t) > 2]
+    return ' '.join(tokens)
+
+
+def make_corpus(n_docs: int, seed: int = 42) -> list[str]:
+    rnd = random.Random(seed)
+    vocabulary = WORDS_EN + WORDS_RU
+    return [' '.join(rnd.choices(vocabulary, k=rnd.randint(15, 40))) + '.' for _ in range(n_docs)]
+
+
+def timed(label: str, fn) -> float:
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<32} {elapsed * 1000:10.1f} ms")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--docs', type=int, default=10_000)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.docs)
+    print(f"corpus: {len(corpus)} synthetic vacancy snippets")
+
+    legacy = timed('legacy preprocess', lambda: [legacy_preprocess(t) for t in corpus])
+
+    engine = TextPreprocessor()
+    engine.preprocess('warm up')  # загрузка ресурсов не входит в замер
+    cold = timed('TextPreprocessor.preprocess', lambda: [engine.preprocess(t) for t in corpus])
+    warm = timed('TextPreprocessor (warm cache)', lambda: [engine.preprocess(t) for t in corpus])
+
+    engine = TextPreprocessor()
+    engine.preprocess('warm up')
+    batch = timed('TextPreprocessor.preprocess_batch', lambda: engine.preprocess_batch(corpus))
+
+    print(f"speedup: single {legacy / cold:.1f}x, warm {legacy / warm:.1f}x, batch {legacy / batch:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Бенчмарк поиска по индексу вакансий: полный скоринг всех вакансий
+(score + фильтр + сортировка) против VacancyIndex.search
+(кандидаты из инвертированного индекса + точный cosine + top-k).
+Проверяет, что выдача совпадает.
+
+Запуск из папки backend:
+    python -m benchmarks.bench_retrieval [--vacancies 10000 50000 100000] [--queries 50]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from vacancy_index import VacancyIndex
+
+# Синтетический корпус: общие слова по закону Ципфа плюс словарь «профессии»
+# (вакансии и резюме одной профессии похожи между собой, как в реальных данных)
+VOCABULARY = [f"term{i}" for i in range(20_000)]
+WEIGHTS = np.cumsum(1.0 / np.arange(1, len(VOCABULARY) + 1))
+N_TOPICS = 200
+TOPIC_WORDS = [[f"topic{t}word{i}" for i in range(150)] for t in range(N_TOPICS)]
+TOPIC_SHARE = 0.5
+
+
+def make_docs(n_docs: int, length: int, seed: int) -> list:
+    rnd = random.Random(seed)
+    docs = []
+    for _ in range(n_docs):
+        topic = TOPIC_WORDS[rnd.randrange(N_TOPICS)]
+        n_topic = int(length * TOPIC_SHARE)
+        words = rnd.choices(topic, k=n_topic) + rnd.choices(VOCABULARY, cum_weights=WEIGHTS, k=length - n_topic)
+        rnd.shuffle(words)
+        docs.append(" ".join(words))
+    return docs
+
+
+def full_scoring(index: VacancyIndex, resume: str, k: int, min_score: float) -> list:
+    scores = index.score(resume)
+    matches = [(v, s) for v, s in scores.items() if s >= min_score and s > 0]
+    return sorted(matches, key=lambda m: (-m[1], m[0]))[:k]
+
+
+def timed(fn, queries: list) -> tuple:
+    started = time.perf_counter()
+    results = [fn(query) for query in queries]
+    return (time.perf_counter() - started) / len(queries) * 1000, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vacancies", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--min-score", type=float, default=0.1)
+    args = parser.parse_args()
+
+    resumes = make_docs(args.queries, 300, seed=1)
+    for n_vacancies in args.vacancies:
+        index = VacancyIndex(preprocessor=str.lower, max_vacancies=n_vacancies)
+        index.add((str(i), text) for i, text in enumerate(make_docs(n_vacancies, 80, seed=2)))
+        index.search(resumes[0])  # построение IDF и постингов
+
+        for k, min_score in ((args.k, 0.0), (args.k, args.min_score), (None, args.min_score)):
+            full_ms, expected = timed(lambda r: full_scoring(index, r, k or n_vacancies, min_score), resumes)
+            search_ms, actual = timed(lambda r: index.search(r, k, min_score), resumes)
+            same = all(
+                [s for _, s in e] == [s for _, s in a] or np.allclose([s for _, s in e], [s for _, s in a], atol=1e-6)
+                for e, a in zip(expected, actual)
+            )
+            print(f"{n_vacancies:7d} vacancies  k={str(k):4s} min={min_score:.2f}  "
+                  f"full {full_ms:7.1f} ms  search {search_ms:7.1f} ms  "
+                  f"x{full_ms / search_ms:4.1f}  same results: {same}")
+
+
+if __name__ == "__main__":
+    main()
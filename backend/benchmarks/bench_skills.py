@@ -0,0 +1,98 @@
+"""
+Бенчмарк извлечения навыков: старый цикл (regex на каждый навык) против
+SkillExtractor (одно выражение по таксономии) на больших резюме.
+
+Запуск из папки backend:
+    python -m benchmarks.bench_skills [--docs 200] [--size 50000]
+"""
+import argparse
+import random
+import re
+import time
+
+from resume_parser import extract_skills
+from skills import SkillExtractor
+
+LEGACY_SKILLS = [
+    'python', 'javascript', 'java', 'c#', 'c++', 'php', 'ruby', 'go', 'rust',
+    'typescript', 'kotlin', 'swift', 'scala', 'r', 'matlab', 'perl',
+    'html', 'css', 'react', 'vue', 'angular', 'node.js', 'express', 'django',
+    'flask', 'fastapi', 'spring', 'laravel', 'symfony', 'rails',
+    'sql', 'mysql', 'postgresql', 'mongodb', 'redis', 'elasticsearch',
+    'oracle', 'sqlite', 'cassandra', 'neo4j',
+    'docker', 'kubernetes', 'aws', 'azure', 'gcp', 'terraform', 'ansible',
+    'jenkins', 'gitlab', 'github', 'ci/cd', 'nginx', 'apache',
+    'pandas', 'numpy', 'scikit-learn', 'tensorflow', 'pytorch', 'keras',
+    'jupyter', 'tableau', 'power bi', 'spark', 'hadoop',
+    'git', 'linux', 'bash', 'powershell', 'api', 'rest', 'graphql',
+    'microservices', 'agile', 'scrum', 'jira', 'confluence'
+]
+
+WORDS = [
+    'разработка', 'опыт', 'работы', 'проектов', 'команде', 'обязанности', 'сервисов',
+    'developer', 'experience', 'building', 'applications', 'services', 'team', 'the', 'and',
+    'Python', 'Django', 'PostgreSQL', 'Docker', 'C#', 'Node.js', 'nodejs', 'питоном', 'k8s',
+    'React', 'TypeScript', 'CI/CD', 'Kafka', 'микросервисов', '2019', '—', 'лет',
+]
+
+
+def legacy_extract(text: str) -> list:
+    """Поиск навыков из resume_parser.extract_skills до оптимизации"""
+    text_lower = text.lower()
+    found = []
+    for skill in LEGACY_SKILLS:
+        pattern = r'\b' + re.escape(skill.lower()) + r'\b'
+        if re.search(pattern, text_lower):
+            found.append(skill.title())
+    return found
+
+
+def make_resumes(n_docs: int, size: int, seed: int = 42) -> list:
+    rnd = random.Random(seed)
+    docs = []
+    for _ in range(n_docs):
+        words = []
+        length = 0
+        while length < size:
+            word = rnd.choice(WORDS)
+            words.append(word)
+            length += len(word) + 1
+        docs.append(" ".join(words))
+    return docs
+
+
+def check_skill_items() -> None:
+    """Колонки HH через одиночный пробел не дают составных пунктов вроде «Python Docker»"""
+    skills = extract_skills("Навыки\nReact  TypeScript  Python Docker  Figma Pro\n")
+    assert skills == ["React", "TypeScript", "Python", "Docker", "Figma Pro"], skills
+
+
+def timed(label: str, fn) -> float:
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed * 1000:10.1f} ms")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--size", type=int, default=50_000, help="символов в резюме")
+    args = parser.parse_args()
+
+    check_skill_items()
+    docs = make_resumes(args.docs, args.size)
+    print(f"{args.docs} resumes x {args.size} chars")
+
+    compile_started = time.perf_counter()
+    extractor = SkillExtractor()
+    print(f"{'taxonomy compile':<28} {(time.perf_counter() - compile_started) * 1000:10.1f} ms")
+
+    legacy = timed("legacy per-skill loop", lambda: [legacy_extract(doc) for doc in docs])
+    engine = timed("SkillExtractor.extract_batch", lambda: extractor.extract_batch(docs))
+    print(f"speedup: x{legacy / engine:.1f}")
+
+
+if __name__ == "__main__":
+    main()
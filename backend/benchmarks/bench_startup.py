@@ -0,0 +1,36 @@
+"""
+Бенчмарк времени старта: импорт main и модулей routes в чистом интерпретаторе.
+
+Запуск из папки backend:
+    python -m benchmarks.bench_startup [--runs 5]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+MODULES = ["main", "routes.endpoints", "matcher"]
+
+
+def import_time(module: str) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], check=True)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    baseline = statistics.median(import_time("sys") for _ in range(args.runs))
+    print(f"{'interpreter':<20} {baseline * 1000:8.0f} ms")
+    for module in MODULES:
+        samples = [import_time(module) for _ in range(args.runs)]
+        print(f"{module:<20} {statistics.median(samples) * 1000:8.0f} ms "
+              f"(+{(statistics.median(samples) - baseline) * 1000:.0f} ms over interpreter)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Бенчмарк записи вакансий: построчный ORM add против bulk upsert.
+
+Запуск из папки backend:
+    python -m benchmarks.bench_vacancy_ingest [--vacancies 100000] [--orm-limit 10000]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.hh_stub import make_vacancy
+from models.database import Base, Vacancy
+from services import vacancy_store
+from services.vacancy_store import (filter_unenriched, load_descriptions, save_descriptions, save_search_results,
+                                    upsert_scores, upsert_vacancies, vacancy_row)
+
+
+def make_session(path: str):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def bench_descriptions(items: list, path: str) -> float:
+    """
+    Запись описаний из очереди обогащения: вакансии сохранены потоковым поиском (свой query_key),
+    в очередь попадают только сохраненные, и их описания действительно записываются
+    """
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    vacancy_store.SessionLocal = sessionmaker(bind=engine)  # функции хранилища открывают сессии сами
+    save_search_results(json.dumps({"text": "bench", "stream": 1}), items, 1, [(item["id"], 0.5) for item in items])
+    ids = [item["id"] for item in items]
+    assert filter_unenriched(ids + ["missing"]) == ids
+
+    started = time.perf_counter()
+    saved = save_descriptions({**{v: f"description {v}" for v in ids}, "missing": "lost"})
+    elapsed = time.perf_counter() - started
+    assert saved == set(ids)
+    assert load_descriptions(ids) == {v: f"description {v}" for v in ids}
+    assert filter_unenriched(ids) == []
+    return elapsed
+
+
+def bench_orm(items: list, path: str) -> float:
+    """Построчный ORM: db.merge на каждую вакансию"""
+    db = make_session(path)
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    for item in items:
+        db.merge(Vacancy(**vacancy_row(item, now)))
+    db.commit()
+    elapsed = time.perf_counter() - started
+    db.close()
+    return elapsed
+
+
+def bench_bulk(items: list, path: str) -> tuple:
+    db = make_session(path)
+    started = time.perf_counter()
+    upsert_vacancies(db, items, query_key=json.dumps({"text": "bench"}))
+    insert = time.perf_counter() - started
+
+    started = time.perf_counter()
+    upsert_vacancies(db, items, query_key=json.dumps({"text": "bench"}))  # все строки — конфликты
+    update = time.perf_counter() - started
+
+    started = time.perf_counter()
+    upsert_scores(db, 1, ((item["id"], 0.5) for item in items))
+    scores = time.perf_counter() - started
+    db.close()
+    return insert, update, scores
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vacancies", type=int, default=100_000)
+    parser.add_argument("--orm-limit", type=int, default=10_000, help="ORM path is slow, bench a subset")
+    args = parser.parse_args()
+
+    items = [make_vacancy(i) for i in range(1, args.vacancies + 1)]
+    with tempfile.TemporaryDirectory() as tmp:
+        orm_items = items[:args.orm_limit]
+        elapsed = bench_orm(orm_items, os.path.join(tmp, "orm.db"))
+        print(f"{'ORM merge per row':<26} {len(orm_items) / elapsed:10.0f} rows/s ({len(orm_items)} rows)")
+
+        insert, update, scores = bench_bulk(items, os.path.join(tmp, "bulk.db"))
+        print(f"{'bulk upsert (insert)':<26} {len(items) / insert:10.0f} rows/s ({len(items)} rows)")
+        print(f"{'bulk upsert (update)':<26} {len(items) / update:10.0f} rows/s")
+        print(f"{'bulk upsert scores':<26} {len(items) / scores:10.0f} rows/s")
+
+        elapsed = bench_descriptions(items, os.path.join(tmp, "enrich.db"))
+        print(f"{'save descriptions':<26} {len(items) / elapsed:10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
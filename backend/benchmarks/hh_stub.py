@@ -0,0 +1,83 @@
+"""
+Локальный заглушечный сервер HH API для нагрузочного тестирования без сети.
+
+    uvicorn benchmarks.hh_stub:app --port 8100
+    HH_API_URL=http://127.0.0.1:8100 uvicorn main:app
+
+Или как фикстура:
+
+    with run_stub_server(port=8100) as base_url:
+        ...
+"""
+import asyncio
+import contextlib
+import os
+import random
+import threading
+import time
+
+from fastapi import FastAPI, HTTPException
+
+STUB_LATENCY_MS = float(os.environ.get("HH_STUB_LATENCY_MS", "50"))
+STUB_TOTAL = int(os.environ.get("HH_STUB_TOTAL", "2000"))
+
+app = FastAPI()
+
+TITLES = ["Frontend-разработчик", "Senior React Developer", "Python backend developer",
+          "Fullstack developer (Node.js)", "QA Automation Engineer", "Go разработчик"]
+SKILLS = ["React", "TypeScript", "Python", "FastAPI", "Node.js", "Docker", "PostgreSQL", "Go"]
+
+
+def make_vacancy(vacancy_id: int) -> dict:
+    rnd = random.Random(vacancy_id)
+    salary_from = rnd.choice([None, 80_000, 150_000, 250_000])
+    return {
+        "id": str(vacancy_id),
+        "name": rnd.choice(TITLES),
+        "alternate_url": f"https://hh.ru/vacancy/{vacancy_id}",
+        "published_at": "2025-07-01T10:00:00+0300",
+        "area": {"id": "1", "name": "Москва"},
+        "employer": {"name": f"Company {vacancy_id % 97}"},
+        "salary": {"from": salary_from, "to": None, "currency": "RUR", "gross": False} if salary_from else None,
+        "experience": {"id": "between1And3", "name": "От 1 года до 3 лет"},
+        "snippet": {
+            "requirement": "Опыт работы с " + ", ".join(rnd.sample(SKILLS, 3)),
+            "responsibility": "Разработка и поддержка сервисов компании",
+        },
+    }
+
+
+@app.get("/vacancies")
+async def vacancies(text: str = "", page: int = 0, per_page: int = 20):
+    await asyncio.sleep(STUB_LATENCY_MS / 1000)
+    start = page * per_page
+    ids = range(start + 1, min(start + per_page, STUB_TOTAL) + 1)
+    return {"items": [make_vacancy(i) for i in ids], "found": STUB_TOTAL,
+            "pages": (STUB_TOTAL + per_page - 1) // per_page, "page": page, "per_page": per_page}
+
+
+@app.get("/vacancies/{vacancy_id}")
+async def vacancy(vacancy_id: int):
+    await asyncio.sleep(STUB_LATENCY_MS / 1000)
+    if not 0 < vacancy_id <= STUB_TOTAL:
+        raise HTTPException(status_code=404, detail="Not found")
+    data = make_vacancy(vacancy_id)
+    data["description"] = "<p>" + data["snippet"]["responsibility"] + "</p><ul><li>" + data["snippet"]["requirement"] + "</li></ul>"
+    return data
+
+
+@contextlib.contextmanager
+def run_stub_server(host: str = "127.0.0.1", port: int = 8100):
+    """Поднимает заглушку в фоновом потоке и возвращает ее base URL"""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://{host}:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
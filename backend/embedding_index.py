@@ -0,0 +1,578 @@
+"""
+Индекс вакансий на плотных эмбеддингах (MATCHER_BACKEND=embedding).
+
+Тексты кодируются пачками небольшой мультиязычной моделью sentence-transformers
+на CPU, поэтому «фронтенд-разработчик» и «front-end developer» близки, хотя
+общих термов у них нет. Векторы хранятся на диске в memory-mapped матрице
+float16, ближайшие соседи ищутся по HNSW (hnswlib). Без hnswlib поиск точный,
+блоками по матрице. Зависимости опциональные: без sentence-transformers
+matcher остается на TF-IDF.
+"""
+import hashlib
+import heapq
+import json
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_INDEX_DIR = os.environ.get("EMBEDDING_INDEX_DIR", "./embeddings")
+
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = int(os.environ.get("HNSW_EF_SEARCH", "128"))  # больше — точнее и медленнее
+EXACT_CHUNK_ROWS = 50_000   # строк memmap на один блок точного скоринга
+SAVE_EVERY = 1_000          # сохранять HNSW на диск после стольких новых строк
+
+Query = Union[str, np.ndarray]  # текст резюме или его эмбеддинг
+
+TAG_RE = re.compile(r'<[^>]+>')  # <highlighttext> в snippet HH
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock_file(f) -> None:
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:  # LK_LOCK сдается через ~10 секунд — ждем дальше
+                continue
+
+    def _unlock_file(f) -> None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock_file(f) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def _unlock_file(f) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _fingerprint(text: str) -> str:
+    return hashlib.sha1((text or "").encode()).hexdigest()
+
+
+def sentence_transformer_encoder(model_name: str = EMBEDDING_MODEL,
+                                 batch_size: int = EMBEDDING_BATCH_SIZE) -> Callable[[List[str]], np.ndarray]:
+    """Кодировщик текстов sentence-transformers; модель загружается при первом вызове"""
+    model = None
+    lock = threading.Lock()
+
+    def encode(texts: List[str]) -> np.ndarray:
+        nonlocal model
+        with lock:
+            if model is None:
+                from sentence_transformers import SentenceTransformer
+                model = SentenceTransformer(model_name, device="cpu")
+        return model.encode(texts, batch_size=batch_size, normalize_embeddings=True,
+                            convert_to_numpy=True, show_progress_bar=False)
+
+    encode.model_name = model_name
+    encode.batch_size = batch_size
+    return encode
+
+
+class EmbeddingIndex:
+    """
+    Эмбеддинги вакансий, адресуемые по HH id.
+
+    Файлы в directory: vectors.f16 — матрица float16 (растет удвоением),
+    ids.log — журнал «строка, id, хэш текста» (строка считается записанной, когда
+    попала в журнал), hnsw.bin — граф HNSW (метка = номер строки), meta.json —
+    модель, размерность и поколение файлов. После рестарта строки, которых нет
+    в сохраненном графе, добавляются в него из матрицы без повторного кодирования.
+
+    Папку могут использовать несколько процессов: изменения файлов идут под
+    блокировкой index.lock, а перед каждой операцией процесс дочитывает ids.log,
+    дописанный другими, или перечитывает файлы, если сменилось поколение.
+    """
+
+    def __init__(self,
+                 encoder: Optional[Callable[[List[str]], np.ndarray]] = None,
+                 directory: str = EMBEDDING_INDEX_DIR,
+                 model_name: Optional[str] = None,
+                 max_vacancies: int = 200_000,
+                 use_ann: bool = True):
+        self.encoder = encoder or sentence_transformer_encoder()
+        self.model_name = model_name or getattr(self.encoder, "model_name", "custom")
+        self.directory = directory
+        self.max_vacancies = max_vacancies
+        self.use_ann = use_ann
+
+        self._lock = threading.RLock()
+        self._dim: Optional[int] = None
+        self._vectors: Optional[np.memmap] = None
+        self._capacity = 0
+        self._rows: Dict[str, int] = {}           # HH id -> строка матрицы
+        self._row_ids: List[Optional[str]] = []   # строка -> HH id (None = удалена)
+        self._fingerprints: Dict[str, str] = {}
+        self._ann = None
+        self._ann_rows = 0                        # строк в сохраненном на диск графе
+        self._generation = 0                      # поколение файлов, растет при компактизации
+        self._log_offset = 0                      # байт ids.log уже применено
+        self._log_seen = None                     # (inode, размер, mtime) ids.log при последней сверке
+        self._lock_depth = 0
+        self._loaded = False
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return len(self._rows)
+
+    def __contains__(self, vacancy_id: str) -> bool:
+        with self._lock:
+            self._load()
+            return vacancy_id in self._rows
+
+    # --- кодирование ---
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Нормированные эмбеддинги float32, по строке на текст"""
+        if not texts:
+            return np.zeros((0, self._dim or 0), dtype=np.float32)
+        vectors = np.asarray(self.encoder([TAG_RE.sub(" ", t or "") for t in texts]), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _query(self, resume: Query) -> np.ndarray:
+        if isinstance(resume, str):
+            return self.encode([resume])[0]
+        return np.asarray(resume, dtype=np.float32).ravel()
+
+    # --- хранение ---
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """
+        Блокировка папки индекса между процессами (воркеры uvicorn, digest):
+        все изменения файлов — под ней. Повторный вход в том же процессе не ждет.
+        """
+        if self._lock_depth:
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path("index.lock"), "a+b") as f:
+            _lock_file(f)
+            self._lock_depth = 1
+            try:
+                yield
+            finally:
+                self._lock_depth = 0
+                _unlock_file(f)
+
+    def _log_state(self) -> Tuple:
+        try:
+            stat = os.stat(self._path("ids.log"))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def _load(self) -> None:
+        """
+        Открывает матрицу, журнал и граф с диска; при следующих вызовах — подхватывает
+        строки, дописанные в ids.log другими процессами, или новые файлы после компактизации
+        """
+        if self._loaded and self._log_state() == self._log_seen:
+            return
+        with self._file_lock():
+            self._log_seen = self._log_state()
+            meta = None
+            if os.path.exists(self._path("meta.json")):
+                with open(self._path("meta.json"), encoding="utf-8") as f:
+                    meta = json.load(f)
+            if self._loaded and meta is not None and self._dim is not None \
+                    and meta.get("generation", 0) == self._generation:
+                self._read_new_rows()
+                return
+            self._reset_memory()
+            self._loaded = True
+            if meta is None:
+                return
+            if meta.get("model") != self.model_name:
+                logger.info(f"Embedding index was built with {meta.get('model')}, rebuilding for {self.model_name}")
+                self._reset_files()
+                return
+            self._dim = meta["dim"]
+            self._generation = meta.get("generation", 0)
+            self._map_vectors()
+            self._read_log()
+            self._open_ann()
+
+    def _reset_memory(self) -> None:
+        self._dim = None
+        self._vectors = None
+        self._capacity = 0
+        self._rows, self._row_ids, self._fingerprints = {}, [], {}
+        self._ann = None
+        self._ann_rows = 0
+        self._generation = 0
+        self._log_offset = 0
+
+    def _map_vectors(self) -> None:
+        """Отображает vectors.f16 целиком (файл мог вырасти в другом процессе)"""
+        self._capacity = os.path.getsize(self._path("vectors.f16")) // (self._dim * 2)
+        self._vectors = np.memmap(self._path("vectors.f16"), dtype=np.float16, mode="r+",
+                                  shape=(self._capacity, self._dim))
+        if self._ann is not None and self._ann.get_max_elements() < self._capacity:
+            self._ann.resize_index(self._capacity)
+
+    def _read_log(self) -> List[int]:
+        """Применяет записи ids.log после уже прочитанных; возвращает строки, ставшие удаленными"""
+        with open(self._path("ids.log"), "rb") as f:
+            f.seek(self._log_offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1  # недописанную строку дочитаем, когда ее допишут
+        self._log_offset += end
+        dropped = []
+        for line in data[:end].decode("utf-8").splitlines():
+            parts = line.split("\t")
+            if len(parts) != 3:
+                continue  # испорченная строка после аварийного завершения
+            row, vacancy_id, fingerprint = int(parts[0]), parts[1], parts[2]
+            self._row_ids.extend([None] * (row + 1 - len(self._row_ids)))
+            if vacancy_id in self._rows:
+                self._row_ids[self._rows[vacancy_id]] = None
+                dropped.append(self._rows[vacancy_id])
+            if fingerprint:
+                self._rows[vacancy_id] = row
+                self._row_ids[row] = vacancy_id
+                self._fingerprints[vacancy_id] = fingerprint
+            else:
+                # пустой хэш — запись об удалении
+                self._rows.pop(vacancy_id, None)
+                self._fingerprints.pop(vacancy_id, None)
+        return dropped
+
+    def _read_new_rows(self) -> None:
+        """Строки, записанные другими процессами: в память и в граф (векторы уже в матрице)"""
+        start = len(self._row_ids)
+        dropped = self._read_log()
+        if len(self._row_ids) > self._capacity:
+            self._map_vectors()
+        if self._ann is None:
+            return
+        if len(self._row_ids) > start:
+            new = np.arange(start, len(self._row_ids))
+            self._ann.add_items(np.asarray(self._vectors[start:len(self._row_ids)], dtype=np.float32), new)
+            dropped += [row for row in new.tolist() if self._row_ids[row] is None]
+        for row in dropped:
+            self._mark_deleted(row)
+
+    def _append_log(self, lines: List[str]) -> None:
+        with open(self._path("ids.log"), "ab") as f:
+            f.write("".join(lines).encode("utf-8"))
+        # свои записи заново не читаем: журнал до этого места уже применен
+        self._log_offset = os.path.getsize(self._path("ids.log"))
+        self._log_seen = self._log_state()
+
+    def _reset_files(self) -> None:
+        for name in ("vectors.f16", "ids.log", "hnsw.bin", "meta.json"):
+            if os.path.exists(self._path(name)):
+                os.remove(self._path(name))
+
+    def _open_ann(self) -> None:
+        if not self.use_ann:
+            return
+        try:
+            import hnswlib
+        except ImportError:
+            logger.info("hnswlib is not installed, embedding search is exact")
+            self.use_ann = False
+            return
+        self._ann = hnswlib.Index(space="ip", dim=self._dim)  # векторы нормированы: ip = cosine
+        if os.path.exists(self._path("hnsw.bin")):
+            self._ann.load_index(self._path("hnsw.bin"), max_elements=max(self._capacity, 1), allow_replace_deleted=False)
+            self._ann_rows = self._ann.get_current_count()
+        else:
+            self._ann.init_index(max_elements=max(self._capacity, 1), ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M)
+            self._ann_rows = 0
+        self._ann.set_ef(HNSW_EF_SEARCH)
+        # строки, записанные после последнего сохранения графа
+        missing = [row for row in range(self._ann_rows, len(self._row_ids))]
+        if missing:
+            self._ann.add_items(np.asarray(self._vectors[missing], dtype=np.float32), missing)
+        for row in range(len(self._row_ids)):
+            if self._row_ids[row] is None:
+                self._mark_deleted(row)
+
+    def _mark_deleted(self, row: int) -> None:
+        if self._ann is None:
+            return
+        try:
+            self._ann.mark_deleted(row)
+        except RuntimeError:
+            pass  # уже помечена
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows <= self._capacity:
+            return
+        capacity = max(rows, self._capacity * 2, 1024)
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(self._path("vectors.f16"), "ab") as f:
+            f.truncate(capacity * self._dim * 2)
+        self._vectors = np.memmap(self._path("vectors.f16"), dtype=np.float16, mode="r+",
+                                  shape=(capacity, self._dim))
+        self._capacity = capacity
+        if self._ann is not None:
+            self._ann.resize_index(capacity)
+
+    def _init_storage(self, dim: int) -> None:
+        """Новые пустые файлы; другие процессы увидят новое поколение в meta.json и перечитают их"""
+        os.makedirs(self.directory, exist_ok=True)
+        self._reset_files()
+        self._dim = dim
+        self._generation += 1
+        with open(self._path("meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"model": self.model_name, "dim": dim, "generation": self._generation}, f)
+        open(self._path("ids.log"), "w").close()
+        self._log_offset = 0
+        self._log_seen = self._log_state()
+        self._ensure_capacity(1)
+        self._open_ann()
+
+    def save(self) -> None:
+        """Сбрасывает матрицу и граф HNSW на диск"""
+        with self._lock, self._file_lock():
+            self._load()
+            if self._vectors is not None:
+                self._vectors.flush()
+            if self._ann is not None:
+                self._ann.save_index(self._path("hnsw.bin"))
+                self._ann_rows = len(self._row_ids)
+
+    # --- обновление ---
+
+    def add(self, vacancies: Iterable[Tuple[str, str]]) -> int:
+        """
+        Добавляет (или обновляет) вакансии пар (id, текст); тексты, которые
+        уже проиндексированы, не кодируются повторно. Возвращает количество
+        закодированных вакансий.
+        """
+        with self._lock:
+            self._load()
+            new = {}
+            for vacancy_id, text in vacancies:
+                vacancy_id = str(vacancy_id)
+                fingerprint = _fingerprint(text)
+                if self._fingerprints.get(vacancy_id) != fingerprint:
+                    new[vacancy_id] = (text, fingerprint)
+        if not new:
+            return 0
+
+        # кодирование — самая долгая часть, индекс на это время не блокируется
+        vectors = self.encode([text for text, _ in new.values()])
+
+        with self._lock, self._file_lock():
+            self._load()
+            if self._dim is None:
+                self._init_storage(vectors.shape[1])
+            start = len(self._row_ids)
+            self._ensure_capacity(start + len(new))
+            self._vectors[start:start + len(new)] = vectors.astype(np.float16)
+            self._vectors.flush()
+
+            lines = []
+            for offset, (vacancy_id, (_, fingerprint)) in enumerate(new.items()):
+                if vacancy_id in self._rows:
+                    self._drop_row(vacancy_id)
+                row = start + offset
+                self._rows[vacancy_id] = row
+                self._row_ids.append(vacancy_id)
+                self._fingerprints[vacancy_id] = fingerprint
+                lines.append(f"{row}\t{vacancy_id}\t{fingerprint}\n")
+            self._append_log(lines)
+
+            if self._ann is not None:
+                self._ann.add_items(vectors, np.arange(start, start + len(new)))
+            self._enforce_size_limit()
+            if len(self._row_ids) - self._ann_rows >= SAVE_EVERY:
+                self.save()
+            return len(new)
+
+    def remove(self, vacancy_id: str) -> bool:
+        with self._lock, self._file_lock():
+            self._load()
+            if vacancy_id not in self._rows:
+                return False
+            row = self._rows[vacancy_id]
+            self._drop_row(vacancy_id)
+            self._fingerprints.pop(vacancy_id, None)
+            self._append_log([f"{row}\t{vacancy_id}\t\n"])
+            return True
+
+    def _drop_row(self, vacancy_id: str) -> None:
+        row = self._rows.pop(vacancy_id)
+        self._row_ids[row] = None
+        self._mark_deleted(row)
+
+    def _enforce_size_limit(self) -> None:
+        """Вытесняет самые старые вакансии, а при большой доле удаленных строк переписывает файлы"""
+        overflow = len(self._rows) - self.max_vacancies
+        if overflow > 0:
+            for vacancy_id in [v for v in self._row_ids if v is not None][:overflow]:
+                self.remove(vacancy_id)
+
+        dead = len(self._row_ids) - len(self._rows)
+        if dead >= 1_000 and dead * 2 >= len(self._row_ids):
+            self._compact()
+
+    def _compact(self) -> None:
+        alive = [row for row, v in enumerate(self._row_ids) if v is not None]
+        vectors = np.array(self._vectors[alive])
+        row_ids = [self._row_ids[row] for row in alive]
+        fingerprints = dict(self._fingerprints)
+
+        self._vectors = None
+        self._ann = None
+        self._capacity = 0
+        self._rows, self._row_ids = {}, []
+        self._init_storage(self._dim)
+        self._ensure_capacity(len(alive))
+        self._vectors[:len(alive)] = vectors
+        self._vectors.flush()
+        self._append_log([f"{row}\t{vacancy_id}\t{fingerprints[vacancy_id]}\n"
+                          for row, vacancy_id in enumerate(row_ids)])
+        self._row_ids = row_ids
+        self._rows = {v: row for row, v in enumerate(row_ids)}
+        if self._ann is not None and alive:
+            self._ann.add_items(vectors.astype(np.float32), np.arange(len(alive)))
+        self.save()
+
+    # --- скоринг ---
+
+    def _exact(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Cosine similarity по блокам матрицы: (строки, оценки)"""
+        if rows is not None:
+            for start in range(0, len(rows), EXACT_CHUNK_ROWS):
+                chunk = rows[start:start + EXACT_CHUNK_ROWS]
+                yield chunk, np.asarray(self._vectors[chunk], dtype=np.float32) @ query
+            return
+        n_rows = len(self._row_ids)
+        for start in range(0, n_rows, EXACT_CHUNK_ROWS):
+            block = np.asarray(self._vectors[start:min(start + EXACT_CHUNK_ROWS, n_rows)], dtype=np.float32)
+            yield np.arange(start, start + len(block)), block @ query
+
+    def _allowed_rows(self, vacancy_ids: Iterable[str]) -> np.ndarray:
+        return np.array(sorted(self._rows[v] for v in map(str, vacancy_ids) if v in self._rows), dtype=np.int64)
+
+    def score_ids(self, resume: Query, vacancy_ids: List[str]) -> List[float]:
+        """Cosine similarity резюме с указанными вакансиями (0.0 для отсутствующих)"""
+        query = self._query(resume)
+        with self._lock:
+            self._load()
+            rows = [self._rows.get(v) for v in map(str, vacancy_ids)]
+            present = [row for row in rows if row is not None]
+            if not present:
+                return [0.0] * len(vacancy_ids)
+            sims = dict(zip(present, (np.asarray(self._vectors[present], dtype=np.float32) @ query).tolist()))
+        return [sims[row] if row is not None else 0.0 for row in rows]
+
+    def score_texts(self, resume: Query, vacancy_texts: List[str]) -> List[float]:
+        """Скоринг текстов, не добавляя их в индекс"""
+        return (self.encode(vacancy_texts) @ self._query(resume)).tolist()
+
+    def search(self, resume: Query, k: Optional[int] = 50, min_score: float = 0.0,
+               vacancy_ids: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Ближайшие вакансии: (id, similarity) по убыванию similarity.
+        Top-k по всему индексу — через HNSW (приближенно); k=None и поиск
+        по подмножеству vacancy_ids — точно, блоками по матрице.
+        """
+        query = self._query(resume)
+        with self._lock:
+            self._load()
+            if not self._rows:
+                return []
+            row_ids = self._row_ids
+
+            if k and vacancy_ids is None and self._ann is not None:
+                self._ann.set_ef(max(HNSW_EF_SEARCH, 2 * k))
+                try:
+                    labels, distances = self._ann.knn_query(query.reshape(1, -1), k=min(k, len(self._rows)))
+                except RuntimeError:
+                    # граф не нашел k живых соседей (много удаленных) — ищем точно
+                    labels = None
+                if labels is not None:
+                    matches = [(row_ids[row], 1.0 - float(distance))
+                               for row, distance in zip(labels[0].tolist(), distances[0].tolist())]
+                    return [(v, s) for v, s in matches if v is not None and s >= min_score and s > 0]
+
+            allowed = self._allowed_rows(vacancy_ids) if vacancy_ids is not None else None
+            matches = []
+            for rows, scores in self._exact(query, allowed):
+                keep = (scores >= min_score) & (scores > 0)
+                matches.extend((float(s), row_ids[row]) for row, s in zip(rows[keep].tolist(), scores[keep].tolist())
+                               if row_ids[row] is not None)
+        top = heapq.nlargest(k, matches) if k else sorted(matches, reverse=True)
+        return [(vacancy_id, score) for score, vacancy_id in top]
+
+    def top_k_batch(self, resumes: np.ndarray, k: int = 50,
+                    vacancy_ids: Optional[Iterable[str]] = None,
+                    min_score: float = 0.0) -> Iterator[Tuple[int, List[Tuple[str, float]]]]:
+        """
+        Лучшие k вакансий для каждого резюме (эмбеддинги резюме построчно, см. encode);
+        точно, блоками 256 резюме × EXACT_CHUNK_ROWS строк матрицы, как
+        vacancy_index.top_k_similarities. Интерфейс — как у VacancyIndex.top_k_batch.
+        """
+        with self._lock:
+            self._load()
+            if not self._rows:
+                return
+            rows = self._allowed_rows(vacancy_ids) if vacancy_ids is not None else \
+                np.array([row for row, v in enumerate(self._row_ids) if v is not None], dtype=np.int64)
+            if not len(rows):
+                return
+            # ссылка на текущую матрицу: рост и компактизация создают новый memmap, этот остается прежним
+            vectors = self._vectors
+            row_ids = [self._row_ids[row] for row in rows.tolist()]
+
+        resumes = np.asarray(resumes, dtype=np.float32)
+        k = min(k, len(row_ids))
+        for start in range(0, len(resumes), 256):
+            queries = resumes[start:start + 256]
+            best_scores = np.empty((len(queries), 0), dtype=np.float32)
+            best_columns = np.empty((len(queries), 0), dtype=np.int64)
+            for chunk_start in range(0, len(rows), EXACT_CHUNK_ROWS):
+                chunk = rows[chunk_start:chunk_start + EXACT_CHUNK_ROWS]
+                block = queries @ np.asarray(vectors[chunk], dtype=np.float32).T
+                if block.shape[1] > k:
+                    columns = np.argpartition(block, -k, axis=1)[:, -k:]
+                else:
+                    columns = np.broadcast_to(np.arange(block.shape[1]), block.shape)
+                scores = np.hstack([best_scores, np.take_along_axis(block, columns, axis=1)])
+                columns = np.hstack([best_columns, columns + chunk_start])
+                if scores.shape[1] > k:
+                    keep = np.argpartition(scores, -k, axis=1)[:, -k:]
+                    scores = np.take_along_axis(scores, keep, axis=1)
+                    columns = np.take_along_axis(columns, keep, axis=1)
+                best_scores, best_columns = scores, columns
+
+            order = np.argsort(-best_scores, axis=1)
+            top = np.take_along_axis(best_columns, order, axis=1)
+            scores = np.take_along_axis(best_scores, order, axis=1)
+            for offset in range(len(queries)):
+                yield start + offset, [(row_ids[column], float(score))
+                                       for column, score in zip(top[offset].tolist(), scores[offset].tolist())
+                                       if score > min_score]
@@ -1,21 +1,18 @@
 from fastapi import FastAPI, Query
 from fastapi.responses import JSONResponse
-import requests
 import logging
+from services.hh_client import get_hh_client
 
 app = FastAPI()
 logger = logging.getLogger("uvicorn.access")
 
 @app.get("/match-hh")
-def match_hh(query: str, page: int = 0):
-    url = "https://api.hh.ru/vacancies"
+async def match_hh(query: str, page: int = 0, per_page: int = Query(50, le=100), area: int = 1):
     params = {
         "text": query,
         "page": page,
-        "per_page": 50,
-        "area": 1
+        "per_page": per_page,
+        "area": area
     }
-    response = requests.get(url, params=params)
-    data = response.json()
+    data = await get_hh_client().search_vacancies(params)
     return data.get("items", [])
-
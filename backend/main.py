@@ -1,10 +1,21 @@
+import asyncio
+import logging
 import os
 from fastapi import FastAPI, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from routes import endpoints
+from routes import endpoints, bot_endpoints
+import nlp_resources
+from services.hh_client import close_hh_client
+from services.extraction_jobs import extraction_jobs
+from services.digest import DIGEST_INTERVAL_HOURS, digest_loop
+from services.enrichment import vacancy_enricher
+from vacancy_stats import VACANCY_STATS_INTERVAL_MINUTES, stats_loop
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
 app.include_router(endpoints.router)
+app.include_router(bot_endpoints.router)
 
 origins = [
     "http://localhost:3000",
@@ -21,6 +32,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def load_nlp_resources():
+    # Ресурсы берутся из локальной папки, без сети; прогрев идет в фоне
+    if nlp_resources.check_resources():
+        nlp_resources.warm_up_in_background()
+
+@app.on_event("startup")
+async def start_digest():
+    # Ночной дайджест: лучшие вакансии для всех активных резюме (DIGEST_INTERVAL_HOURS=0 — выключить)
+    if DIGEST_INTERVAL_HOURS > 0:
+        app.state.digest_task = asyncio.create_task(digest_loop())
+
+@app.on_event("startup")
+async def start_vacancy_stats():
+    # Пересчет статистики вакансий (VACANCY_STATS_INTERVAL_MINUTES=0 — выключить)
+    if VACANCY_STATS_INTERVAL_MINUTES > 0:
+        app.state.stats_task = asyncio.create_task(stats_loop())
+
+@app.on_event("startup")
+async def fail_stale_extraction_jobs():
+    # задачи извлечения, прерванные падением прошлого процесса
+    failed = extraction_jobs.fail_stale_jobs()
+    if failed:
+        logger.warning(f"Marked {failed} interrupted extraction jobs as failed")
+
+@app.on_event("startup")
+async def start_enrichment():
+    # Фоновая загрузка полных описаний вакансий из выдачи /match-vacancies
+    vacancy_enricher.start()
+
+@app.on_event("shutdown")
+async def shutdown_hh_client():
+    await vacancy_enricher.stop()
+    await close_hh_client()
+    extraction_jobs.shutdown()
+    digest_task = getattr(app.state, "digest_task", None)
+    if digest_task is not None:
+        digest_task.cancel()
+    stats_task = getattr(app.state, "stats_task", None)
+    if stats_task is not None:
+        stats_task.cancel()
+
 @app.get("/")
 async def root():
     import datetime
@@ -1,40 +1,98 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+import logging
+import os
+import threading
 
-nltk.download('stopwords')
-nltk.download('wordnet')
+from preprocessing import get_preprocessor
+from vacancy_index import Resume, VacancyIndex
+
+logger = logging.getLogger(__name__)
+
+# tfidf — VacancyIndex; embedding — EmbeddingIndex (нужен sentence-transformers,
+# без него — TF-IDF)
+MATCHER_BACKEND = os.environ.get("MATCHER_BACKEND", "tfidf")
 
 def preprocess(text: str) -> str:
-    text = text.lower()
-    text = re.sub(r'\W+', ' ', text)  # удаляем неалфавитные символы
-    tokens = text.split()
-    stop_words = set(stopwords.words('english'))
-    lemmatizer = WordNetLemmatizer()
-    tokens = [lemmatizer.lemmatize(t) for t in tokens if t not in stop_words and len(t) > 2]
-    return ' '.join(tokens)
-
-def calculate_similarity(resume_text: str, vacancy_texts: list[str]) -> list[tuple[int, float]]:
-    if not resume_text or not vacancy_texts:
-        return []
+    return get_preprocessor().preprocess(text)
+
+def preprocess_batch(texts: list[str]) -> list[str]:
+    return get_preprocessor().preprocess_batch(texts)
+
+# Общий для процесса индекс вакансий: вакансии векторизуются один раз,
+# IDF обновляется инкрементально по мере поступления новых вакансий
+vacancy_index = VacancyIndex(preprocessor=preprocess, batch_preprocessor=preprocess_batch)
+
+_embedding_index = None
+_embedding_checked = False
+_embedding_lock = threading.Lock()
 
-    corpus = [preprocess(resume_text)] + [preprocess(v) for v in vacancy_texts]
+def embedding_index():
+    """Индекс эмбеддингов, если выбран MATCHER_BACKEND=embedding и модель доступна; иначе None"""
+    global _embedding_index, _embedding_checked
+    if _embedding_checked:
+        return _embedding_index
+    with _embedding_lock:
+        if not _embedding_checked and MATCHER_BACKEND == "embedding":
+            try:
+                from embedding_index import EmbeddingIndex
+                index = EmbeddingIndex()
+                index.encode(["проверка модели"])  # загрузка модели; без нее остаемся на TF-IDF
+                _embedding_index = index
+            except Exception as e:
+                logger.warning(f"Embedding model is unavailable ({e!r}), falling back to TF-IDF matching")
+        _embedding_checked = True
+    return _embedding_index
 
-    tfidf = TfidfVectorizer(
-        ngram_range=(1,2),       # учитываем униграммы и биграммы
-        min_df=2,                # игнорируем редкие слова
-        max_df=0.9,              # игнорируем слишком частые
-        norm='l2',               # нормализация
-        max_features=10000       # ограничиваем словарь (если большой корпус)
-    )
-    tfidf_matrix = tfidf.fit_transform(corpus)
+def active_index():
+    """Индекс активного бэкенда (у обоих одинаковый интерфейс add/search/score_ids/top_k_batch)"""
+    index = embedding_index()
+    return vacancy_index if index is None else index
 
-    resume_vec = tfidf_matrix[0:1]
-    vacancy_vecs = tfidf_matrix[1:]
+def resume_query(resume: dict):
+    """
+    Представление резюме из resume_store для активного бэкенда: вектор частот
+    термов или эмбеддинг (считается один раз и кэшируется вместе с резюме)
+    """
+    index = embedding_index()
+    if index is None:
+        return resume["vector"]
+    if resume.get("embedding") is None:
+        resume["embedding"] = index.encode([resume["text"] or ""])[0]
+    return resume["embedding"]
 
-    similarities = cosine_similarity(resume_vec, vacancy_vecs).flatten()
+def vectorize_resume(resume_text: str):
+    """Частоты термов резюме — считаются один раз и хранятся вместе с резюме"""
+    return vacancy_index.vectorize([resume_text])
+
+def vacancy_text(vacancy: dict, description: str | None = None) -> str:
+    """
+    Текст вакансии HH для сравнения: название и полное описание, если оно
+    уже загружено (services.enrichment), иначе — название и фрагменты snippet
+    """
+    text = vacancy["name"]
+    if description:
+        return text + " " + description
+    if vacancy.get("snippet", {}).get("responsibility"):
+        text += " " + vacancy["snippet"]["responsibility"]
+    if vacancy.get("snippet", {}).get("requirement"):
+        text += " " + vacancy["snippet"]["requirement"]
+    return text
+
+def calculate_similarity(resume: Resume, vacancy_texts: list[str],
+                         vacancy_ids: list[str] | None = None) -> list[tuple[int, float]]:
+    """resume — текст резюме или его представление из resume_query / vectorize_resume"""
+    if (isinstance(resume, str) and not resume) or not vacancy_texts:
+        return []
+
+    index = active_index()
+    if vacancy_ids is None:
+        similarities = index.score_texts(resume, vacancy_texts)
+    else:
+        index.add(zip(vacancy_ids, vacancy_texts))
+        similarities = index.score_ids(resume, vacancy_ids)
 
     return list(enumerate(similarities))
+
+def find_top_matches(resume: Resume, k: int | None = 50, min_similarity: float = 0.0,
+                     vacancy_ids: list[str] | None = None) -> list[tuple[str, float]]:
+    """Лучшие вакансии индекса для резюме: (id, similarity) по убыванию similarity"""
+    return active_index().search(resume, k, min_similarity, vacancy_ids)
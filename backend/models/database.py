@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Float, Boolean, Text
+from sqlalchemy import create_engine, event, text, Column, Integer, String, DateTime, Float, Boolean, Text, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -17,6 +17,10 @@ class Resume(Base):
     skills = Column(Text)  # JSON string
     experience_years = Column(Integer)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
+    analysis = Column(Text)  # JSON string
+    vector = Column(LargeBinary)  # частоты термов резюме (scipy npz), см. matcher.vectorize_resume
+    last_accessed_at = Column(DateTime, default=datetime.utcnow, index=True)
+    content_hash = Column(String(64), unique=True, index=True, nullable=True)  # sha256 исходного файла
 
 class Vacancy(Base):
     __tablename__ = "vacancies"
@@ -30,18 +34,220 @@ class Vacancy(Base):
     experience_required = Column(String)
     similarity_score = Column(Float)
     hh_url = Column(String)
+    raw = Column(Text)  # JSON ответа HH (для выдачи без запроса к HH)
     fetched_at = Column(DateTime, default=datetime.utcnow)
+    enriched_at = Column(DateTime, nullable=True, index=True)  # когда запрашивалось полное описание (services.enrichment)
+    area_id = Column(String, nullable=True, index=True)
+    salary_currency = Column(String(3), nullable=True)
+    hh_created_at = Column(DateTime, nullable=True)   # created_at в HH: когда вакансия создана впервые
+    published_at = Column(DateTime, nullable=True)    # растет, когда работодатель поднимает вакансию
+    first_seen_at = Column(DateTime, nullable=True)   # первая загрузка к нам; при обновлениях не меняется
+    reposts = Column(Integer, default=0)              # сколько раз при повторных загрузках рос published_at
+    # для фильтров (vacancy_filters): вилка в рублях до вычета НДФЛ и минимум лет опыта
+    salary_min_rub = Column(Integer, nullable=True)
+    salary_max_rub = Column(Integer, nullable=True, index=True)
+    experience_min_years = Column(Integer, nullable=True, index=True)
+
+class VacancyScore(Base):
+    """Similarity резюме × вакансия"""
+    __tablename__ = "vacancy_scores"
+
+    resume_id = Column(Integer, primary_key=True)
+    vacancy_id = Column(String, primary_key=True)
+    score = Column(Float, nullable=False)
+    computed_at = Column(DateTime, default=datetime.utcnow)
+    scored_on = Column(String, nullable=False, default="snippet")  # snippet | description
+
+    __table_args__ = (
+        Index("ix_vacancy_scores_resume_score", "resume_id", "score"),
+        Index("ix_vacancy_scores_vacancy_id", "vacancy_id"),
+    )
+
+class VacancyStats(Base):
+    """Статистика вакансии, пересчитывается по расписанию (vacancy_stats.build_vacancy_stats_rollup)"""
+    __tablename__ = "vacancy_stats"
+
+    vacancy_id = Column(String, primary_key=True)
+    total_applications = Column(Integer, nullable=False, default=0)
+    sent_applications = Column(Integer, nullable=False, default=0)
+    failed_applications = Column(Integer, nullable=False, default=0)
+    daily_applications = Column(LargeBinary)   # uint16 × VACANCY_STATS_DAYS, по дням до computed_at
+    salary = Column(Float, nullable=True)      # точечная оценка зарплаты, RUB до вычета НДФЛ
+    salary_percentile = Column(Float, nullable=True)  # место зарплаты среди вакансий региона, 0..1
+    computed_at = Column(DateTime, nullable=False)
+
+class SalaryStats(Base):
+    """Перцентили зарплат (RUB до вычета НДФЛ) по региону или поисковому запросу"""
+    __tablename__ = "salary_stats"
+
+    scope = Column(String, primary_key=True)  # area | query
+    key = Column(String, primary_key=True)    # area_id или query_key
+    count = Column(Integer, nullable=False)
+    percentiles = Column(LargeBinary, nullable=False)  # float32 × len(SALARY_PERCENTILES)
+    computed_at = Column(DateTime, nullable=False)
+
+class VacancySearchHit(Base):
+    """Какие вакансии вернул HH на поисковый запрос (ключ — нормализованные параметры)"""
+    __tablename__ = "vacancy_search_hits"
+
+    query_key = Column(String, primary_key=True)
+    vacancy_id = Column(String, primary_key=True)
+    seen_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_vacancy_search_hits_query_seen", "query_key", "seen_at"),
+    )
+
+class ExtractionJob(Base):
+    """Фоновое извлечение текста из загруженного резюме"""
+    __tablename__ = "extraction_jobs"
+
+    id = Column(String, primary_key=True)  # uuid4 hex
+    status = Column(String, default="queued", index=True)  # queued, running, done, failed
+    filename = Column(String)
+    path = Column(String)
+    content_hash = Column(String(64), index=True)  # sha256 загруженного файла
+    resume_id = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
 
 class Application(Base):
+    """Отклик на вакансию; строки со status=pending — очередь воркера откликов (worker.py)"""
     __tablename__ = "applications"
     
     id = Column(Integer, primary_key=True, index=True)
     vacancy_id = Column(String, index=True)
     resume_id = Column(Integer)
-    status = Column(String, default="pending")  # pending, sent, failed
-    applied_at = Column(DateTime, default=datetime.utcnow)
+    status = Column(String, default="pending")  # pending, running, paused, sent, failed, cancelled
+    applied_at = Column(DateTime, default=datetime.utcnow, index=True)
     cover_letter = Column(Text)
     auto_applied = Column(Boolean, default=False)
+    batch_id = Column(String(32), index=True, nullable=True)  # запуск автооткликов (/bot/start-auto-apply)
+    similarity = Column(Float, nullable=True)
+    scheduled_at = Column(DateTime, default=datetime.utcnow)  # не раньше этого времени
+    attempts = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    locked_by = Column(String, nullable=True)  # воркер, взявший отклик
+    locked_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_applications_status_scheduled", "status", "scheduled_at"),
+        Index("ix_applications_resume_status", "resume_id", "status"),
+        Index("ix_applications_status_applied", "status", "applied_at"),
+    )
+
+class ApplicationCounter(Base):
+    """Число откликов по статусам; ведется триггерами на applications (см. APPLICATION_STATS_TRIGGERS)"""
+    __tablename__ = "application_counters"
+
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class ApplicationDailyCount(Base):
+    """Откликов за день (по applied_at) на резюме и статус; ведется теми же триггерами"""
+    __tablename__ = "application_daily"
+
+    day = Column(String(10), primary_key=True)  # YYYY-MM-DD
+    resume_id = Column(Integer, primary_key=True)
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_application_daily_resume", "resume_id", "day"),
+    )
+
+class WorkerStatus(Base):
+    """Метрики процессов worker.py: пишутся периодически, читаются /bot/worker-metrics"""
+    __tablename__ = "worker_status"
+
+    worker_id = Column(String, primary_key=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, index=True)
+    metrics = Column(Text)  # JSON
+
+class ScheduledJob(Base):
+    """Периодическая задача API (дайджест, статистика): кто и когда ее выполняет, см. services.scheduled_jobs"""
+    __tablename__ = "scheduled_jobs"
+
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=True)          # процесс, выполняющий задачу сейчас
+    locked_until = Column(DateTime, nullable=True)  # аренда истекает, если процесс упал
+    last_run_at = Column(DateTime, nullable=True)
+
+# Счетчики откликов меняются в той же транзакции, что и сама строка applications,
+# поэтому статистика не расходится с таблицей, кто бы ее ни менял (API, воркеры).
+_COUNT_KEY = {
+    "NEW": "COALESCE(date(NEW.applied_at), ''), COALESCE(NEW.resume_id, 0), COALESCE(NEW.status, '')",
+    "OLD": "COALESCE(date(OLD.applied_at), ''), COALESCE(OLD.resume_id, 0), COALESCE(OLD.status, '')",
+}
+
+def _count_statements(row: str, delta: str) -> str:
+    return (
+        f"INSERT INTO application_counters (status, count) VALUES (COALESCE({row}.status, ''), {delta}) "
+        f"ON CONFLICT (status) DO UPDATE SET count = count + ({delta}); "
+        f"INSERT INTO application_daily (day, resume_id, status, count) VALUES ({_COUNT_KEY[row]}, {delta}) "
+        f"ON CONFLICT (day, resume_id, status) DO UPDATE SET count = count + ({delta});"
+    )
+
+APPLICATION_STATS_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS trg_applications_count_insert AFTER INSERT ON applications "
+    f"BEGIN {_count_statements('NEW', '1')} END",
+    "CREATE TRIGGER IF NOT EXISTS trg_applications_count_update AFTER UPDATE OF status, applied_at, resume_id "
+    "ON applications WHEN OLD.status IS NOT NEW.status OR OLD.resume_id IS NOT NEW.resume_id "
+    "OR date(OLD.applied_at) IS NOT date(NEW.applied_at) "
+    f"BEGIN {_count_statements('OLD', '-1')} {_count_statements('NEW', '1')} END",
+    "CREATE TRIGGER IF NOT EXISTS trg_applications_count_delete AFTER DELETE ON applications "
+    f"BEGIN {_count_statements('OLD', '-1')} END",
+]
+
+def rebuild_application_counts(connection) -> None:
+    """Пересчитывает счетчики по всей таблице applications (GROUP BY по индексу status, applied_at)"""
+    connection.execute(text("DELETE FROM application_counters"))
+    connection.execute(text("DELETE FROM application_daily"))
+    connection.execute(text(
+        "INSERT INTO application_counters (status, count) "
+        "SELECT COALESCE(status, ''), COUNT(*) FROM applications GROUP BY 1"))
+    connection.execute(text(
+        "INSERT INTO application_daily (day, resume_id, status, count) "
+        "SELECT COALESCE(date(applied_at), ''), COALESCE(resume_id, 0), COALESCE(status, ''), COUNT(*) "
+        "FROM applications GROUP BY 1, 2, 3"))
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_application_stats_triggers(target, connection, **kw):
+    for statement in APPLICATION_STATS_TRIGGERS:
+        connection.execute(text(statement))
+    # база создана до появления счетчиков — заполняем их один раз
+    if connection.execute(text("SELECT 1 FROM application_counters LIMIT 1")).first() is None:
+        rebuild_application_counts(connection)
+
+def _column_ddl(column, dialect) -> str:
+    """Определение колонки для ALTER TABLE ADD COLUMN (SQLite: без UNIQUE, NOT NULL — только с DEFAULT)"""
+    ddl = f"{column.name} {column.type.compile(dialect=dialect)}"
+    default = column.default.arg if column.default is not None and column.default.is_scalar else None
+    if default is not None:
+        literal = int(default) if isinstance(default, bool) else default
+        ddl += " DEFAULT " + (f"'{literal}'" if isinstance(literal, str) else str(literal))
+        if not column.nullable:
+            ddl += " NOT NULL"
+    return ddl
+
+def upgrade_schema(bind=engine) -> None:
+    """
+    Доводит таблицы базы, созданной прежней версией, до моделей: create_all
+    существующие таблицы не меняет. Недостающие колонки добавляются ALTER TABLE
+    (уникальность — уникальным индексом), индексы — CREATE INDEX IF NOT EXISTS.
+    """
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {row[1] for row in connection.execute(text(f"PRAGMA table_info({table.name})"))}
+            if not existing:
+                continue
+            for column in table.columns:
+                if column.name not in existing:
+                    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {_column_ddl(column, bind.dialect)}"))
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
 
-# Создание таблиц
-Base.metadata.create_all(bind=engine)
\ No newline at end of file
+# Создание таблиц и обновление схемы существующей базы
+Base.metadata.create_all(bind=engine)
+upgrade_schema()
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""
+Лингвистические ресурсы (корпуса NLTK) для матчера.
+
+Ресурсы лежат в локальной версионированной папке и загружаются лениво, при
+первом обращении. Скачивание выполняется отдельно, при сборке образа:
+
+    python nlp_resources.py --download
+    python nlp_resources.py --check
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_VERSION = "1"
+RESOURCE_DIR = os.environ.get(
+    "NLP_RESOURCE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "nlp_data", f"v{RESOURCE_VERSION}"),
+)
+
+# имя пакета nltk -> путь для nltk.data.find
+NLTK_RESOURCES = {
+    "stopwords": "corpora/stopwords",
+    "wordnet": "corpora/wordnet",
+    "omw-1.4": "corpora/omw-1.4",
+}
+
+_configured = False
+_warm_up_thread = None
+
+
+def configure() -> None:
+    """Добавляет локальную папку ресурсов в пути поиска NLTK (однократно)"""
+    global _configured
+    if _configured:
+        return
+    import nltk
+    if RESOURCE_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, RESOURCE_DIR)
+    _configured = True
+
+
+def missing_resources() -> List[str]:
+    configure()
+    import nltk
+
+    missing = []
+    for name, path in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            try:
+                nltk.data.find(f"{path}.zip")
+            except LookupError:
+                missing.append(name)
+    return missing
+
+
+def download_resources(target_dir: str = RESOURCE_DIR) -> bool:
+    import nltk
+
+    os.makedirs(target_dir, exist_ok=True)
+    ok = True
+    for name in NLTK_RESOURCES:
+        ok = nltk.download(name, download_dir=target_dir, quiet=True) and ok
+    return ok
+
+
+def check_resources() -> bool:
+    """Проверка при старте воркера: ресурсы на месте, сеть не нужна"""
+    missing = missing_resources()
+    if missing:
+        logger.warning(
+            "NLP resources missing in %s: %s. Run `python nlp_resources.py --download`",
+            RESOURCE_DIR, ", ".join(missing),
+        )
+        return False
+    return True
+
+
+def _warm_up() -> None:
+    from preprocessing import get_preprocessor
+    try:
+        # первый вызов загружает стоп-слова, WordNet и стеммер
+        get_preprocessor().preprocess("warming up linguistic resources ресурсы")
+        logger.info("NLP resources warmed up")
+    except LookupError as e:
+        logger.warning(f"NLP warm-up failed: {e}")
+
+
+def warm_up_in_background() -> threading.Thread:
+    """Прогревает ресурсы один раз на воркер, не блокируя старт"""
+    global _warm_up_thread
+    if _warm_up_thread is None:
+        _warm_up_thread = threading.Thread(target=_warm_up, name="nlp-warm-up", daemon=True)
+        _warm_up_thread.start()
+    return _warm_up_thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage local NLP resources")
+    parser.add_argument("--download", action="store_true", help="download resources into the resource dir")
+    parser.add_argument("--check", action="store_true", help="exit with code 1 if resources are missing")
+    parser.add_argument("--dir", default=RESOURCE_DIR, help="target directory for --download")
+    args = parser.parse_args()
+
+    if args.download:
+        if not download_resources(args.dir):
+            sys.exit("Failed to download NLP resources")
+        print(f"NLP resources v{RESOURCE_VERSION} saved to {args.dir}")
+    if args.check or not args.download:
+        missing = missing_resources()
+        print("missing: " + ", ".join(missing) if missing else "all NLP resources present")
+        sys.exit(1 if missing else 0)
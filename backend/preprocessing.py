@@ -0,0 +1,78 @@
+import re
+import threading
+from functools import lru_cache
+from typing import List, Optional
+
+import nlp_resources
+
+# \w{3,} эквивалентно старому re.sub(r'\W+', ' ') + split() + фильтру len(t) > 2
+TOKEN_RE = re.compile(r'\w{3,}')
+CYRILLIC_RE = re.compile(r'[а-яё]')
+
+
+class TextPreprocessor:
+    """
+    Переиспользуемый препроцессор текста для матчинга.
+
+    Стоп-слова (английские и русские), лемматизатор и стеммер создаются один
+    раз на процесс, нормализация токена мемоизируется LRU-кэшем. Английские
+    токены лемматизируются WordNet, русские — стеммером Snowball.
+    """
+
+    def __init__(self, token_cache_size: int = 200_000):
+        self._lock = threading.Lock()
+        self._stop_words: Optional[frozenset] = None
+        self._lemmatizer = None
+        self._stemmer = None
+        self.normalize_token = lru_cache(maxsize=token_cache_size)(self._normalize_token)
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._stop_words is not None:
+                return
+            # NLTK импортируется и читает корпуса только при первом использовании
+            nlp_resources.configure()
+            from nltk.corpus import stopwords
+            from nltk.stem import SnowballStemmer, WordNetLemmatizer
+
+            self._lemmatizer = WordNetLemmatizer()
+            self._stemmer = SnowballStemmer('russian')
+            self._stop_words = frozenset(stopwords.words('english')) | frozenset(stopwords.words('russian'))
+
+    @property
+    def stop_words(self) -> frozenset:
+        if self._stop_words is None:
+            self._load()
+        return self._stop_words
+
+    def _normalize_token(self, token: str) -> str:
+        if self._stop_words is None:
+            self._load()
+        if CYRILLIC_RE.search(token):
+            return self._stemmer.stem(token)
+        return self._lemmatizer.lemmatize(token)
+
+    def tokenize(self, text: str) -> List[str]:
+        stop_words = self.stop_words
+        return [t for t in TOKEN_RE.findall(text.lower()) if t not in stop_words]
+
+    def preprocess(self, text: str) -> str:
+        normalize = self.normalize_token
+        return ' '.join(normalize(t) for t in self.tokenize(text))
+
+    def preprocess_batch(self, texts: List[str]) -> List[str]:
+        """Обрабатывает список документов за один проход: каждый уникальный токен нормализуется один раз"""
+        tokenized = [self.tokenize(text or '') for text in texts]
+        normalize = self.normalize_token
+        lemmas = {token: normalize(token) for tokens in tokenized for token in tokens}
+        return [' '.join(lemmas[t] for t in tokens) for tokens in tokenized]
+
+
+_preprocessor: Optional[TextPreprocessor] = None
+
+
+def get_preprocessor() -> TextPreprocessor:
+    global _preprocessor
+    if _preprocessor is None:
+        _preprocessor = TextPreprocessor()
+    return _preprocessor
@@ -1,106 +1,87 @@
 # Добавить в resume_parser.py
 
 import re
-from typing import Dict, List, Optional
-import pdfplumber
+from typing import Dict, List, Optional, Union
+from text_extraction import extract_text
+from skills import get_skill_extractor
+from resume_sections import HEADER, ParsedResume, parse_resume
+
+ResumeInput = Union[str, ParsedResume]
+
+def _parsed(resume: ResumeInput) -> ParsedResume:
+    return resume if isinstance(resume, ParsedResume) else parse_resume(resume)
 
 def extract_resume_text(file_path: str) -> str:
-    text = ""
-    with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() or ""
-    return text
+    return extract_text(file_path)
 
-def analyze_resume(resume_text: str) -> Dict:
+def analyze_resume(resume_text: str, parsed: Optional[ParsedResume] = None) -> Dict:
     """
-    Анализирует текст резюме и извлекает ключевую информацию
+    Анализирует текст резюме и извлекает ключевую информацию.
+    Текст размечается на секции один раз; каждый экстрактор смотрит только свои секции.
     """
+    parsed = parsed or parse_resume(resume_text)
     analysis = {
-        "skills": extract_skills(resume_text),
-        "experience_years": extract_experience_years(resume_text),
-        "email": extract_email(resume_text),
-        "phone": extract_phone(resume_text),
-        "languages": extract_languages(resume_text),
-        "education": extract_education(resume_text)
+        "skills": extract_skills(parsed),
+        "experience_years": extract_experience_years(parsed),
+        "email": extract_email(parsed),
+        "phone": extract_phone(parsed),
+        "languages": extract_languages(parsed),
+        "education": extract_education(parsed),
+        "sections": parsed.outline()
     }
     
     return analysis
 
 
-def extract_skills(text: str) -> List[str]:
+# Элементы списка навыков: запятые, точки с запятой, маркеры, переносы и колонки HH (2+ пробела)
+SKILL_ITEM_SPLIT_RE = re.compile(r'[,;\n•·]|\s{2,}')
+
+def extract_skills(resume: ResumeInput) -> List[str]:
     """Извлекает навыки и технологии из резюме"""
-    
-    # Расширенный список технических навыков
-    tech_skills = [
-        # Языки программирования
-        'python', 'javascript', 'java', 'c#', 'c++', 'php', 'ruby', 'go', 'rust',
-        'typescript', 'kotlin', 'swift', 'scala', 'r', 'matlab', 'perl',
-        
-        # Веб-технологии
-        'html', 'css', 'react', 'vue', 'angular', 'node.js', 'express', 'django',
-        'flask', 'fastapi', 'spring', 'laravel', 'symfony', 'rails',
-        
-        # Базы данных
-        'sql', 'mysql', 'postgresql', 'mongodb', 'redis', 'elasticsearch',
-        'oracle', 'sqlite', 'cassandra', 'neo4j',
-        
-        # DevOps и инфраструктура
-        'docker', 'kubernetes', 'aws', 'azure', 'gcp', 'terraform', 'ansible',
-        'jenkins', 'gitlab', 'github', 'ci/cd', 'nginx', 'apache',
-        
-        # Данные и ML
-        'pandas', 'numpy', 'scikit-learn', 'tensorflow', 'pytorch', 'keras',
-        'jupyter', 'tableau', 'power bi', 'spark', 'hadoop',
-        
-        # Другие технологии
-        'git', 'linux', 'bash', 'powershell', 'api', 'rest', 'graphql',
-        'microservices', 'agile', 'scrum', 'jira', 'confluence'
-    ]
-    
-    text_lower = text.lower()
-    found_skills = []
-    
-    for skill in tech_skills:
-        # Ищем точные совпадения (целые слова)
-        pattern = r'\b' + re.escape(skill.lower()) + r'\b'
-        if re.search(pattern, text_lower):
-            found_skills.append(skill.title())
-    
-    # Дополнительный поиск по ключевым секциям
-    skills_sections = re.findall(
-        r'(?:навыки|skills|технологии|technologies)[:\s]*(.*?)(?:\n\n|\n[А-ЯA-Z]|$)', 
-        text, 
-        re.IGNORECASE | re.DOTALL
-    )
-    
-    for section in skills_sections:
-        # Разбиваем по запятым, точкам с запятой и переносам строк
-        items = re.split(r'[,;\n•·-]', section)
-        for item in items:
-            item = item.strip()
-            if len(item) > 2 and len(item) < 30:  # разумная длина для навыка
+    parsed = _parsed(resume)
+    
+    # Навыки из таксономии (data/skills.json) — один проход по всему тексту,
+    # технологии часто упоминаются в описании опыта
+    extractor = get_skill_extractor()
+    found_skills = extractor.extract(parsed.text)
+    
+    # Дополнительно — произвольные пункты из секции навыков
+    for item in SKILL_ITEM_SPLIT_RE.split(parsed.section_body("skills")):
+        item = item.strip(" \t-–—")
+        if len(item) > 2 and len(item) < 30:  # разумная длина для навыка
+            canonical = extractor.canonical(item)
+            if canonical:
+                found_skills.append(canonical)
+            elif not extractor.extract(item):
+                # "Python Docker" (одиночные пробелы) — навыки из него уже найдены в тексте
                 found_skills.append(item.title())
     
-    # Убираем дубликаты и возвращаем уникальные навыки
-    return list(set(found_skills))
-
-def extract_experience_years(text: str) -> int:
+    # Убираем дубликаты, сохраняя порядок
+    return list(dict.fromkeys(found_skills))
+
+EXPERIENCE_PATTERNS = [re.compile(pattern) for pattern in (
+    r'(\d+)\s*(?:лет|года|год)\s*опыта',
+    r'опыт\s*(?:работы)?\s*(\d+)\s*(?:лет|года|год)',
+    r'(\d+)\+?\s*years?\s*(?:of\s*)?experience',
+    r'experience[:\s]*(\d+)\+?\s*years?',
+    r'стаж\s*(?:работы)?\s*(\d+)\s*(?:лет|года|год)',
+    r'опыт\s*работы\s*[-—:]?\s*(\d+)\s*(?:лет|года|год)\s*(\d+)?\s*(?:месяц[аев]?)?'
+)]
+EXPERIENCE_DATE_PATTERNS = [re.compile(pattern) for pattern in (
+    r'(\d{4})\s*[-–]\s*(\d{4})',
+    r'(\d{2})\.(\d{4})\s*[-–]\s*(\d{2})\.(\d{4})',
+)]
+
+def extract_experience_years(resume: ResumeInput) -> int:
     """Извлекает количество лет опыта (учитывает месяцы)"""
-    
-    patterns = [
-        r'(\d+)\s*(?:лет|года|год)\s*опыта',
-        r'опыт\s*(?:работы)?\s*(\d+)\s*(?:лет|года|год)',
-        r'(\d+)\+?\s*years?\s*(?:of\s*)?experience',
-        r'experience[:\s]*(\d+)\+?\s*years?',
-        r'стаж\s*(?:работы)?\s*(\d+)\s*(?:лет|года|год)',
-        r'опыт\s*работы\s*[-—:]?\s*(\d+)\s*(?:лет|года|год)\s*(\d+)?\s*(?:месяц[аев]?)?'
-    ]
+    # Только секция опыта: годы из образования и курсов не должны попадать в стаж
+    text = _parsed(resume).scope("experience")
     
     max_months = 0
     text_lower = text.lower()
     
-    for pattern in patterns:
-        matches = re.findall(pattern, text_lower)
+    for pattern in EXPERIENCE_PATTERNS:
+        matches = pattern.findall(text_lower)
         for match in matches:
             try:
                 if isinstance(match, tuple):
@@ -117,12 +98,8 @@ def extract_experience_years(text: str) -> int:
 
     # Альтернатива — по датам
     if max_months == 0:
-        date_patterns = [
-            r'(\d{4})\s*[-–]\s*(\d{4})',
-            r'(\d{2})\.(\d{4})\s*[-–]\s*(\d{2})\.(\d{4})',
-        ]
-        for pattern in date_patterns:
-            matches = re.findall(pattern, text)
+        for pattern in EXPERIENCE_DATE_PATTERNS:
+            matches = pattern.findall(text)
             for match in matches:
                 try:
                     if len(match) == 2:
@@ -139,64 +116,67 @@ def extract_experience_years(text: str) -> int:
     return max_months // 12  # возвращаем количество лет
 
 
+def _search_contacts(resume: ResumeInput, patterns: List[re.Pattern]) -> Optional[str]:
+    """Ищет сначала в шапке и контактах, затем во всем тексте"""
+    parsed = _parsed(resume)
+    scopes = [parsed.section_text(HEADER, "contacts"), parsed.text]
+    for text in scopes:
+        for pattern in patterns:
+            match = pattern.search(text)
+            if match:
+                return match.group()
+    return None
+
+
+EMAIL_PATTERNS = [re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')]
+# Паттерны для российских и международных номеров
+PHONE_PATTERNS = [re.compile(pattern) for pattern in (
+    r'\+7\s*\(?\d{3}\)?\s*\d{3}[-\s]?\d{2}[-\s]?\d{2}',  # +7 (xxx) xxx-xx-xx
+    r'8\s*\(?\d{3}\)?\s*\d{3}[-\s]?\d{2}[-\s]?\d{2}',    # 8 (xxx) xxx-xx-xx
+    r'\+\d{1,3}\s*\(?\d{3}\)?\s*\d{3}[-\s]?\d{2}[-\s]?\d{2}'  # международный
+)]
 
-def extract_email(text: str) -> Optional[str]:
+def extract_email(resume: ResumeInput) -> Optional[str]:
     """Извлекает email адрес"""
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    matches = re.findall(email_pattern, text)
-    return matches[0] if matches else None
+    return _search_contacts(resume, EMAIL_PATTERNS)
 
 
-def extract_phone(text: str) -> Optional[str]:
+def extract_phone(resume: ResumeInput) -> Optional[str]:
     """Извлекает номер телефона"""
-    # Паттерны для российских и международных номеров
-    phone_patterns = [
-        r'\+7\s*\(?\d{3}\)?\s*\d{3}[-\s]?\d{2}[-\s]?\d{2}',  # +7 (xxx) xxx-xx-xx
-        r'8\s*\(?\d{3}\)?\s*\d{3}[-\s]?\d{2}[-\s]?\d{2}',    # 8 (xxx) xxx-xx-xx
-        r'\+\d{1,3}\s*\(?\d{3}\)?\s*\d{3}[-\s]?\d{2}[-\s]?\d{2}'  # международный
-    ]
-    
-    for pattern in phone_patterns:
-        matches = re.findall(pattern, text)
-        if matches:
-            return matches[0]
-    
-    return None
+    return _search_contacts(resume, PHONE_PATTERNS)
 
 
-def extract_languages(text: str) -> List[str]:
+LANGUAGES = ['english', 'английский', 'немецкий', 'german', 'французский', 'french',
+             'испанский', 'spanish', 'итальянский', 'italian', 'китайский', 'chinese']
+LANGUAGES_RE = re.compile('|'.join(LANGUAGES))
+
+def extract_languages(resume: ResumeInput) -> List[str]:
     """Извлекает знание языков"""
-    languages = ['english', 'английский', 'немецкий', 'german', 'французский', 'french', 
-                'испанский', 'spanish', 'итальянский', 'italian', 'китайский', 'chinese']
-    
-    text_lower = text.lower()
-    found_languages = []
-    
-    for lang in languages:
-        if lang in text_lower:
-            found_languages.append(lang.title())
-    
-    return list(set(found_languages))
+    text_lower = _parsed(resume).scope("languages").lower()
+    return list({lang.title() for lang in LANGUAGES_RE.findall(text_lower)})
+
 
+EDUCATION_KEYWORDS = [
+    'университет', 'институт', 'академия', 'колледж', 'техникум',
+    'university', 'institute', 'college', 'bachelor', 'master', 'phd',
+    'бакалавр', 'магистр', 'специалист', 'кандидат наук', 'доктор наук'
+]
+EDUCATION_RE = re.compile('|'.join(EDUCATION_KEYWORDS))
 
-def extract_education(text: str) -> List[str]:
+def extract_education(resume: ResumeInput) -> List[str]:
     """Извлекает информацию об образовании"""
-    education_keywords = [
-        'университет', 'институт', 'академия', 'колледж', 'техникум',
-        'university', 'institute', 'college', 'bachelor', 'master', 'phd',
-        'бакалавр', 'магистр', 'специалист', 'кандидат наук', 'доктор наук'
-    ]
+    parsed = _parsed(resume)
+    lines = parsed.section_lines("education") if parsed.has("education") else parsed.lines
     
+    # Для каждого ключевого слова — первая подходящая строка, за один проход по строкам
     education_info = []
-    text_lower = text.lower()
-    
-    for keyword in education_keywords:
-        if keyword in text_lower:
-            # Пытаемся найти строку с этим ключевым словом
-            lines = text.split('\n')
-            for line in lines:
-                if keyword in line.lower() and len(line.strip()) > 10:
-                    education_info.append(line.strip())
-                    break
-    
-    return list(set(education_info))
\ No newline at end of file
+    seen_keywords = set()
+    for line in lines:
+        if len(line.strip()) <= 10:
+            continue
+        keywords = set(EDUCATION_RE.findall(line.lower())) - seen_keywords
+        if keywords:
+            seen_keywords |= keywords
+            education_info.append(line.strip())
+    
+    return list(set(education_info))
@@ -0,0 +1,125 @@
+"""
+Разбиение текста резюме на типизированные секции за один проход по строкам.
+
+Экстракторы resume_parser работают только со своими секциями (опыт,
+образование, навыки, языки, контакты), а не с полным текстом. Разметка
+(оглавление секций со смещениями строк) сохраняется в анализе резюме,
+поэтому повторно текст не размечается.
+"""
+import re
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+# Заголовок секции → тип секции
+SECTION_TITLES: Dict[str, List[str]] = {
+    "experience": ["опыт работы", "опыт", "места работы", "трудовая деятельность",
+                   "work experience", "experience", "professional experience", "employment history"],
+    "education": ["образование", "высшее образование", "повышение квалификации, курсы",
+                  "повышение квалификации", "курсы", "education", "courses"],
+    "skills": ["навыки", "ключевые навыки", "профессиональные навыки", "технические навыки",
+               "технологии", "skills", "key skills", "technical skills", "technologies"],
+    "languages": ["знание языков", "иностранные языки", "языки", "languages"],
+    "contacts": ["контакты", "контактная информация", "связаться со мной можно", "связаться со мной",
+                 "contacts", "contact information"],
+    "about": ["обо мне", "о себе", "дополнительная информация", "about me", "about", "summary"],
+    "position": ["желаемая должность и зарплата", "желаемая должность", "desired position"],
+}
+HEADER = "header"  # текст до первого заголовка: имя, контакты, город
+
+_TITLE_KINDS = {title: kind for kind, titles in SECTION_TITLES.items() for title in titles}
+# Заголовок — вся строка или начало строки до разделителя («Опыт работы — 6 лет», «Skills: ...»)
+HEADING_RE = re.compile(
+    r'^\s*(?P<title>' + "|".join(re.escape(title).replace(r'\ ', r'\s+')
+                                 for title in sorted(_TITLE_KINDS, key=len, reverse=True))
+    + r')\s*(?:$|(?P<separator>[:—–-])\s*(?P<rest>.*)$)',
+    re.IGNORECASE,
+)
+MAX_HEADING_LENGTH = 80
+# Колонтитулы страниц HH: «Имя Фамилия • Резюме обновлено 29 апреля 2025 в 15:50»
+FOOTER_RE = re.compile(r'резюме обновлено \d', re.IGNORECASE)
+
+
+@dataclass
+class Section:
+    kind: str
+    title: str
+    line: int     # строка заголовка (для header — 0)
+    start: int    # первая строка содержимого
+    end: int      # строка после последней
+    inline: str = ""  # текст на строке заголовка после разделителя
+
+
+class ParsedResume:
+    """Текст резюме, его строки и секции"""
+
+    def __init__(self, text: str, sections: List[Section], lines: Optional[List[str]] = None):
+        self.text = text
+        self.lines = lines if lines is not None else text.split("\n")
+        self.sections = sections
+
+    def has(self, *kinds: str) -> bool:
+        return any(section.kind in kinds for section in self.sections)
+
+    def _join(self, lines: List[str]) -> str:
+        return "\n".join(line for line in lines if not FOOTER_RE.search(line))
+
+    def section_text(self, *kinds: str) -> str:
+        """Текст секций указанных типов вместе со строками заголовков"""
+        return "\n".join(self._join(self.lines[section.line:section.end])
+                         for section in self.sections if section.kind in kinds)
+
+    def section_body(self, *kinds: str) -> str:
+        """Содержимое секций без заголовков"""
+        parts = []
+        for section in self.sections:
+            if section.kind in kinds:
+                if section.inline:
+                    parts.append(section.inline)
+                parts.append(self._join(self.lines[section.start:section.end]))
+        return "\n".join(parts)
+
+    def section_lines(self, *kinds: str) -> List[str]:
+        return [line for section in self.sections if section.kind in kinds
+                for line in self.lines[section.line:section.end] if not FOOTER_RE.search(line)]
+
+    def scope(self, *kinds: str) -> str:
+        """Текст секций, а если их нет — весь текст"""
+        return self.section_text(*kinds) if self.has(*kinds) else self.text
+
+    def outline(self) -> List[Dict]:
+        """Разметка для хранения вместе с анализом резюме"""
+        return [asdict(section) for section in self.sections]
+
+    @classmethod
+    def from_outline(cls, text: str, outline: Optional[List[Dict]]) -> "ParsedResume":
+        if not outline:
+            return parse_resume(text)
+        return cls(text, [Section(**section) for section in outline])
+
+
+def parse_resume(text: str) -> ParsedResume:
+    lines = text.split("\n")
+    sections: List[Section] = []
+    current = Section(kind=HEADER, title="", line=0, start=0, end=len(lines))
+
+    for number, line in enumerate(lines):
+        if len(line) > MAX_HEADING_LENGTH and ":" not in line:
+            continue
+        match = HEADING_RE.match(line)
+        if match is None:
+            continue
+        if current.kind == "experience" and match.group("separator") == ":":
+            # «Ключевые навыки:», «Технологии:» внутри описания места работы — подзаголовки
+            continue
+        current.end = number
+        if current.end > current.start or current.inline:
+            sections.append(current)
+        title = match.group("title")
+        current = Section(kind=_TITLE_KINDS[" ".join(title.lower().split())], title=title.strip(),
+                          line=number, start=number + 1, end=len(lines),
+                          inline=(match.group("rest") or "").strip())
+
+    current.end = len(lines)
+    if current.end > current.start or current.inline or current.kind != HEADER:
+        sections.append(current)
+    return ParsedResume(text, sections, lines)
@@ -1,8 +1,4 @@
-import fitz  # PyMuPDF
+from text_extraction import extract_pdf_text
 
 def load_resume_text(file_path: str) -> str:
-    doc = fitz.open(file_path)
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    return text
+    return extract_pdf_text(file_path, engine="fitz")
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List, Dict
-from ..models.database import SessionLocal, Resume, Application
-from ..services.auto_applier import AutoApplier
-from ..services.hh_service import HeadHunterService
+from typing import Optional
+from models.database import SessionLocal, Resume
+from services.application_queue import application_queue
+from services.application_stats import SERIES_BUCKETS, application_stats
 
 router = APIRouter(prefix="/bot", tags=["automation"])
 
@@ -16,60 +17,66 @@ def get_db():
 
 @router.post("/start-auto-apply")
 async def start_auto_apply(
-    background_tasks: BackgroundTasks,
     resume_id: int,
     min_similarity: float = 0.3,
     max_applications: int = 50,
     db: Session = Depends(get_db)
 ):
-    """Start automated job application process"""
+    """
+    Ставит в очередь отклики на лучшие вакансии резюме (оценки из /match-vacancies и дайджеста).
+    Отправляет их процесс worker.py — по одному на APPLY_INTERVAL_SECONDS для резюме.
+    """
     
     # Get resume data
-    resume = db.query(Resume).filter(Resume.id == resume_id).first()
+    resume = db.query(Resume.id).filter(Resume.id == resume_id).first()
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
-    
-    # Get matched vacancies
-    hh_service = HeadHunterService()
-    auto_applier = AutoApplier(hh_service)
-    
-    # Start background task
-    background_tasks.add_task(
-        auto_applier.start_auto_application,
-        resume.__dict__,
-        [],  # Will be populated with matched vacancies
-        min_similarity,
-        max_applications
-    )
-    
-    return {"message": "Auto application started", "resume_id": resume_id}
+
+    matches = await run_in_threadpool(application_queue.top_matches, resume_id, min_similarity, max_applications)
+    batch = await run_in_threadpool(application_queue.enqueue, resume_id, matches)
+
+    return {"message": "Auto application started", "resume_id": resume_id, **batch}
 
 @router.get("/application-status")
-async def get_application_status(db: Session = Depends(get_db)):
+async def get_application_status(resume_id: Optional[int] = None):
     """Get current application status"""
-    
-    applications = db.query(Application).order_by(Application.applied_at.desc()).limit(50).all()
-    
-    stats = {
-        "total_applications": len(applications),
-        "pending": len([a for a in applications if a.status == "pending"]),
-        "sent": len([a for a in applications if a.status == "sent"]),
-        "failed": len([a for a in applications if a.status == "failed"]),
-        "recent_applications": [
-            {
-                "vacancy_id": app.vacancy_id,
-                "status": app.status,
-                "applied_at": app.applied_at.isoformat(),
-                "auto_applied": app.auto_applied
-            }
-            for app in applications[:10]
-        ]
-    }
-    
+    stats = await run_in_threadpool(application_stats.summary, resume_id)
+    stats["recent_applications"] = await run_in_threadpool(application_stats.recent, resume_id)
     return stats
 
+@router.get("/application-series")
+async def get_application_series(bucket: str = "day", periods: int = Query(30, ge=1, le=366),
+                                 resume_id: Optional[int] = None):
+    """Отклики по статусам за последние periods часов/дней/недель — для графиков"""
+    if bucket not in SERIES_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of {', '.join(SERIES_BUCKETS)}")
+    points = await run_in_threadpool(application_stats.series, bucket, periods, resume_id)
+    return {"bucket": bucket, "points": points}
+
 @router.post("/stop-auto-apply")
-async def stop_auto_apply():
-    """Stop automated application process"""
-    # Implementation to stop background tasks
-    return {"message": "Auto application stopped"}
\ No newline at end of file
+async def stop_auto_apply(resume_id: Optional[int] = None, batch_id: Optional[str] = None):
+    """Отменяет неотправленные отклики резюме или запуска (batch_id из /start-auto-apply)"""
+    _require_target(resume_id, batch_id)
+    cancelled = await run_in_threadpool(application_queue.cancel, resume_id, batch_id)
+    return {"message": "Auto application stopped", "cancelled": cancelled}
+
+@router.post("/pause-auto-apply")
+async def pause_auto_apply(resume_id: Optional[int] = None, batch_id: Optional[str] = None):
+    _require_target(resume_id, batch_id)
+    paused = await run_in_threadpool(application_queue.pause, resume_id, batch_id)
+    return {"message": "Auto application paused", "paused": paused}
+
+@router.post("/resume-auto-apply")
+async def resume_auto_apply(resume_id: Optional[int] = None, batch_id: Optional[str] = None):
+    _require_target(resume_id, batch_id)
+    resumed = await run_in_threadpool(application_queue.resume, resume_id, batch_id)
+    return {"message": "Auto application resumed", "resumed": resumed}
+
+@router.get("/worker-metrics")
+async def worker_metrics():
+    """Метрики стадий конвейера откликов (select, render, apply, record) по процессам worker.py"""
+    return await run_in_threadpool(application_queue.worker_metrics)
+
+def _require_target(resume_id: Optional[int], batch_id: Optional[str]) -> None:
+    if resume_id is None and batch_id is None:
+        raise HTTPException(status_code=400, detail="resume_id or batch_id is required")
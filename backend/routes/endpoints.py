@@ -1,145 +1,412 @@
-import requests
-from fastapi import APIRouter, UploadFile, Query, HTTPException
-from resume_parser import extract_resume_text, analyze_resume  # добавляем analyze_resume
-from matcher import calculate_similarity
-from hh_parser import match_hh
+from fastapi import APIRouter, UploadFile, Query, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from matcher import active_index, calculate_similarity, find_top_matches, resume_query, vacancy_text
+from services.hh_cache import get_hh_cache, normalize_params
+from services.rate_limiter import get_rate_limiter
+from services.harvester import VacancyHarvester
+from services.vacancy_store import (filter_vacancy_ids, get_fresh_matches, load_descriptions, load_vacancies,
+                                   load_vacancy_texts, save_search_results)
+from services.enrichment import vacancy_enricher
+from services.resume_store import resume_store
+from services.extraction_jobs import extraction_jobs, MAX_PENDING_JOBS
+from vacancy_stats import get_vacancy_stats, get_vacancy_stats_many, query_salary_stats
+from vacancy_filters import VacancyFilter
 import os
+import base64
 import hashlib
-import time
+import json
+import uuid
+from datetime import datetime, timedelta
 
 router = APIRouter()
 
-# Улучшенный кэш с ID и анализом
-resume_cache = {}
+# Сколько времени выдача /match-vacancies отдается из БД без похода в HH
+MATCH_FRESHNESS = timedelta(seconds=int(os.environ.get("MATCH_FRESHNESS_SECONDS", "900")))
 
-@router.post("/upload-resume")
-async def upload_resume(file: UploadFile):
-    content = await file.read()
-    os.makedirs("./tmp", exist_ok=True)
+# Вакансии из БД, которые попадают в локальный индекс для /match-vacancies/top
+LOCAL_VACANCIES_MAX_AGE = timedelta(hours=int(os.environ.get("LOCAL_VACANCIES_MAX_AGE_HOURS", "72")))
 
-    print('content', content)
+UPLOAD_DIR = "./tmp"
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_SIZE = int(os.environ.get("MAX_UPLOAD_SIZE_MB", "20")) * 1024 * 1024
 
-    path = f"./tmp/{file.filename}"
-    with open(path, "wb") as f:
-        f.write(content)
 
-    # Извлекаем текст резюме
-    resume_text = extract_resume_text(path)
-    
-    # Генерируем уникальный ID для резюме
-    resume_id = int(hashlib.md5(resume_text.encode()).hexdigest()[:8], 16)
-    
-    # Анализируем резюме (нужно реализовать эту функцию)
-    analysis = analyze_resume(resume_text)
-    
-    # Сохраняем в кэш
-    global resume_cache
-    resume_cache[resume_id] = {
-        "text": resume_text,
-        "analysis": analysis,
-        "uploaded_at": time.time(),
-        "filename": file.filename
-    }
+@router.post("/upload-resume", status_code=202)
+async def upload_resume(file: UploadFile, response: Response):
+    """
+    Принимает резюме и ставит извлечение текста в очередь; результат — через /upload-resume/{job_id}.
+    Файл, который уже загружали (тот же sha256), не разбирается повторно: результат отдается сразу.
+    """
+    if extraction_jobs.pending >= MAX_PENDING_JOBS:
+        raise HTTPException(status_code=503, detail="Too many resumes are being processed, try again later")
+
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    job_id = uuid.uuid4().hex
+    extension = os.path.splitext(file.filename or "")[1].lower()
+    path = os.path.join(UPLOAD_DIR, f"{job_id}{extension}")
+
+    # Пишем на диск по частям, не держа файл целиком в памяти, и сразу считаем хэш
+    size = 0
+    hasher = hashlib.sha256()
+    try:
+        with open(path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_UPLOAD_SIZE:
+                    raise HTTPException(status_code=413, detail="File is too large")
+                hasher.update(chunk)
+                f.write(chunk)
+    except HTTPException:
+        os.remove(path)
+        raise
+    content_hash = hasher.hexdigest()
+
+    resume_id = await run_in_threadpool(resume_store.find_by_hash, content_hash)
+    if resume_id is not None:
+        os.remove(path)
+        resume = await run_in_threadpool(resume_store.get, resume_id)
+        await run_in_threadpool(extraction_jobs.create_job, job_id, file.filename, path, content_hash,
+                                "done", resume_id)
+        response.status_code = 200
+        return {
+            "job_id": job_id,
+            "status": "done",
+            "filename": file.filename,
+            "resume_id": resume_id,
+            "analysis": resume["analysis"] if resume else {},
+            "message": "Resume already uploaded, returning saved analysis"
+        }
+
+    # Тот же файл еще обрабатывается (повторная отправка) — возвращаем существующую задачу
+    active_job_id = await run_in_threadpool(extraction_jobs.find_active_job, content_hash)
+    if active_job_id is not None:
+        os.remove(path)
+        return {
+            "job_id": active_job_id,
+            "status": "queued",
+            "message": "Resume is already being processed"
+        }
+
+    await run_in_threadpool(extraction_jobs.create_job, job_id, file.filename, path, content_hash)
+    extraction_jobs.submit(job_id, file.filename, path, content_hash)
 
     return {
-        "resume_id": resume_id,
-        "analysis": analysis,
-        "message": "Resume uploaded and analyzed successfully"
+        "job_id": job_id,
+        "status": "queued",
+        "message": "Resume uploaded, extraction started"
     }
 
 
+@router.get("/upload-resume/{job_id}")
+async def upload_resume_status(job_id: str):
+    """Статус извлечения резюме; после завершения — resume_id и анализ"""
+    job = await run_in_threadpool(extraction_jobs.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    result = {"job_id": job_id, "status": job.status, "filename": job.filename}
+    if job.status == "done":
+        resume = await run_in_threadpool(resume_store.get, job.resume_id)
+        result.update({
+            "resume_id": job.resume_id,
+            "analysis": resume["analysis"] if resume else {},
+            "message": "Resume uploaded and analyzed successfully"
+        })
+    elif job.status == "failed":
+        result["error"] = job.error
+    return result
+
+
+async def _score_vacancies(resume: dict, vacancies: list, resume_id: int) -> list:
+    """
+    Скоринг вакансий (в threadpool); возвращает (вакансия, similarity, scored_on) для всех вакансий.
+    Вакансии с загруженным описанием оцениваются по нему, остальные — по snippet;
+    их описания вызывающий ставит в очередь после сохранения вакансий (_enqueue_snippets).
+    """
+    ids = [v["id"] for v in vacancies]
+    descriptions = await run_in_threadpool(load_descriptions, ids)
+    # вакансии попадают в общий индекс и векторизуются один раз,
+    # резюме — уже векторизовано при загрузке (эмбеддинг — при первом матчинге)
+    query = await run_in_threadpool(resume_query, resume)
+    similarities = await run_in_threadpool(
+        calculate_similarity, query, [vacancy_text(v, descriptions.get(v["id"])) for v in vacancies], ids
+    )
+    return [(vacancy, sim[1], "description" if vacancy["id"] in descriptions else "snippet")
+            for vacancy, sim in zip(vacancies, similarities)]
+
+
+async def _enqueue_snippets(scored: list, resume_id: int) -> None:
+    """Описания вакансий, оцененных по snippet, — в очередь (оценки обновятся в vacancy_scores)"""
+    await vacancy_enricher.enqueue([v["id"] for v, _, scored_on in scored if scored_on == "snippet"], resume_id)
+
+
+def _filter_matches(scored: list, min_similarity: float) -> list:
+    """Фильтр по минимальному совпадению"""
+    matches = []
+    for vacancy, similarity, scored_on in scored:
+        if similarity >= min_similarity:
+            matches.append({
+                "vacancy": vacancy,
+                "similarity": round(similarity, 3),
+                "match_score": round(similarity * 100, 1),  # процент совпадения
+                "scored_on": scored_on,  # snippet | description
+                "stats": {}
+            })
+    return matches
+
+
+def _sort_key(match: dict) -> tuple:
+    return -match["similarity"], match["vacancy"]["id"]
+
+
+def _encode_cursor(match: dict) -> str:
+    raw = json.dumps([match["similarity"], match["vacancy"]["id"]])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        similarity, vacancy_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return -float(similarity), str(vacancy_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _split_list(value: str) -> list:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _parse_areas(areas: str) -> list:
+    try:
+        return [int(a) for a in _split_list(areas)]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="areas must be comma-separated HH area ids")
+
+
 @router.get("/match-vacancies")  # изменяем название эндпоинта
-def match_vacancies(
+async def match_vacancies(
     resume_id: int = Query(...),
-    query: str = Query("front-end"), 
-    page: int = Query(0, ge=0),
-    min_similarity: float = Query(0.3, ge=0.0, le=1.0)
+    query: str = Query("front-end", description="Один или несколько запросов через запятую"),
+    page: int = Query(0, ge=0, description="Стартовая страница HH"),
+    pages: int = Query(1, ge=1, le=20, description="Сколько страниц HH собрать параллельно"),
+    areas: str = Query("1", description="id регионов HH через запятую"),
+    min_similarity: float = Query(0.3, ge=0.0, le=1.0),
+    per_page: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None, description="next_cursor из предыдущего ответа"),
+    salary_min: int | None = Query(None, ge=0, description="Зарплата не ниже, ₽ до вычета НДФЛ (валюта и net приводятся)"),
+    max_experience: int | None = Query(None, ge=0, description="Требуемый опыт не больше, лет"),
+    only_with_salary: bool = Query(False, description="Только вакансии с указанной зарплатой"),
+    stats_fields: str | None = Query(
+        None,
+        description="Поля статистики через запятую (all — все). По умолчанию статистика не запрашивается: "
+                    "клиент подгружает ее отдельно через /vacancy-stats или /vacancy-stats/batch"
+    )
 ):
-    global resume_cache
-    
-    # Проверяем наличие резюме в кэше
-    if resume_id not in resume_cache:
+    # Проверяем наличие резюме в хранилище
+    resume = await run_in_threadpool(resume_store.get, resume_id)
+    if resume is None:
         raise HTTPException(status_code=400, detail="Resume not found")
-
-    resume_text = resume_cache[resume_id]["text"]
     
-    # Получаем вакансии с HH
-    vacancies = match_hh(query, page)
+    queries = _split_list(query)
+    area_ids = _parse_areas(areas)
+    query_key = normalize_params({"text": queries, "area": area_ids, "page": page, "pages": pages})
+    vacancy_filter = VacancyFilter(salary_min, max_experience, only_with_salary)
+
+    # Если поиск недавно выполнялся и оценки для резюме посчитаны — отвечаем из БД
+    # (фильтр — условием SQL по индексам зарплаты и опыта)
+    scored = await run_in_threadpool(get_fresh_matches, resume_id, query_key, MATCH_FRESHNESS, vacancy_filter)
+    if scored is None:
+        # Собираем вакансии с HH (страницы, регионы и запросы — параллельно)
+        vacancies = await VacancyHarvester().harvest_all(queries, area_ids, pages=pages, start_page=page)
+        # Сохраняются все вакансии выдачи, оцениваются — только прошедшие фильтр
+        candidates = vacancy_filter.apply(vacancies)
+        scored = await _score_vacancies(resume, candidates, resume_id) if candidates else []
+        if vacancies:
+            # и когда фильтр отбросил все: иначе свежесть поиска не запишется и каждый запрос пойдет в HH
+            await run_in_threadpool(
+                save_search_results, query_key, vacancies, resume_id, [(v["id"], s) for v, s, _ in scored],
+                {v["id"] for v, _, scored_on in scored if scored_on == "description"}
+            )
+    # очередь — после сохранения: описания пишутся только в строки vacancies
+    # (а после рестарта очередь пуста — оценки из БД по snippet снова ждут описаний)
+    await _enqueue_snippets(scored, resume_id)
     
-    if not vacancies:
+    if not scored:
         return {
             "matches": [],
             "has_more": False,
+            "next_cursor": None,
             "page": page,
             "total": 0
         }
     
-    # Подготавливаем тексты вакансий для сравнения
-    vacancy_texts = []
-    for v in vacancies:
-        text = v["name"]
-        if v.get("snippet", {}).get("responsibility"):
-            text += " " + v["snippet"]["responsibility"]
-        if v.get("snippet", {}).get("requirement"):
-            text += " " + v["snippet"]["requirement"]
-        vacancy_texts.append(text)
+    matches = _filter_matches(scored, min_similarity)
     
-    # Вычисляем similarity
-    similarities = calculate_similarity(resume_text, vacancy_texts)
+    # Сортируем по similarity (id — для стабильного порядка курсора)
+    matches.sort(key=_sort_key)
     
-    # Фильтруем по минимальному совпадению и сортируем
-    matches = []
-    for vacancy, sim in zip(vacancies, similarities):
-        if sim[1] >= min_similarity:  # sim[1] - это similarity score
-            vacancy_id = vacancy["id"]
-            
-            # Получаем статистику вакансии (опционально)
-            try:
-                stat_resp = requests.get(
-                    f"http://localhost:8000/vacancy-stats", 
-                    params={"vacancy_id": vacancy_id},
-                    timeout=5
-                )
-                stat_data = stat_resp.json() if stat_resp.status_code == 200 else {}
-            except Exception as e:
-                stat_data = {}
+    # Курсорная пагинация по отсортированному набору
+    if cursor:
+        after = _decode_cursor(cursor)
+        matches_after = [m for m in matches if _sort_key(m) > after]
+    else:
+        matches_after = matches
+    page_matches = matches_after[:per_page]
+    has_more = len(matches_after) > per_page
+
+    # Статистика вакансий (опционально): чтение предрасчитанных таблиц (vacancy_stats)
+    if stats_fields:
+        fields = None if stats_fields == "all" else _split_list(stats_fields)
+        stats = await get_vacancy_stats_many([m["vacancy"]["id"] for m in page_matches], fields)
+        for match in page_matches:
+            match["stats"] = stats.get(match["vacancy"]["id"], {})
 
-            matches.append({
-                "vacancy": vacancy,
-                "similarity": round(sim[1], 3),
-                "match_score": round(sim[1] * 100, 1),  # процент совпадения
-                "stats": stat_data
-            })
-    
-    # Сортируем по similarity
-    matches.sort(key=lambda x: x["similarity"], reverse=True)
-    
-    # Ограничиваем количество результатов на странице
-    per_page = 20
-    start_idx = 0  # для первой страницы
-    end_idx = per_page
-    page_matches = matches[start_idx:end_idx]
-    
     return {
         "matches": page_matches,
-        "has_more": len(matches) > per_page,  # есть ли еще результаты
+        "has_more": has_more,  # есть ли еще результаты
+        "next_cursor": _encode_cursor(page_matches[-1]) if has_more else None,
         "page": page,
         "total": len(matches),
+        # сколько оценок еще по snippet и обновится после загрузки описаний
+        "pending_descriptions": sum(vacancy_enricher.is_pending(m["vacancy"]["id"]) for m in matches),
+        # перцентили зарплат по этому запросу (пересчитываются по расписанию)
+        "salary_stats": await run_in_threadpool(query_salary_stats, query_key),
+        "resume_id": resume_id
+    }
+
+
+@router.get("/match-vacancies/top")
+async def match_top_vacancies(
+    resume_id: int = Query(...),
+    k: int = Query(50, ge=1, le=500),
+    min_similarity: float = Query(0.0, ge=0.0, le=1.0),
+    salary_min: int | None = Query(None, ge=0, description="Зарплата не ниже, ₽ до вычета НДФЛ (валюта и net приводятся)"),
+    max_experience: int | None = Query(None, ge=0, description="Требуемый опыт не больше, лет"),
+    only_with_salary: bool = Query(False, description="Только вакансии с указанной зарплатой"),
+):
+    """
+    Лучшие вакансии из локального индекса (без запросов к HH): для TF-IDF —
+    кандидаты из инвертированного индекса, для эмбеддингов — соседи по HNSW
+    """
+    resume = await run_in_threadpool(resume_store.get, resume_id)
+    if resume is None:
+        raise HTTPException(status_code=400, detail="Resume not found")
+
+    index = await run_in_threadpool(active_index)
+    if not await run_in_threadpool(len, index):
+        # индекс процесса пуст (например, после рестарта) — загружаем свежие вакансии из БД
+        texts = await run_in_threadpool(load_vacancy_texts, datetime.utcnow() - LOCAL_VACANCIES_MAX_AGE)
+        await run_in_threadpool(index.add, texts)
+
+    # Фильтр по зарплате и опыту — до скоринга: индекс оценивает только эти вакансии
+    vacancy_filter = VacancyFilter(salary_min, max_experience, only_with_salary)
+    candidate_ids = await run_in_threadpool(filter_vacancy_ids, vacancy_filter) if vacancy_filter.active else None
+
+    query = await run_in_threadpool(resume_query, resume)
+    top = await run_in_threadpool(find_top_matches, query, k, min_similarity, candidate_ids)
+    vacancies = await run_in_threadpool(load_vacancies, [vacancy_id for vacancy_id, _ in top])
+    descriptions = await run_in_threadpool(load_descriptions, list(vacancies))
+    matches = _filter_matches([(vacancies[v], s, "description" if v in descriptions else "snippet")
+                               for v, s in top if v in vacancies], min_similarity)
+    matches.sort(key=_sort_key)
+    return {
+        "matches": matches,
+        "total": len(matches),
         "resume_id": resume_id
     }
 
 
+@router.get("/match-vacancies/stream")
+async def match_vacancies_stream(
+    resume_id: int = Query(...),
+    query: str = Query("front-end", description="Один или несколько запросов через запятую"),
+    pages: int = Query(5, ge=1, le=20),
+    areas: str = Query("1", description="id регионов HH через запятую"),
+    min_similarity: float = Query(0.3, ge=0.0, le=1.0),
+    salary_min: int | None = Query(None, ge=0, description="Зарплата не ниже, ₽ до вычета НДФЛ (валюта и net приводятся)"),
+    max_experience: int | None = Query(None, ge=0, description="Требуемый опыт не больше, лет"),
+    only_with_salary: bool = Query(False, description="Только вакансии с указанной зарплатой"),
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$")
+):
+    """
+    Потоковый матчинг: вакансии собираются параллельно, совпадения
+    отправляются клиенту (NDJSON или SSE) по мере скоринга каждой страницы.
+    """
+    resume = await run_in_threadpool(resume_store.get, resume_id)
+    if resume is None:
+        raise HTTPException(status_code=400, detail="Resume not found")
+
+    queries = _split_list(query)
+    area_ids = _parse_areas(areas)
+    vacancy_filter = VacancyFilter(salary_min, max_experience, only_with_salary)
+
+    def encode(event: dict) -> str:
+        payload = json.dumps(event, ensure_ascii=False)
+        return f"data: {payload}\n\n" if format == "sse" else payload + "\n"
+
+    # свой ключ: прерванный поток сохраняет только часть страниц,
+    # и /match-vacancies не должен принять его выдачу за свежий поиск
+    query_key = normalize_params({"text": queries, "area": area_ids, "pages": pages, "stream": 1})
+
+    async def events():
+        total = 0
+        async for vacancies in VacancyHarvester().harvest(queries, area_ids, pages=pages):
+            batch = vacancy_filter.apply(vacancies)
+            scored = await _score_vacancies(resume, batch, resume_id) if batch else []
+            # как в /match-vacancies: сохраняются все вакансии страницы, оценки — прошедших фильтр
+            await run_in_threadpool(
+                save_search_results, query_key, vacancies, resume_id, [(v["id"], s) for v, s, _ in scored],
+                {v["id"] for v, _, scored_on in scored if scored_on == "description"}
+            )
+            await _enqueue_snippets(scored, resume_id)
+            for match in _filter_matches(scored, min_similarity):
+                total += 1
+                yield encode({"type": "match", **match})
+        yield encode({"type": "done", "total": total})
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type)
+
+
+@router.get("/vacancy-stats")
+async def vacancy_stats(vacancy_id: str = Query(...), fields: str | None = Query(None)):
+    """Статистика одной вакансии"""
+    try:
+        return await get_vacancy_stats(vacancy_id, fields.split(",") if fields else None)
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Vacancy not found")
+
+
+@router.get("/vacancy-stats/batch")
+async def vacancy_stats_batch(ids: str = Query(..., description="id вакансий через запятую"),
+                              fields: str | None = Query(None)):
+    """Статистика нескольких вакансий: клиент подгружает ее после первого ответа /match-vacancies"""
+    vacancy_ids = [v.strip() for v in ids.split(",") if v.strip()]
+    return {"stats": await get_vacancy_stats_many(vacancy_ids, fields.split(",") if fields else None)}
+
+
+@router.get("/cache-stats")
+def cache_stats():
+    """Счетчики попаданий/промахов кэша HH"""
+    return get_hh_cache().stats()
+
+
+@router.get("/rate-limit-stats")
+def rate_limit_stats():
+    """Задержки ожидания токена rate limiter'а HH в этом процессе"""
+    return get_rate_limiter().stats()
+
+
 # Дополнительные полезные эндпоинты
 
 @router.get("/resume/{resume_id}")
 def get_resume_info(resume_id: int):
     """Получить информацию о загруженном резюме"""
-    global resume_cache
-    
-    if resume_id not in resume_cache:
+    resume_data = resume_store.get(resume_id)
+    if resume_data is None:
         raise HTTPException(status_code=404, detail="Resume not found")
     
-    resume_data = resume_cache[resume_id]
     return {
         "resume_id": resume_id,
         "analysis": resume_data["analysis"],
@@ -150,29 +417,14 @@ def get_resume_info(resume_id: int):
 
 @router.delete("/resume/{resume_id}")  
 def delete_resume(resume_id: int):
-    """Удалить резюме из кэша"""
-    global resume_cache
-    
-    if resume_id not in resume_cache:
+    """Удалить резюме из хранилища"""
+    if not resume_store.delete(resume_id):
         raise HTTPException(status_code=404, detail="Resume not found")
     
-    del resume_cache[resume_id]
     return {"message": "Resume deleted successfully"}
 
 
 @router.get("/resumes")
 def list_resumes():
     """Список всех загруженных резюме"""
-    global resume_cache
-    
-    resumes = []
-    for resume_id, data in resume_cache.items():
-        resumes.append({
-            "resume_id": resume_id,
-            "filename": data["filename"],
-            "uploaded_at": data["uploaded_at"],
-            "skills_count": len(data["analysis"].get("skills", [])),
-            "experience_years": data["analysis"].get("experience_years", 0)
-        })
-    
-    return {"resumes": resumes}
\ No newline at end of file
+    return {"resumes": resume_store.list()}
\ No newline at end of file
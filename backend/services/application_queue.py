@@ -0,0 +1,285 @@
+"""
+Очередь автооткликов в таблице applications (SQLite).
+
+Веб-процесс только добавляет строки (status=pending, scheduled_at) и меняет
+их статус при отмене/паузе; отклики отправляет отдельный процесс worker.py.
+Интервал между откликами одного резюме задается временем scheduled_at, а не
+sleep в корутине, поэтому очередь переживает рестарт и не держит память
+веб-процесса. Воркер забирает отклик условным UPDATE (status=pending →
+running), поэтому несколько воркеров не возьмут один отклик дважды.
+"""
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models.database import SessionLocal, Application, VacancyScore, WorkerStatus
+from .rate_limiter import APPLY_INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+APPLY_INTERVAL = timedelta(seconds=APPLY_INTERVAL_SECONDS)  # между откликами резюме, см. rate_limiter
+APPLY_MAX_RUNNING_PER_RESUME = int(os.environ.get("APPLY_MAX_RUNNING_PER_RESUME", "1"))
+APPLY_MAX_ATTEMPTS = 3
+APPLY_RETRY_DELAY = timedelta(seconds=60)      # растет линейно с номером попытки
+APPLY_LOCK_TIMEOUT = timedelta(minutes=10)     # отклик «running» дольше — воркер упал, возвращаем в очередь
+BATCH_SIZE = 500
+
+ACTIVE_STATUSES = ("pending", "running", "paused", "sent")  # вакансия уже в работе или отправлена
+
+
+class ApplicationQueue:
+    """Операции над очередью откликов; все состояние — в БД, экземпляр ничего не хранит"""
+
+    def enqueue(self, resume_id: int, matches: Iterable[Tuple[str, float]],
+                interval: timedelta = APPLY_INTERVAL, start_at: Optional[datetime] = None) -> Dict:
+        """
+        Ставит отклики резюме на вакансии matches [(vacancy_id, similarity)] в очередь,
+        по одному на interval. Вакансии, на которые резюме уже откликается, пропускаются.
+        """
+        batch_id = uuid.uuid4().hex
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            matches = list(matches)
+            taken = set()
+            ids = [str(v) for v, _ in matches]
+            for i in range(0, len(ids), BATCH_SIZE):
+                taken.update(v for (v,) in db.query(Application.vacancy_id).filter(
+                    Application.resume_id == resume_id,
+                    Application.vacancy_id.in_(ids[i:i + BATCH_SIZE]),
+                    Application.status.in_(ACTIVE_STATUSES),
+                ))
+
+            # новые отклики — после уже запланированных для этого резюме
+            last = db.query(func.max(Application.scheduled_at)).filter(
+                Application.resume_id == resume_id, Application.status.in_(("pending", "paused"))
+            ).scalar()
+            first_at = max(start_at or now, last + interval if last else now)
+
+            rows = []
+            for vacancy_id, similarity in matches:
+                vacancy_id = str(vacancy_id)
+                if vacancy_id in taken:
+                    continue
+                taken.add(vacancy_id)
+                rows.append({
+                    "vacancy_id": vacancy_id, "resume_id": resume_id, "status": "pending",
+                    "applied_at": now, "auto_applied": True, "batch_id": batch_id,
+                    "similarity": similarity, "scheduled_at": first_at + interval * len(rows), "attempts": 0,
+                })
+            for i in range(0, len(rows), BATCH_SIZE):
+                db.execute(insert(Application.__table__), rows[i:i + BATCH_SIZE])
+            db.commit()
+        finally:
+            db.close()
+        return {"batch_id": batch_id, "queued": len(rows),
+                "first_at": rows[0]["scheduled_at"] if rows else None,
+                "last_at": rows[-1]["scheduled_at"] if rows else None}
+
+    def top_matches(self, resume_id: int, min_similarity: float, limit: int) -> List[Tuple[str, float]]:
+        """Лучшие оценки резюме из vacancy_scores (их пишут /match-vacancies и дайджест)"""
+        db = SessionLocal()
+        try:
+            return [(v, s) for v, s in db.query(VacancyScore.vacancy_id, VacancyScore.score)
+                    .filter(VacancyScore.resume_id == resume_id, VacancyScore.score >= min_similarity)
+                    .order_by(VacancyScore.score.desc()).limit(limit)]
+        finally:
+            db.close()
+
+    # --- управление из API ---
+
+    def _set_status(self, from_statuses: Tuple[str, ...], status: str,
+                    resume_id: Optional[int], batch_id: Optional[str]) -> int:
+        db = SessionLocal()
+        try:
+            query = db.query(Application).filter(Application.status.in_(from_statuses))
+            if resume_id is not None:
+                query = query.filter(Application.resume_id == resume_id)
+            if batch_id is not None:
+                query = query.filter(Application.batch_id == batch_id)
+            count = query.update({"status": status}, synchronize_session=False)
+            db.commit()
+            return count
+        finally:
+            db.close()
+
+    def cancel(self, resume_id: Optional[int] = None, batch_id: Optional[str] = None) -> int:
+        """Отменяет еще не отправленные отклики (уже отправляемые воркером — завершатся)"""
+        return self._set_status(("pending", "paused"), "cancelled", resume_id, batch_id)
+
+    def pause(self, resume_id: Optional[int] = None, batch_id: Optional[str] = None) -> int:
+        return self._set_status(("pending",), "paused", resume_id, batch_id)
+
+    def resume(self, resume_id: Optional[int] = None, batch_id: Optional[str] = None) -> int:
+        """Возвращает приостановленные отклики в очередь; просроченные за паузу уходят с тем же интервалом"""
+        db = SessionLocal()
+        try:
+            query = db.query(Application).filter(Application.status == "paused")
+            if resume_id is not None:
+                query = query.filter(Application.resume_id == resume_id)
+            if batch_id is not None:
+                query = query.filter(Application.batch_id == batch_id)
+            rows = query.order_by(Application.resume_id, Application.scheduled_at).with_entities(
+                Application.id, Application.resume_id, Application.scheduled_at).all()
+
+            now = datetime.utcnow()
+            updates, previous = [], {}
+            for row in rows:
+                at = row.scheduled_at
+                if row.resume_id in previous:
+                    at = max(at, previous[row.resume_id] + APPLY_INTERVAL)
+                at = max(at, now)
+                previous[row.resume_id] = at
+                updates.append({"id": row.id, "status": "pending", "scheduled_at": at})
+            for i in range(0, len(updates), BATCH_SIZE):
+                db.bulk_update_mappings(Application, updates[i:i + BATCH_SIZE])
+            db.commit()
+            return len(updates)
+        finally:
+            db.close()
+
+    # --- воркер ---
+
+    def recover_stale(self) -> int:
+        """Отклики, зависшие в running (воркер упал), возвращаются в очередь"""
+        db = SessionLocal()
+        try:
+            count = db.query(Application).filter(
+                Application.status == "running",
+                Application.locked_at < datetime.utcnow() - APPLY_LOCK_TIMEOUT,
+            ).update({"status": "pending", "locked_by": None, "locked_at": None}, synchronize_session=False)
+            db.commit()
+            if count:
+                logger.warning(f"Requeued {count} stale applications")
+            return count
+        finally:
+            db.close()
+
+    def claim(self, worker_id: str, limit: int) -> List[Dict]:
+        """
+        Забирает до limit откликов, время которых пришло, не превышая
+        APPLY_MAX_RUNNING_PER_RESUME одновременных откликов на резюме.
+        """
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            running = dict(db.query(Application.resume_id, func.count()).filter(
+                Application.status == "running").group_by(Application.resume_id).all())
+            # с запасом: часть кандидатов отсеется по лимиту на резюме
+            candidates = (db.query(Application.id, Application.resume_id, Application.vacancy_id,
+                                   Application.similarity, Application.attempts, Application.batch_id)
+                          .filter(Application.status == "pending", Application.scheduled_at <= now)
+                          .order_by(Application.scheduled_at).limit(limit * 10).all())
+
+            claimed = []
+            for row in candidates:
+                if len(claimed) >= limit:
+                    break
+                if running.get(row.resume_id, 0) >= APPLY_MAX_RUNNING_PER_RESUME:
+                    continue
+                updated = db.query(Application).filter(
+                    Application.id == row.id, Application.status == "pending"
+                ).update({"status": "running", "locked_by": worker_id, "locked_at": now},
+                         synchronize_session=False)
+                db.commit()
+                if updated:  # иначе отклик забрал другой воркер или его отменили
+                    running[row.resume_id] = running.get(row.resume_id, 0) + 1
+                    claimed.append(dict(row._mapping))
+            return claimed
+        finally:
+            db.close()
+
+    def next_due_at(self) -> Optional[datetime]:
+        db = SessionLocal()
+        try:
+            return db.query(func.min(Application.scheduled_at)).filter(Application.status == "pending").scalar()
+        finally:
+            db.close()
+
+    def touch(self, application_id: int, worker_id: str) -> bool:
+        """
+        Продлевает блокировку перед отправкой. False — отклик уже не наш
+        (вернулся в очередь по таймауту и взят другим воркером) — отправлять нельзя.
+        """
+        db = SessionLocal()
+        try:
+            updated = db.query(Application).filter(
+                Application.id == application_id, Application.status == "running",
+                Application.locked_by == worker_id,
+            ).update({"locked_at": datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+            return bool(updated)
+        finally:
+            db.close()
+
+    def release(self, application_ids: Iterable[int], worker_id: str) -> int:
+        """Возвращает взятые, но не отправленные отклики в очередь (остановка воркера)"""
+        ids = list(application_ids)
+        if not ids:
+            return 0
+        db = SessionLocal()
+        try:
+            count = db.query(Application).filter(
+                Application.id.in_(ids), Application.status == "running", Application.locked_by == worker_id,
+            ).update({"status": "pending", "locked_by": None, "locked_at": None}, synchronize_session=False)
+            db.commit()
+            return count
+        finally:
+            db.close()
+
+    def _finish(self, application_id: int, worker_id: str, **fields) -> bool:
+        db = SessionLocal()
+        try:
+            updated = db.query(Application).filter(
+                Application.id == application_id, Application.status == "running",
+                Application.locked_by == worker_id,
+            ).update({"locked_by": None, "locked_at": None, **fields}, synchronize_session=False)
+            db.commit()
+            return bool(updated)
+        finally:
+            db.close()
+
+    def mark_sent(self, application_id: int, worker_id: str, cover_letter: str) -> bool:
+        return self._finish(application_id, worker_id, status="sent", cover_letter=cover_letter,
+                            applied_at=datetime.utcnow(), error=None)
+
+    def mark_failed(self, application_id: int, worker_id: str, attempts: int, error: str) -> bool:
+        """Неудачная попытка: повтор через APPLY_RETRY_DELAY × номер попытки или failed после последней"""
+        attempts += 1
+        if attempts >= APPLY_MAX_ATTEMPTS:
+            return self._finish(application_id, worker_id, status="failed", attempts=attempts, error=error)
+        return self._finish(application_id, worker_id, status="pending", attempts=attempts, error=error,
+                            scheduled_at=datetime.utcnow() + APPLY_RETRY_DELAY * attempts)
+
+    # --- метрики воркеров ---
+
+    def report_metrics(self, worker_id: str, metrics: Dict) -> None:
+        stmt = sqlite_insert(WorkerStatus.__table__).values(
+            worker_id=worker_id, updated_at=datetime.utcnow(), metrics=json.dumps(metrics))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["worker_id"], set_={"updated_at": stmt.excluded.updated_at, "metrics": stmt.excluded.metrics})
+        db = SessionLocal()
+        try:
+            db.execute(stmt)
+            db.commit()
+        finally:
+            db.close()
+
+    def worker_metrics(self, max_age: timedelta = timedelta(minutes=2)) -> Dict[str, Dict]:
+        """Метрики воркеров, отчитавшихся не позже max_age назад"""
+        db = SessionLocal()
+        try:
+            rows = db.query(WorkerStatus).filter(WorkerStatus.updated_at >= datetime.utcnow() - max_age).all()
+            return {row.worker_id: {"updated_at": row.updated_at.isoformat(), **json.loads(row.metrics)}
+                    for row in rows}
+        finally:
+            db.close()
+
+
+application_queue = ApplicationQueue()
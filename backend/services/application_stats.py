@@ -0,0 +1,135 @@
+"""
+Статистика откликов для дашборда.
+
+Итоги по статусам и дневные ряды читаются из счетчиков application_counters
+и application_daily (их ведут триггеры на applications, см. models.database),
+поэтому не зависят от размера таблицы откликов. Почасовой ряд считается
+GROUP BY по индексу (status, applied_at) за ограниченный период.
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+
+from models.database import (SessionLocal, engine, Application, ApplicationCounter, ApplicationDailyCount,
+                             rebuild_application_counts)
+
+APPLICATION_STATUSES = ("pending", "running", "paused", "sent", "failed", "cancelled")
+SERIES_BUCKETS = ("hour", "day", "week")
+MAX_SERIES_HOURS = 24 * 14  # почасовой ряд идет по строкам applications — ограничиваем период
+
+
+class ApplicationStats:
+    """Чтение статистики; все состояние — в счетчиках БД"""
+
+    def summary(self, resume_id: Optional[int] = None) -> Dict:
+        """Число откликов по статусам: по всем резюме — одна строка на статус"""
+        db = SessionLocal()
+        try:
+            if resume_id is None:
+                rows = db.query(ApplicationCounter.status, ApplicationCounter.count).all()
+            else:
+                rows = (db.query(ApplicationDailyCount.status, func.sum(ApplicationDailyCount.count))
+                        .filter(ApplicationDailyCount.resume_id == resume_id)
+                        .group_by(ApplicationDailyCount.status).all())
+        finally:
+            db.close()
+        by_status = {status: 0 for status in APPLICATION_STATUSES}
+        by_status.update({status: int(count) for status, count in rows if count})
+        return {"total_applications": sum(by_status.values()), **by_status}
+
+    def recent(self, resume_id: Optional[int] = None, limit: int = 10) -> List[Dict]:
+        db = SessionLocal()
+        try:
+            query = db.query(Application.vacancy_id, Application.status, Application.applied_at,
+                             Application.auto_applied)
+            if resume_id is not None:
+                query = query.filter(Application.resume_id == resume_id)
+            return [
+                {
+                    "vacancy_id": app.vacancy_id,
+                    "status": app.status,
+                    "applied_at": app.applied_at.isoformat(),
+                    "auto_applied": app.auto_applied
+                }
+                for app in query.order_by(Application.applied_at.desc()).limit(limit)
+            ]
+        finally:
+            db.close()
+
+    def series(self, bucket: str = "day", periods: int = 30, resume_id: Optional[int] = None,
+               now: Optional[datetime] = None) -> List[Dict]:
+        """
+        Ряд для графика: [{"t": начало интервала, статус: число, ...}] за последние
+        periods интервалов, включая пустые. Отклик попадает в интервал своего applied_at
+        (для отправленных — время отправки) с текущим статусом.
+        """
+        if bucket not in SERIES_BUCKETS:
+            raise ValueError(f"bucket must be one of {SERIES_BUCKETS}")
+        now = now or datetime.utcnow()
+        if bucket == "hour":
+            periods = min(periods, MAX_SERIES_HOURS)
+            start = now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=periods - 1)
+            keys = [(start + timedelta(hours=i)).strftime("%Y-%m-%d %H:00") for i in range(periods)]
+            counts = self._hourly(start, resume_id)
+        else:
+            step = 7 if bucket == "week" else 1
+            today = now.date()
+            end = today - timedelta(days=today.weekday()) if bucket == "week" else today
+            start_day = end - timedelta(days=step * (periods - 1))
+            keys = [(start_day + timedelta(days=step * i)).isoformat() for i in range(periods)]
+            counts = self._daily(start_day, resume_id, weekly=bucket == "week")
+
+        points = []
+        for key in keys:
+            point = {"t": key, **{status: 0 for status in APPLICATION_STATUSES}}
+            point.update(counts.get(key, {}))
+            points.append(point)
+        return points
+
+    @staticmethod
+    def _daily(start_day: date, resume_id: Optional[int], weekly: bool) -> Dict[str, Dict[str, int]]:
+        db = SessionLocal()
+        try:
+            query = (db.query(ApplicationDailyCount.day, ApplicationDailyCount.status,
+                              func.sum(ApplicationDailyCount.count))
+                     .filter(ApplicationDailyCount.day >= start_day.isoformat()))
+            if resume_id is not None:
+                query = query.filter(ApplicationDailyCount.resume_id == resume_id)
+            rows = query.group_by(ApplicationDailyCount.day, ApplicationDailyCount.status).all()
+        finally:
+            db.close()
+        counts: Dict[str, Dict[str, int]] = {}
+        for day, status, count in rows:
+            if weekly:
+                day = date.fromisoformat(day)
+                day = (day - timedelta(days=day.weekday())).isoformat()
+            bucket = counts.setdefault(day, {})
+            bucket[status] = bucket.get(status, 0) + int(count)
+        return counts
+
+    @staticmethod
+    def _hourly(start: datetime, resume_id: Optional[int]) -> Dict[str, Dict[str, int]]:
+        hour = func.strftime("%Y-%m-%d %H:00", Application.applied_at)
+        db = SessionLocal()
+        try:
+            # status IN (...) + applied_at >= start — диапазоны по индексу (status, applied_at)
+            query = (db.query(hour, Application.status, func.count())
+                     .filter(Application.status.in_(APPLICATION_STATUSES), Application.applied_at >= start))
+            if resume_id is not None:
+                query = query.filter(Application.resume_id == resume_id)
+            rows = query.group_by(hour, Application.status).all()
+        finally:
+            db.close()
+        counts: Dict[str, Dict[str, int]] = {}
+        for key, status, count in rows:
+            counts.setdefault(key, {})[status] = count
+        return counts
+
+    def rebuild(self) -> None:
+        """Пересчет счетчиков с нуля (после ручных правок базы в обход триггеров)"""
+        with engine.begin() as connection:
+            rebuild_application_counts(connection)
+
+
+application_stats = ApplicationStats()
@@ -1,78 +1,67 @@
-from typing import List, Dict
+from typing import Dict, Optional
 import asyncio
-from datetime import datetime
 import logging
 from .hh_service import HeadHunterService
 from .cover_letter_generator import CoverLetterGenerator
+from .rate_limiter import TokenBucketLimiter, get_rate_limiter
+from .resume_store import resume_store
+from .vacancy_store import load_vacancies
 
 logger = logging.getLogger(__name__)
 
 class AutoApplier:
-    def __init__(self, hh_service: HeadHunterService):
-        self.hh_service = hh_service
+    """
+    Отклик из очереди (services.application_queue) в два шага — стадии
+    конвейера worker.py: render (письмо) и send (отклик через HH).
+    Темп откликов задает бакет «apply» общего rate limiter'а — отдельный
+    для каждого резюме, повторы — время scheduled_at в очереди, а не sleep здесь.
+    """
+
+    def __init__(self, hh_service: Optional[HeadHunterService] = None,
+                 limiter: Optional[TokenBucketLimiter] = None, use_rate_limit: bool = True):
+        self.hh_service = hh_service or HeadHunterService()
         self.cover_letter_gen = CoverLetterGenerator()
-        self.is_running = False
-        
-    async def start_auto_application(self, 
-                                   resume_data: Dict, 
-                                   vacancy_matches: List[Dict],
-                                   min_similarity: float = 0.3,
-                                   max_applications_per_day: int = 50):
-        """Start automated application process"""
-        
-        if self.is_running:
-            logger.warning("Auto applier is already running")
-            return
-            
-        self.is_running = True
-        applied_count = 0
-        
-        try:
-            for match in vacancy_matches:
-                if applied_count >= max_applications_per_day:
-                    logger.info(f"Daily limit reached: {max_applications_per_day}")
-                    break
-                    
-                vacancy = match["vacancy"]
-                similarity = match["similarity"]
-                
-                if similarity < min_similarity:
-                    continue
-                    
-                # Generate personalized cover letter
-                cover_letter = self.cover_letter_gen.generate_cover_letter(
-                    resume_data, vacancy
-                )
-                
-                # Apply to vacancy
-                success = await self._apply_with_retry(
-                    vacancy["id"], 
-                    resume_data["id"],
-                    cover_letter
-                )
-                
-                if success:
-                    applied_count += 1
-                    logger.info(f"Applied to {vacancy['name']} at {vacancy['employer']['name']}")
-                
-                # Delay between applications (important for rate limiting)
-                await asyncio.sleep(300)  # 5 minutes between applications
-                
-        except Exception as e:
-            logger.error(f"Auto application error: {e}")
-        finally:
-            self.is_running = False
-            
-        return applied_count
-    
-    async def _apply_with_retry(self, vacancy_id: str, resume_id: str, cover_letter: str, max_retries: int = 3) -> bool:
-        """Apply with retry logic"""
-        for attempt in range(max_retries):
-            try:
-                return self.hh_service.apply_to_vacancy(vacancy_id, resume_id, cover_letter)
-            except Exception as e:
-                logger.warning(f"Application attempt {attempt + 1} failed: {e}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(60 * (attempt + 1))  # Exponential backoff
-                    
-        return False
\ No newline at end of file
+        self.limiter = limiter or (get_rate_limiter() if use_rate_limit else None)
+
+    async def _load_vacancy(self, vacancy_id: str) -> Dict:
+        vacancies = await asyncio.to_thread(load_vacancies, [vacancy_id])
+        if vacancy_id in vacancies:
+            return vacancies[vacancy_id]
+        return await self.hh_service.get_vacancy_details(vacancy_id)
+
+    async def render(self, application: Dict) -> str:
+        """Сопроводительное письмо для строки очереди (resume_id, vacancy_id)"""
+        resume_id, vacancy_id = application["resume_id"], application["vacancy_id"]
+        resume = await asyncio.to_thread(resume_store.get, resume_id)
+        if resume is None:
+            raise LookupError(f"Resume {resume_id} not found")
+        application["vacancy"] = await self._load_vacancy(vacancy_id)
+
+        resume_data = {"id": resume_id, **resume["analysis"]}
+        # LLM-бэкенд писем блокирующий — вне event loop
+        return await asyncio.to_thread(self.cover_letter_gen.generate_cover_letter, resume_data, application["vacancy"])
+
+    async def wait_turn(self, application: Dict) -> None:
+        """Ждет токен бакета «apply» резюме отклика"""
+        if self.limiter is not None:
+            await self.limiter.acquire(f"apply:{application['resume_id']}")
+
+    async def send(self, application: Dict, cover_letter: str) -> None:
+        """
+        Отправляет отклик (токен уже получен в wait_turn); вызов HH — вне
+        event loop. Исключение означает неудачную попытку — очередь запланирует повтор.
+        """
+        vacancy_id = application["vacancy_id"]
+        if not await asyncio.to_thread(self.hh_service.apply_to_vacancy, vacancy_id,
+                                       str(application["resume_id"]), cover_letter):
+            raise RuntimeError("Application was not accepted")
+
+        vacancy = application.get("vacancy") or {}
+        logger.info(f"Applied to {vacancy.get('name')} at {(vacancy.get('employer') or {}).get('name')}")
+
+    async def apply(self, application: Dict) -> str:
+        """Письмо и отклик за один вызов; возвращает письмо"""
+        cover_letter = await self.render(application)
+        await self.wait_turn(application)
+        await self.send(application, cover_letter)
+        return cover_letter
@@ -1,45 +1,182 @@
-from typing import Dict
-import openai  # Для GPT-генерации писем
-import random
+"""
+Сопроводительные письма из шаблонов data/cover_letters/*.txt.
 
-class CoverLetterGenerator:
-    def __init__(self):
-        # Для продакшена можно использовать OpenAI API или локальную модель
-        self.templates = [
-            """Здравствуйте!
+Шаблоны (str.format-поля {position}, {company}, {experience}, {skills})
+разбираются один раз при загрузке в список «текст + поле», поэтому письмо
+собирается одним join без повторного разбора формата. Шаблон выбирается
+по хэшу (резюме, вакансия) — повторный отклик получает то же письмо.
+
+COVER_LETTER_BACKEND=openai дорабатывает письмо из шаблона через
+OpenAI-совместимый API (OPENAI_BASE_URL — например, локальная модель);
+пакет openai импортируется только при выборе этого бэкенда.
+Готовые письма кэшируются по хэшу входных данных (см. hh_cache — те же
+бэкенды memory | sqlite).
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from string import Formatter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .hh_cache import MemoryCacheBackend, SQLiteCacheBackend
+
+logger = logging.getLogger(__name__)
+
+COVER_LETTER_TEMPLATES_DIR = os.environ.get(
+    "COVER_LETTER_TEMPLATES_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cover_letters"),
+)
+COVER_LETTER_BACKEND = os.environ.get("COVER_LETTER_BACKEND", "template")  # template | openai
+COVER_LETTER_CACHE_BACKEND = os.environ.get("COVER_LETTER_CACHE_BACKEND", "memory")  # memory | sqlite
+COVER_LETTER_CACHE_PATH = os.environ.get("COVER_LETTER_CACHE_PATH", "./cover_letters_cache.db")
+COVER_LETTER_CACHE_SIZE = int(os.environ.get("COVER_LETTER_CACHE_SIZE", "10000"))
+OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
+
+TEMPLATE_FIELDS = ("position", "company", "experience", "skills")
+
+LLM_PROMPT = (
+    "Перепиши сопроводительное письмо для отклика на вакансию, сохранив факты и вежливый тон. "
+    "Не больше 120 слов, без подписи с именем.\n\n"
+    "Вакансия: {position}, {company}\n"
+    "Описание: {description}\n\n"
+    "Черновик письма:\n{draft}"
+)
+
+
+class CompiledTemplate:
+    """Шаблон, разобранный на куски текста и имена полей"""
+
+    def __init__(self, name: str, source: str):
+        self.name = name
+        self.digest = hashlib.sha1(source.encode()).hexdigest()[:12]
+        self._parts: List[Tuple[str, Optional[str]]] = []
+        for literal, field, spec, conversion in Formatter().parse(source):
+            if field is not None and (field not in TEMPLATE_FIELDS or spec or conversion):
+                raise ValueError(f"Cover letter template {name}: unsupported field {{{field}}}")
+            self._parts.append((literal, field))
+
+    def render(self, fields: Dict[str, str]) -> str:
+        return "".join(literal + (fields[field] if field else "") for literal, field in self._parts)
 
-Меня заинтересовала вакансия {position} в компании {company}. 
-Мой опыт работы {experience} лет в области {skills} идеально подходит для данной позиции.
 
-В резюме вы можете ознакомиться с моими проектами и достижениями. 
-Готов обсудить детали сотрудничества в удобное для вас время.
+def load_templates(directory: str = COVER_LETTER_TEMPLATES_DIR) -> List[CompiledTemplate]:
+    templates = []
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(".txt"):
+            with open(os.path.join(directory, filename), encoding="utf-8") as f:
+                templates.append(CompiledTemplate(filename[:-4], f.read().strip()))
+    if not templates:
+        raise ValueError(f"No cover letter templates in {directory}")
+    return templates
 
-С уважением.""",
-            
-            """Добрый день!
 
-Рассматриваю возможность присоединиться к команде {company} на позицию {position}.
-Имею {experience} лет опыта разработки с использованием {skills}.
+def letter_fields(resume_data: Dict, vacancy: Dict) -> Dict[str, str]:
+    """Значения полей шаблона; от них (и только от них) зависит письмо"""
+    return {
+        "position": vacancy.get("name") or "разработчика",
+        "company": (vacancy.get("employer") or {}).get("name") or "вашей компании",
+        "experience": str(resume_data.get("experience_years", 2)),
+        "skills": ", ".join(resume_data.get("skills", [])[:3]) or "веб-разработки",  # Top 3 skills
+    }
 
-Буду рад возможности внести свой вклад в развитие ваших проектов.
 
-С уважением."""
-        ]
-    
+class OpenAILetterBackend:
+    """Доработка письма LLM; клиент создается при первом письме"""
+    name = "openai"
+
+    def __init__(self, model: str = OPENAI_MODEL):
+        import openai  # необязательная зависимость: pip install openai
+        self.model = model
+        self._client = openai.OpenAI(base_url=os.environ.get("OPENAI_BASE_URL") or None)
+
+    @staticmethod
+    def description(vacancy: Dict) -> str:
+        return ((vacancy.get("snippet") or {}).get("responsibility") or vacancy.get("description") or "")[:1000]
+
+    def rewrite(self, draft: str, fields: Dict[str, str], vacancy: Dict) -> str:
+        description = self.description(vacancy)
+        response = self._client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": LLM_PROMPT.format(draft=draft, description=description, **fields)}],
+            temperature=0.3,
+        )
+        return (response.choices[0].message.content or "").strip() or draft
+
+
+class CoverLetterGenerator:
+    def __init__(self, templates: Optional[List[CompiledTemplate]] = None,
+                 backend: str = COVER_LETTER_BACKEND, cache=None):
+        self.templates = templates or load_templates()
+        self.backend_name = backend
+        self._llm = None
+        if cache is None:
+            cache = (SQLiteCacheBackend(COVER_LETTER_CACHE_PATH, COVER_LETTER_CACHE_SIZE)
+                     if COVER_LETTER_CACHE_BACKEND == "sqlite" else MemoryCacheBackend(COVER_LETTER_CACHE_SIZE))
+        self.cache = cache
+        self._lock = threading.Lock()  # рендер идет из потоков (asyncio.to_thread)
+        self.hits = 0
+        self.misses = 0
+
+    def _llm_backend(self) -> Optional[OpenAILetterBackend]:
+        if self.backend_name != "openai":
+            return None
+        if self._llm is None:
+            try:
+                self._llm = OpenAILetterBackend()
+            except Exception as e:
+                logger.warning(f"LLM cover letters unavailable ({e!r}), using templates")
+                self.backend_name = "template"
+                return None
+        return self._llm
+
+    def choose_template(self, resume_data: Dict, vacancy: Dict) -> CompiledTemplate:
+        """Один и тот же шаблон для пары (резюме, вакансия) при любом порядке и числе вызовов"""
+        key = f"{resume_data.get('id')}:{vacancy.get('id')}".encode()
+        return self.templates[int(hashlib.sha1(key).hexdigest()[:8], 16) % len(self.templates)]
+
+    def _cache_key(self, template: CompiledTemplate, fields: Dict[str, str], context: str = "") -> str:
+        payload = json.dumps([self.backend_name, template.digest, fields, context], sort_keys=True, ensure_ascii=False)
+        return "letter:" + hashlib.sha256(payload.encode()).hexdigest()
+
     def generate_cover_letter(self, resume_data: Dict, vacancy: Dict) -> str:
         """Generate personalized cover letter"""
-        
-        template = random.choice(self.templates)
-        
-        # Extract key info
-        position = vacancy.get("name", "разработчика")
-        company = vacancy.get("employer", {}).get("name", "вашей компании")
-        experience = resume_data.get("experience_years", 2)
-        skills = ", ".join(resume_data.get("skills", [])[:3])  # Top 3 skills
-        
-        return template.format(
-            position=position,
-            company=company,
-            experience=experience,
-            skills=skills or "веб-разработки"
-        )
\ No newline at end of file
+        return self.render_batch([(resume_data, vacancy)])[0]
+
+    def render_batch(self, pairs: Iterable[Tuple[Dict, Dict]]) -> List[str]:
+        """
+        Письма для списка пар (резюме, вакансия). Одинаковые входные данные
+        внутри пачки и уже встречавшиеся раньше рендерятся (и уходят в LLM) один раз.
+        """
+        llm = self._llm_backend()
+        letters: List[Optional[str]] = []
+        rendered: Dict[str, str] = {}
+        for resume_data, vacancy in pairs:
+            template = self.choose_template(resume_data, vacancy)
+            fields = letter_fields(resume_data, vacancy)
+            # письмо LLM зависит еще и от описания вакансии
+            key = self._cache_key(template, fields, llm.description(vacancy) if llm is not None else "")
+            if key not in rendered:
+                with self._lock:
+                    cached = self.cache.get(key)
+                if cached is not None:
+                    self.hits += 1
+                    rendered[key] = cached[0]
+                else:
+                    self.misses += 1
+                    letter = template.render(fields)
+                    if llm is not None:
+                        try:
+                            letter = llm.rewrite(letter, fields, vacancy)
+                        except Exception as e:
+                            # письмо из шаблона не кэшируем под ключом LLM — в следующий раз попробуем снова
+                            logger.warning(f"LLM cover letter failed: {e!r}")
+                            letters.append(letter)
+                            continue
+                    with self._lock:
+                        self.cache.set(key, letter, time.time())
+                    rendered[key] = letter
+            letters.append(rendered[key])
+        return letters
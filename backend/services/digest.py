@@ -0,0 +1,108 @@
+"""
+Дайджест: все активные резюме × все свежие вакансии, лучшие k вакансий
+на резюме записываются в vacancy_scores.
+
+Запуск из папки backend:
+    python -m services.digest [--top-k 100] [--fresh-hours 24] [--active-days 30]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict
+
+import scipy.sparse as sp
+
+from models.database import SessionLocal, Resume
+from matcher import active_index, vacancy_index, vectorize_resume
+from vacancy_index import VacancyIndex, deserialize_vector
+from .scheduled_jobs import run_exclusive
+from .vacancy_store import load_descriptions, load_vacancy_texts, upsert_score_lists
+
+logger = logging.getLogger(__name__)
+
+DIGEST_TOP_K = int(os.environ.get("DIGEST_TOP_K", "100"))
+DIGEST_FRESH_HOURS = float(os.environ.get("DIGEST_FRESH_HOURS", "24"))
+DIGEST_ACTIVE_DAYS = float(os.environ.get("DIGEST_ACTIVE_DAYS", "30"))
+DIGEST_INTERVAL_HOURS = float(os.environ.get("DIGEST_INTERVAL_HOURS", "24"))  # 0 — не запускать в API
+DIGEST_RESUME_BATCH = 1000  # резюме на одну пачку скоринга и одну транзакцию
+
+
+def _resume_vector(data, content: str) -> sp.csr_matrix:
+    vector = deserialize_vector(data) if data else None
+    if vector is None or vector.shape[1] != vacancy_index.n_features:
+        vector = vectorize_resume(content or "")
+    return vector
+
+
+def run_digest(top_k: int = DIGEST_TOP_K,
+               fresh_within: timedelta = timedelta(hours=DIGEST_FRESH_HOURS),
+               active_within: timedelta = timedelta(days=DIGEST_ACTIVE_DAYS),
+               min_score: float = 0.0) -> Dict:
+    started = time.perf_counter()
+    now = datetime.utcnow()
+
+    vacancies = load_vacancy_texts(now - fresh_within)
+    stats = {"vacancies": len(vacancies), "resumes": 0, "scores": 0}
+    if not vacancies:
+        return {**stats, "seconds": round(time.perf_counter() - started, 2)}
+    index = active_index()
+    index.add(vacancies)
+    vacancy_ids = [vacancy_id for vacancy_id, _ in vacancies]
+    described = set(load_descriptions(vacancy_ids))  # оценки по полному описанию (services.enrichment)
+
+    db = SessionLocal()
+    try:
+        last_id = 0
+        while True:
+            # пачки по id: в памяти не больше DIGEST_RESUME_BATCH векторов резюме
+            batch = (db.query(Resume.id, Resume.vector, Resume.content)
+                     .filter(Resume.last_accessed_at >= now - active_within, Resume.id > last_id)
+                     .order_by(Resume.id).limit(DIGEST_RESUME_BATCH).all())
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            if isinstance(index, VacancyIndex):
+                resumes = sp.vstack([_resume_vector(row.vector, row.content) for row in batch], format="csr")
+            else:
+                # эмбеддинги резюме — пачкой за один вызов модели
+                resumes = index.encode([row.content or "" for row in batch])
+            results = [(batch[position].id, matches) for position, matches
+                       in index.top_k_batch(resumes, top_k, vacancy_ids, min_score)]
+            stats["scores"] += upsert_score_lists(db, results, described)
+            stats["resumes"] += len(batch)
+    finally:
+        db.close()
+
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    logger.info(f"Digest done: {stats}")
+    return stats
+
+
+async def digest_loop(interval_hours: float = DIGEST_INTERVAL_HOURS) -> None:
+    """
+    Фоновый запуск дайджеста раз в interval_hours (первый — через интервал после старта).
+    Из нескольких воркеров uvicorn дайджест выполняет один (см. scheduled_jobs).
+    """
+    while True:
+        await asyncio.sleep(interval_hours * 3600)
+        try:
+            await run_exclusive("digest", timedelta(hours=interval_hours), run_digest)
+        except Exception as e:
+            logger.error(f"Digest failed: {e!r}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Score active resumes against fresh vacancies")
+    parser.add_argument("--top-k", type=int, default=DIGEST_TOP_K)
+    parser.add_argument("--fresh-hours", type=float, default=DIGEST_FRESH_HOURS)
+    parser.add_argument("--active-days", type=float, default=DIGEST_ACTIVE_DAYS)
+    parser.add_argument("--min-score", type=float, default=0.0)
+    args = parser.parse_args()
+
+    print(run_digest(args.top_k, timedelta(hours=args.fresh_hours),
+                     timedelta(days=args.active_days), args.min_score))
@@ -0,0 +1,190 @@
+"""
+Фоновая загрузка полных описаний вакансий.
+
+Поиск HH отдает только snippet, поэтому /match-vacancies сразу отвечает
+по нему, а id вакансий ставит в очередь. Воркеры параллельно (в пределах
+бакета detail rate limiter'а) запрашивают /vacancies/{id}, HTML описания
+один раз переводится в текст и сохраняется в Vacancy.description. Затем
+вакансии переиндексируются по полному тексту, а оценки резюме, которые
+ждали эти вакансии, пересчитываются и записываются в vacancy_scores
+(scored_on = "description").
+"""
+import asyncio
+import html
+import logging
+import os
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from models.database import SessionLocal
+from matcher import active_index, resume_query, vacancy_text
+from .hh_client import HHAPIError, HHClient, get_hh_client
+from .resume_store import resume_store
+from .vacancy_store import filter_unenriched, save_descriptions, upsert_scores
+
+logger = logging.getLogger(__name__)
+
+ENRICH_CONCURRENCY = int(os.environ.get("ENRICH_CONCURRENCY", "4"))
+ENRICH_MAX_QUEUE = int(os.environ.get("ENRICH_MAX_QUEUE", "5000"))
+ENRICH_BATCH = 50            # описаний на одну запись в БД и один пересчет оценок
+ENRICH_FLUSH_SECONDS = 2.0   # неполная пачка записывается не позже чем через столько секунд
+
+BLOCK_TAG_RE = re.compile(r'<\s*(?:br|/p|/li|/h\d|/div|/tr)\s*/?\s*>', re.IGNORECASE)
+LIST_ITEM_RE = re.compile(r'<\s*li[^>]*>', re.IGNORECASE)
+TAG_RE = re.compile(r'<[^>]+>')
+SPACES_RE = re.compile(r'[ \t\xa0]+')
+BLANK_LINES_RE = re.compile(r'\s*\n\s*')
+
+
+def html_to_text(value: str) -> str:
+    """Текст описания вакансии HH без разметки; абзацы и пункты списков — с новой строки"""
+    text = BLOCK_TAG_RE.sub("\n", value or "")
+    text = LIST_ITEM_RE.sub("\n• ", text)
+    text = html.unescape(TAG_RE.sub(" ", text))
+    text = SPACES_RE.sub(" ", text)
+    return BLANK_LINES_RE.sub("\n", text).strip()
+
+
+class VacancyEnricher:
+    """
+    Очередь id вакансий и воркеры, загружающие их описания.
+
+    Вакансия в очереди одна, сколько бы резюме ее ни ждали; резюме
+    запоминаются, чтобы пересчитать их оценки после загрузки.
+    """
+
+    def __init__(self, client: Optional[HHClient] = None,
+                 concurrency: int = ENRICH_CONCURRENCY, max_queue: int = ENRICH_MAX_QUEUE):
+        self.client = client
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._waiting: Dict[str, Set[int]] = {}                # вакансия -> резюме, ждущие пересчета
+        self._fetched: Dict[str, Optional[str]] = {}           # загружено, еще не записано
+        self._texts: Dict[str, str] = {}                       # тексты для индекса
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def pending(self) -> int:
+        return len(self._waiting)
+
+    def is_pending(self, vacancy_id: str) -> bool:
+        """Описание вакансии в очереди или загружается"""
+        return str(vacancy_id) in self._waiting
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self.client = self.client or get_hh_client()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._flusher()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._fetched:
+            await self._flush()
+
+    async def enqueue(self, vacancy_ids: Iterable[str], resume_id: Optional[int] = None) -> int:
+        """Ставит в очередь сохраненные вакансии без описания; возвращает, сколько добавлено"""
+        if self._queue is None:
+            return 0
+        candidates = [str(v) for v in vacancy_ids]
+        new = [v for v in candidates if v not in self._waiting]
+        if resume_id is not None:
+            for vacancy_id in candidates:
+                if vacancy_id in self._waiting:
+                    self._waiting[vacancy_id].add(resume_id)
+        if not new:
+            return 0
+
+        new = await asyncio.to_thread(filter_unenriched, new)
+        added = 0
+        for vacancy_id in new:
+            if len(self._waiting) >= self.max_queue:
+                logger.debug("Enrichment queue is full, skipping the rest")
+                break
+            if vacancy_id in self._waiting:
+                continue
+            self._waiting[vacancy_id] = {resume_id} if resume_id is not None else set()
+            self._queue.put_nowait(vacancy_id)
+            added += 1
+        return added
+
+    async def _worker(self) -> None:
+        while True:
+            vacancy_id = await self._queue.get()
+            try:
+                details = await self.client.get_vacancy(vacancy_id)
+                description = html_to_text(details.get("description") or "")
+                self._fetched[vacancy_id] = description or None
+                if description:
+                    self._texts[vacancy_id] = vacancy_text(details, description)
+            except HHAPIError as e:
+                if e.status_code in (403, 404):
+                    self._fetched[vacancy_id] = None  # вакансия в архиве или скрыта
+                else:
+                    # временная ошибка: вакансия останется без описания до следующего поиска
+                    logger.warning(f"Vacancy {vacancy_id} details failed: {e}")
+                    self._waiting.pop(vacancy_id, None)
+            except Exception as e:
+                logger.error(f"Vacancy {vacancy_id} enrichment failed: {e!r}")
+                self._waiting.pop(vacancy_id, None)
+            finally:
+                self._queue.task_done()
+
+    async def _flusher(self) -> None:
+        while True:
+            await asyncio.sleep(ENRICH_FLUSH_SECONDS)
+            while self._fetched:
+                try:
+                    await self._flush()
+                except Exception as e:
+                    logger.error(f"Enrichment flush failed: {e!r}")
+                    break
+                if len(self._fetched) < ENRICH_BATCH:
+                    break
+
+    async def _flush(self) -> None:
+        batch = dict(list(self._fetched.items())[:ENRICH_BATCH])
+        texts = {v: self._texts.pop(v) for v in batch if v in self._texts}
+        for vacancy_id in batch:
+            del self._fetched[vacancy_id]
+
+        waiting = {vacancy_id: self._waiting.pop(vacancy_id, ()) for vacancy_id in batch}
+        saved = await asyncio.to_thread(save_descriptions, batch)
+        if len(saved) < len(batch):
+            # строку удалили после постановки в очередь: оценки без вакансии не пишем
+            logger.warning(f"{len(batch) - len(saved)} enriched vacancies are missing from the database")
+            texts = {v: text for v, text in texts.items() if v in saved}
+
+        resumes: Dict[int, List[str]] = defaultdict(list)
+        for vacancy_id in texts:
+            for resume_id in waiting[vacancy_id]:
+                resumes[resume_id].append(vacancy_id)
+        if texts:
+            await asyncio.to_thread(self._rescore, texts, resumes)
+
+    @staticmethod
+    def _rescore(texts: Dict[str, str], resumes: Dict[int, List[str]]) -> None:
+        """Переиндексирует вакансии по полному тексту и пересчитывает оценки ждавших их резюме"""
+        index = active_index()
+        index.add(texts.items())
+        described = set(texts)
+        db = SessionLocal()
+        try:
+            for resume_id, vacancy_ids in resumes.items():
+                resume = resume_store.get(resume_id)
+                if resume is None:
+                    continue
+                scores = index.score_ids(resume_query(resume), vacancy_ids)
+                upsert_scores(db, resume_id, zip(vacancy_ids, scores), described)
+        finally:
+            db.close()
+
+
+vacancy_enricher = VacancyEnricher()
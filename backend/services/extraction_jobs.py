@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from models.database import SessionLocal, ExtractionJob
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_WORKERS = int(os.environ.get("EXTRACTION_WORKERS", "2"))
+EXTRACTION_TIMEOUT = int(os.environ.get("EXTRACTION_TIMEOUT", "60"))         # секунд на задачу
+EXTRACTION_MEMORY_MB = int(os.environ.get("EXTRACTION_MEMORY_MB", "1024"))  # лимит памяти процесса
+MAX_PENDING_JOBS = int(os.environ.get("EXTRACTION_MAX_PENDING", "32"))
+# Дольше задача не живет (очередь MAX_PENDING_JOBS на EXTRACTION_WORKERS процессов, у каждой —
+# таймаут); более старые queued/running остались от процесса, упавшего во время извлечения
+EXTRACTION_STALE_AFTER = timedelta(
+    seconds=(MAX_PENDING_JOBS // max(EXTRACTION_WORKERS, 1) + 1) * (EXTRACTION_TIMEOUT + 5))
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+def _init_worker(memory_mb: int) -> None:
+    """Инициализация процесса пула: лимит адресного пространства (только POSIX)"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return
+    limit = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _run_extraction(path: str, timeout: int) -> Tuple[str, Dict]:
+    """Выполняется в процессе пула: извлечение текста и анализ резюме"""
+    import signal
+    from resume_parser import extract_resume_text, analyze_resume
+
+    def on_timeout(signum, frame):
+        raise ExtractionTimeout(f"Extraction took longer than {timeout}s")
+
+    has_alarm = hasattr(signal, "SIGALRM")
+    if has_alarm:
+        signal.signal(signal.SIGALRM, on_timeout)
+        signal.alarm(timeout)
+    try:
+        text = extract_resume_text(path)
+        return text, analyze_resume(text)
+    finally:
+        if has_alarm:
+            signal.alarm(0)
+
+
+class ExtractionJobManager:
+    """
+    Извлечение текста резюме в ограниченном пуле процессов.
+    Состояние задач хранится в таблице extraction_jobs, поэтому статус
+    можно запросить у любого воркера.
+    """
+
+    def __init__(self, workers: int = EXTRACTION_WORKERS):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._tasks: Dict[asyncio.Task, str] = {}  # задача -> id задачи извлечения
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(EXTRACTION_MEMORY_MB,),
+            )
+        return self._pool
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    def create_job(self, job_id: str, filename: str, path: str, content_hash: str,
+                   status: str = "queued", resume_id: Optional[int] = None) -> None:
+        db = SessionLocal()
+        try:
+            db.add(ExtractionJob(id=job_id, filename=filename, path=path, content_hash=content_hash,
+                                 status=status, resume_id=resume_id,
+                                 finished_at=datetime.utcnow() if status == "done" else None))
+            db.commit()
+        finally:
+            db.close()
+
+    def find_active_job(self, content_hash: str) -> Optional[str]:
+        """id задачи, которая уже извлекает этот же файл (повторная загрузка во время обработки)"""
+        db = SessionLocal()
+        try:
+            row = db.query(ExtractionJob.id).filter(
+                ExtractionJob.content_hash == content_hash,
+                ExtractionJob.status.in_(("queued", "running")),
+                ExtractionJob.created_at >= datetime.utcnow() - EXTRACTION_STALE_AFTER,
+            ).first()
+            return row.id if row else None
+        finally:
+            db.close()
+
+    def _update_job(self, job_id: str, **fields) -> None:
+        db = SessionLocal()
+        try:
+            db.query(ExtractionJob).filter(ExtractionJob.id == job_id).update(fields)
+            db.commit()
+        finally:
+            db.close()
+
+    def _fail_jobs(self, job_ids: Iterable[str], error: str) -> None:
+        db = SessionLocal()
+        try:
+            db.query(ExtractionJob).filter(
+                ExtractionJob.id.in_(list(job_ids)), ExtractionJob.status.in_(("queued", "running")),
+            ).update({"status": "failed", "error": error, "finished_at": datetime.utcnow()},
+                     synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def fail_stale_jobs(self) -> int:
+        """При старте: queued/running старше EXTRACTION_STALE_AFTER — задачи упавшего процесса"""
+        db = SessionLocal()
+        try:
+            failed = db.query(ExtractionJob).filter(
+                ExtractionJob.status.in_(("queued", "running")),
+                ExtractionJob.created_at < datetime.utcnow() - EXTRACTION_STALE_AFTER,
+            ).update({"status": "failed", "error": "Extraction was interrupted by a server restart",
+                      "finished_at": datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+            return failed
+        finally:
+            db.close()
+
+    def get_job(self, job_id: str) -> Optional[ExtractionJob]:
+        db = SessionLocal()
+        try:
+            return db.get(ExtractionJob, job_id)
+        finally:
+            db.close()
+
+    def submit(self, job_id: str, filename: str, path: str, content_hash: str) -> None:
+        task = asyncio.create_task(self._process(job_id, filename, path, content_hash))
+        self._tasks[task] = job_id
+        task.add_done_callback(lambda done: self._tasks.pop(done, None))
+
+    async def _extract(self, path: str) -> Tuple[str, Dict]:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.pool, _run_extraction, path, EXTRACTION_TIMEOUT)
+        # запасной таймаут, если SIGALRM недоступен (Windows)
+        return await asyncio.wait_for(future, EXTRACTION_TIMEOUT + 5)
+
+    async def _process(self, job_id: str, filename: str, path: str, content_hash: str) -> None:
+        from services.resume_store import resume_store
+
+        await run_in_threadpool(self._update_job, job_id, status="running")
+        try:
+            try:
+                text, analysis = await self._extract(path)
+            except BrokenProcessPool:
+                # процесс пула упал (например, по лимиту памяти) — пересоздаем пул
+                self._pool = None
+                raise
+
+            resume_id = await run_in_threadpool(resume_store.put, text, analysis, filename, content_hash)
+            await run_in_threadpool(self._update_job, job_id, status="done", resume_id=resume_id,
+                                    finished_at=datetime.utcnow())
+        except asyncio.CancelledError:
+            # остановка сервера: задача не должна остаться running навсегда
+            self._fail_jobs([job_id], "Extraction was cancelled")
+            raise
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                e = ExtractionTimeout(f"Extraction took longer than {EXTRACTION_TIMEOUT}s")
+            logger.error(f"Extraction job {job_id} failed: {e!r}")
+            await run_in_threadpool(self._update_job, job_id, status="failed", error=str(e) or repr(e),
+                                    finished_at=datetime.utcnow())
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def shutdown(self) -> None:
+        # event loop может закрыться раньше, чем отмененные задачи дойдут до except — отмечаем сразу
+        if self._tasks:
+            self._fail_jobs(self._tasks.values(), "Extraction was cancelled by server shutdown")
+            for task in list(self._tasks):
+                task.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+extraction_jobs = ExtractionJobManager()
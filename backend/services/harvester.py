@@ -0,0 +1,83 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, List, Optional
+
+from .hh_client import HHClient, HHAPIError, get_hh_client
+
+logger = logging.getLogger(__name__)
+
+HH_MAX_PER_PAGE = 100
+
+
+class VacancyHarvester:
+    """
+    Параллельный сбор вакансий с нескольких страниц, регионов и запросов.
+
+    Для каждой пары (запрос, регион) сначала запрашивается стартовая страница —
+    из нее известно, сколько страниц есть у HH, — затем остальные страницы
+    параллельно. Скорость ограничивается общим rate limiter'ом клиента.
+    Вакансии дедуплицируются по id и отдаются пачками по мере получения.
+    """
+
+    def __init__(self, client: Optional[HHClient] = None, concurrency: int = 8):
+        self.client = client or get_hh_client()
+        self.concurrency = concurrency
+
+    async def _fetch_page(self, semaphore: asyncio.Semaphore, query: str, area: int,
+                          page: int, per_page: int) -> Dict:
+        params = {"text": query, "page": page, "per_page": per_page, "area": area}
+        async with semaphore:
+            try:
+                return await self.client.search_vacancies(params)
+            except HHAPIError as e:
+                logger.warning(f"Harvest page failed ({query!r}, area={area}, page={page}): {e}")
+                return {}
+
+    async def harvest(self,
+                      queries: List[str],
+                      areas: List[int],
+                      pages: int = 1,
+                      start_page: int = 0,
+                      per_page: int = 50) -> AsyncIterator[List[Dict]]:
+        per_page = min(per_page, HH_MAX_PER_PAGE)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        seen = set()
+        tasks: Dict[asyncio.Task, tuple] = {}
+
+        def schedule(query: str, area: int, page: int) -> None:
+            task = asyncio.create_task(self._fetch_page(semaphore, query, area, page, per_page))
+            tasks[task] = (query, area, page)
+
+        for query in queries:
+            for area in areas:
+                schedule(query, area, start_page)
+
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    query, area, page = tasks.pop(task)
+                    data = task.result()
+
+                    if page == start_page:
+                        # остальные страницы — только те, что реально есть у HH
+                        last_page = min(start_page + pages, data.get("pages", 0))
+                        for next_page in range(start_page + 1, last_page):
+                            schedule(query, area, next_page)
+
+                    batch = []
+                    for vacancy in data.get("items", []):
+                        if vacancy["id"] not in seen:
+                            seen.add(vacancy["id"])
+                            batch.append(vacancy)
+                    if batch:
+                        yield batch
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def harvest_all(self, *args, **kwargs) -> List[Dict]:
+        vacancies = []
+        async for batch in self.harvest(*args, **kwargs):
+            vacancies.extend(batch)
+        return vacancies
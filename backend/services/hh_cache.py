@@ -0,0 +1,211 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HH_CACHE_BACKEND = os.environ.get("HH_CACHE_BACKEND", "memory")  # memory | sqlite
+HH_CACHE_PATH = os.environ.get("HH_CACHE_PATH", "./hh_cache.db")
+HH_CACHE_SIZE = int(os.environ.get("HH_CACHE_SIZE", "10000"))
+
+# namespace -> (fresh_ttl, stale_ttl) в секундах.
+# В течение fresh_ttl ответ отдается из кэша, еще stale_ttl — отдается
+# устаревший ответ и параллельно запускается фоновое обновление.
+DEFAULT_TTLS: Dict[str, Tuple[float, float]] = {
+    "search": (300, 600),
+    "vacancy": (3600, 6 * 3600),
+}
+
+
+def normalize_params(params: Optional[Dict]) -> str:
+    """Ключ кэша: параметры в каноническом виде (порядок, регистр и пробелы в тексте не важны)"""
+    normalized = {}
+    for key, value in (params or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = " ".join(value.lower().split())
+        elif isinstance(value, (list, tuple)):
+            value = sorted(str(v) for v in value)
+        else:
+            value = str(value)
+        normalized[key] = value
+    return json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+
+
+class MemoryCacheBackend:
+    """LRU-кэш в памяти процесса"""
+    blocking = False
+
+    def __init__(self, max_entries: int = HH_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        entry = self._data.get(key)
+        if entry is not None:
+            self._data.move_to_end(key)
+        return entry
+
+    def set(self, key: str, value: Any, stored_at: float) -> None:
+        self._data[key] = (value, stored_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCacheBackend:
+    """LRU-кэш в файле SQLite, общий для всех воркеров на машине"""
+    blocking = True
+
+    def __init__(self, path: str = HH_CACHE_PATH, max_entries: int = HH_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS hh_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_hh_cache_accessed_at ON hh_cache (accessed_at)")
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, stored_at FROM hh_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE hh_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, stored_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO hh_cache (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), stored_at, time.time()),
+            )
+            overflow = self._conn.execute("SELECT COUNT(*) FROM hh_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM hh_cache WHERE key IN "
+                    "(SELECT key FROM hh_cache ORDER BY accessed_at LIMIT ?)", (overflow,)
+                )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM hh_cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM hh_cache")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM hh_cache").fetchone()[0]
+
+
+class HHCache:
+    """
+    Кэш ответов HH API: TTL по типу запроса, LRU-вытеснение в бэкенде,
+    single-flight (одинаковые одновременные запросы делят один вызов HH)
+    и stale-while-revalidate.
+    """
+
+    def __init__(self, backend=None, ttls: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.counters = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "refreshes": 0, "errors": 0}
+
+    async def _call(self, method: Callable, *args):
+        if self.backend.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def get_or_fetch(self, namespace: str, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        full_key = f"{namespace}:{key}"
+        fresh_ttl, stale_ttl = self.ttls.get(namespace, (60, 0))
+
+        entry = await self._call(self.backend.get, full_key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age < fresh_ttl:
+                self.counters["hits"] += 1
+                return value
+            if age < fresh_ttl + stale_ttl:
+                self.counters["stale_hits"] += 1
+                if full_key not in self._inflight:
+                    self.counters["refreshes"] += 1
+                    self._start_fetch(full_key, fetch)
+                return value
+
+        self.counters["misses"] += 1
+        return await self._single_flight(full_key, fetch)
+
+    def _start_fetch(self, full_key: str, fetch: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        task = asyncio.ensure_future(self._fetch_and_store(full_key, fetch))
+        self._inflight[full_key] = task
+        task.add_done_callback(lambda t: self._on_fetch_done(full_key, t))
+        return task
+
+    def _on_fetch_done(self, full_key: str, task: asyncio.Future) -> None:
+        self._inflight.pop(full_key, None)
+        if not task.cancelled() and task.exception() is not None:
+            self.counters["errors"] += 1
+            logger.debug(f"HH cache fetch failed for {full_key}: {task.exception()}")
+
+    async def _single_flight(self, full_key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(full_key)
+        if task is not None:
+            self.counters["coalesced"] += 1
+        else:
+            task = self._start_fetch(full_key, fetch)
+        # shield: отмена одного ожидающего запроса не отменяет общий вызов
+        return await asyncio.shield(task)
+
+    async def _fetch_and_store(self, full_key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        value = await fetch()
+        await self._call(self.backend.set, full_key, value, time.time())
+        return value
+
+    async def invalidate(self, namespace: str, key: str) -> None:
+        await self._call(self.backend.delete, f"{namespace}:{key}")
+
+    def stats(self) -> Dict:
+        lookups = self.counters["hits"] + self.counters["stale_hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_ratio": round((self.counters["hits"] + self.counters["stale_hits"]) / lookups, 3) if lookups else 0.0,
+            "size": len(self.backend),
+            "backend": type(self.backend).__name__,
+        }
+
+
+_hh_cache: Optional[HHCache] = None
+
+
+def get_hh_cache() -> HHCache:
+    global _hh_cache
+    if _hh_cache is None:
+        if HH_CACHE_BACKEND == "sqlite":
+            backend = SQLiteCacheBackend(HH_CACHE_PATH, HH_CACHE_SIZE)
+        else:
+            backend = MemoryCacheBackend(HH_CACHE_SIZE)
+        _hh_cache = HHCache(backend)
+    return _hh_cache
@@ -0,0 +1,133 @@
+import os
+import logging
+from typing import Dict, Optional
+
+import httpx
+
+from .hh_cache import HHCache, get_hh_cache, normalize_params
+from .rate_limiter import TokenBucketLimiter, get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+HH_API_URL = os.environ.get("HH_API_URL", "https://api.hh.ru")
+HH_USER_AGENT = os.environ.get("HH_USER_AGENT", "job-bot/1.0")
+MAX_RATE_LIMIT_RETRIES = 3
+
+
+class HHAPIError(Exception):
+    def __init__(self, status_code: int, detail: str = ""):
+        self.status_code = status_code
+        super().__init__(f"HH API error: {status_code} {detail}".strip())
+
+
+def _retry_after(response: httpx.Response, default: float = 5.0) -> float:
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", default)))
+    except ValueError:  # HTTP-date вместо секунд
+        return default
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401  (httpx[http2])
+        return True
+    except ImportError:
+        return False
+
+
+class HHClient:
+    """
+    Асинхронный клиент HH API с общим пулом keep-alive соединений.
+
+    Один экземпляр на процесс (см. get_hh_client), используется hh_parser,
+    services.enrichment и HeadHunterService.
+    """
+
+    def __init__(self,
+                 base_url: str = HH_API_URL,
+                 timeout: float = 10.0,
+                 connect_timeout: float = 3.0,
+                 max_connections: int = 20,
+                 max_keepalive_connections: int = 10,
+                 use_cache: bool = True,
+                 use_rate_limit: bool = True):
+        self.base_url = base_url.rstrip("/")
+        self._timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self.cache: Optional[HHCache] = get_hh_cache() if use_cache else None
+        self.limiter: Optional[TokenBucketLimiter] = get_rate_limiter() if use_rate_limit else None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Создаем лениво, внутри работающего event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self._timeout,
+                limits=self._limits,
+                http2=_http2_available(),  # HTTP/2 там, где сервер его поддерживает
+                headers={"User-Agent": HH_USER_AGENT},
+            )
+        return self._client
+
+    async def get(self, endpoint: str, params: Dict = None, timeout: float = None,
+                  bucket: str = "search") -> Dict:
+        """
+        GET-запрос к HH API через общий rate limiter (бакет bucket).
+        Таймаут можно переопределить для отдельного запроса.
+        """
+        request_timeout = httpx.Timeout(timeout) if timeout is not None else self._timeout
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            if self.limiter is not None:
+                await self.limiter.acquire(bucket)
+            try:
+                response = await self.client.get(endpoint, params=params, timeout=request_timeout)
+            except httpx.TimeoutException as e:
+                raise HHAPIError(504, "timeout") from e
+            except httpx.HTTPError as e:
+                raise HHAPIError(502, str(e)) from e
+
+            if response.status_code == 429 and self.limiter is not None and attempt < MAX_RATE_LIMIT_RETRIES:
+                await self.limiter.penalize(bucket, _retry_after(response))
+                continue
+            if response.status_code != 200:
+                raise HHAPIError(response.status_code)
+            return response.json()
+
+    async def search_vacancies(self, params: Dict) -> Dict:
+        if self.cache is None:
+            return await self.get("/vacancies", params, bucket="search")
+        return await self.cache.get_or_fetch(
+            "search", normalize_params(params), lambda: self.get("/vacancies", params, bucket="search")
+        )
+
+    async def get_vacancy(self, vacancy_id: str) -> Dict:
+        if self.cache is None:
+            return await self.get(f"/vacancies/{vacancy_id}", bucket="detail")
+        return await self.cache.get_or_fetch(
+            "vacancy", str(vacancy_id), lambda: self.get(f"/vacancies/{vacancy_id}", bucket="detail")
+        )
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_hh_client: Optional[HHClient] = None
+
+
+def get_hh_client() -> HHClient:
+    global _hh_client
+    if _hh_client is None:
+        _hh_client = HHClient()
+    return _hh_client
+
+
+async def close_hh_client() -> None:
+    if _hh_client is not None:
+        await _hh_client.aclose()
@@ -1,33 +1,17 @@
-import requests
 from typing import List, Dict, Optional
-import time
 from datetime import datetime, timedelta
+from .hh_client import HHClient, get_hh_client
 
 class HeadHunterService:
-    BASE_URL = "https://api.hh.ru"
-    
-    def __init__(self):
-        self.session = requests.Session()
-        self.last_request_time = 0
-        self.request_delay = 0.2  # Rate limiting
+    def __init__(self, client: Optional[HHClient] = None):
+        # Общий пул соединений; rate limit общий для всех экземпляров и процессов
+        self.client = client or get_hh_client()
         
-    def _make_request(self, endpoint: str, params: Dict = None) -> Dict:
+    async def _make_request(self, endpoint: str, params: Dict = None, bucket: str = "search") -> Dict:
         """Rate-limited requests to HH API"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        
-        if time_since_last < self.request_delay:
-            time.sleep(self.request_delay - time_since_last)
-            
-        response = self.session.get(f"{self.BASE_URL}{endpoint}", params=params)
-        self.last_request_time = time.time()
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"HH API error: {response.status_code}")
+        return await self.client.get(endpoint, params, bucket=bucket)
     
-    def search_vacancies(self, query: str, page: int = 0, area: int = 1) -> List[Dict]:
+    async def search_vacancies(self, query: str, page: int = 0, area: int = 1) -> List[Dict]:
         """Search vacancies with enhanced parameters"""
         params = {
             "text": query,
@@ -39,12 +23,12 @@ class HeadHunterService:
             "search_field": ["name", "company_name", "description"]
         }
         
-        data = self._make_request("/vacancies", params)
+        data = await self.client.search_vacancies(params)  # через кэш
         return data.get("items", [])
     
-    def get_vacancy_details(self, vacancy_id: str) -> Dict:
+    async def get_vacancy_details(self, vacancy_id: str) -> Dict:
         """Get detailed vacancy information"""
-        return self._make_request(f"/vacancies/{vacancy_id}")
+        return await self.client.get_vacancy(vacancy_id)  # через кэш
     
     def apply_to_vacancy(self, vacancy_id: str, resume_id: str, cover_letter: str) -> bool:
         """Apply to vacancy (requires authorization)"""
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_DB = os.environ.get("HH_RATE_LIMIT_DB", "./hh_rate_limit.db")
+
+
+@dataclass(frozen=True)
+class BucketConfig:
+    rate: float       # токенов в секунду
+    capacity: float   # максимальный всплеск
+
+
+# Интервал между откликами одного резюме: по нему очередь (services.application_queue)
+# ставит scheduled_at, а бакет "apply" не дает отправлять чаще. 0 — без паузы
+APPLY_INTERVAL_SECONDS = int(os.environ.get("APPLY_INTERVAL_SECONDS", "300"))
+
+# Отдельные бакеты для поиска, деталей вакансии и откликов. Имя вида
+# "apply:<resume_id>" — свой бакет с настройками "apply" для каждого резюме
+DEFAULT_BUCKETS: Dict[str, BucketConfig] = {
+    "search": BucketConfig(rate=5.0, capacity=10),
+    "detail": BucketConfig(rate=5.0, capacity=10),
+    "apply": BucketConfig(rate=1 / APPLY_INTERVAL_SECONDS if APPLY_INTERVAL_SECONDS > 0 else 1000.0, capacity=1),
+}
+
+# После 429 скорость бакета снижается вдвое и линейно восстанавливается
+MIN_RATE_FACTOR = 0.1
+RATE_RECOVERY_PER_SEC = 0.01
+
+
+class WaitStats:
+    """Задержки ожидания токена в текущем процессе"""
+
+    def __init__(self, window: int = 1000):
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._recent = deque(maxlen=window)
+
+    def record(self, wait: float) -> None:
+        self.acquired += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self._recent.append(wait)
+
+    def snapshot(self) -> Dict:
+        recent = sorted(self._recent)
+
+        def percentile(p: float) -> float:
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))], 4) if recent else 0.0
+
+        return {
+            "acquired": self.acquired,
+            "avg_wait": round(self.total_wait / self.acquired, 4) if self.acquired else 0.0,
+            "p50_wait": percentile(0.5),
+            "p95_wait": percentile(0.95),
+            "max_wait": round(self.max_wait, 4),
+        }
+
+
+class TokenBucketLimiter:
+    """
+    Асинхронный token bucket, общий для всех экземпляров сервиса и всех
+    процессов: состояние бакетов хранится в SQLite, изменение — в одной
+    транзакции BEGIN IMMEDIATE. Ожидание токена не блокирует event loop.
+    """
+
+    def __init__(self, path: str = RATE_LIMIT_DB, buckets: Optional[Dict[str, BucketConfig]] = None):
+        self.buckets = {**DEFAULT_BUCKETS, **(buckets or {})}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_buckets ("
+            " name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL,"
+            " blocked_until REAL NOT NULL DEFAULT 0, rate_factor REAL NOT NULL DEFAULT 1)"
+        )
+        self.wait_stats: Dict[str, WaitStats] = {name: WaitStats() for name in self.buckets}
+
+    @staticmethod
+    def _kind(name: str) -> str:
+        return name.split(":", 1)[0]
+
+    def _config(self, name: str) -> BucketConfig:
+        return self.buckets[name] if name in self.buckets else self.buckets[self._kind(name)]
+
+    def _load(self, name: str, now: float):
+        row = self._conn.execute(
+            "SELECT tokens, updated_at, blocked_until, rate_factor FROM rate_buckets WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            return self._config(name).capacity, now, 0.0, 1.0
+        return row
+
+    def _save(self, name: str, tokens: float, now: float, blocked_until: float, rate_factor: float) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO rate_buckets (name, tokens, updated_at, blocked_until, rate_factor)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (name, tokens, now, blocked_until, rate_factor),
+        )
+
+    def _try_take(self, name: str) -> float:
+        """Берет токен; возвращает 0 при успехе или сколько секунд подождать"""
+        config = self._config(name)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                tokens, updated_at, blocked_until, rate_factor = self._load(name, now)
+                elapsed = max(0.0, now - updated_at)
+                rate_factor = min(1.0, rate_factor + elapsed * RATE_RECOVERY_PER_SEC)
+                rate = config.rate * rate_factor
+                tokens = min(config.capacity, tokens + elapsed * rate)
+
+                if now < blocked_until:
+                    wait = blocked_until - now
+                elif tokens >= 1:
+                    tokens -= 1
+                    wait = 0.0
+                else:
+                    wait = (1 - tokens) / rate
+
+                self._save(name, tokens, now, blocked_until, rate_factor)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    async def acquire(self, name: str) -> float:
+        """Ждет токен бакета name; возвращает время ожидания в секундах"""
+        started = time.monotonic()
+        while True:
+            wait = await asyncio.to_thread(self._try_take, name)
+            if wait <= 0:
+                break
+            # другой процесс может забрать токен раньше, поэтому перепроверяем
+            await asyncio.sleep(min(wait, 5.0))
+        waited = time.monotonic() - started
+        self.wait_stats[self._kind(name)].record(waited)
+        return waited
+
+    def _penalize(self, name: str, retry_after: float) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                tokens, updated_at, blocked_until, rate_factor = self._load(name, now)
+                self._save(name, 0.0, now, max(blocked_until, now + retry_after),
+                           max(MIN_RATE_FACTOR, rate_factor / 2))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    async def penalize(self, name: str, retry_after: float) -> None:
+        """HH ответил 429: блокируем бакет на Retry-After и снижаем его скорость"""
+        logger.warning(f"HH rate limit hit on '{name}', backing off for {retry_after:.1f}s")
+        await asyncio.to_thread(self._penalize, name, retry_after)
+
+    def stats(self) -> Dict:
+        return {name: stats.snapshot() for name, stats in self.wait_stats.items()}
+
+
+_limiter: Optional[TokenBucketLimiter] = None
+
+
+def get_rate_limiter() -> TokenBucketLimiter:
+    global _limiter
+    if _limiter is None:
+        _limiter = TokenBucketLimiter()
+    return _limiter
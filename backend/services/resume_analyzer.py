@@ -3,6 +3,8 @@ import spacy
 from typing import Dict, List
 import json
 
+from skills import get_skill_extractor
+
 class ResumeAnalyzer:
     def __init__(self):
         # Для продакшена лучше использовать spaCy
@@ -12,17 +14,8 @@ class ResumeAnalyzer:
     def analyze_resume(self, text: str) -> Dict:
         """Extract structured information from resume"""
         
-        # Extract skills (простая версия)
-        skills_patterns = [
-            r'(?i)(python|javascript|react|typescript|fastapi|django|flask|sql|postgresql|mongodb|docker|kubernetes|aws|git)',
-            r'(?i)(java|c\+\+|c#|php|ruby|go|rust|scala|kotlin)',
-            r'(?i)(html|css|scss|sass|bootstrap|tailwind|vue|angular|node\.js|express)',
-        ]
-        
-        skills = set()
-        for pattern in skills_patterns:
-            matches = re.findall(pattern, text)
-            skills.update([m.lower() for m in matches])
+        # Extract skills: общая таксономия навыков (skills.py)
+        skills = get_skill_extractor().extract(text)
         
         # Extract experience years
         exp_patterns = [
@@ -42,7 +35,7 @@ class ResumeAnalyzer:
         phone_match = re.search(r'(?:\+7|8)[\s\-\(]?\d{3}[\s\-\)]?\d{3}[\s\-]?\d{2}[\s\-]?\d{2}', text)
         
         return {
-            "skills": list(skills),
+            "skills": skills,
             "experience_years": experience_years,
             "email": email_match.group() if email_match else None,
             "phone": phone_match.group() if phone_match else None,
@@ -0,0 +1,191 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from models.database import SessionLocal, Resume
+from matcher import vacancy_index, vectorize_resume
+from vacancy_index import deserialize_vector, serialize_vector
+from resume_sections import ParsedResume
+
+logger = logging.getLogger(__name__)
+
+RESUME_CACHE_SIZE = int(os.environ.get("RESUME_CACHE_SIZE", "256"))
+RESUME_CACHE_TTL = 300                       # секунд: чтобы увидеть удаление в другом воркере
+RESUME_MAX_STORED = int(os.environ.get("RESUME_MAX_STORED", "10000"))
+RESUME_MAX_AGE = timedelta(days=int(os.environ.get("RESUME_MAX_AGE_DAYS", "90")))
+TOUCH_INTERVAL = timedelta(hours=1)          # как часто обновлять last_accessed_at
+EVICT_EVERY = 100                            # запускать вытеснение каждые N загрузок
+
+
+def _timestamp(value: datetime) -> float:
+    # в БД хранится naive UTC (datetime.utcnow)
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class ResumeStore:
+    """
+    Хранилище резюме в таблице Resume, общее для всех воркеров,
+    с read-through LRU в памяти процесса. Вместе с текстом и анализом хранится
+    вектор резюме, поэтому матчинг не парсит и не векторизует известное резюме.
+    """
+
+    def __init__(self, cache_size: int = RESUME_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[int, tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts = 0
+
+    def _remember(self, resume_id: int, data: Dict) -> None:
+        with self._lock:
+            self._cache[resume_id] = (time.time(), data)
+            self._cache.move_to_end(resume_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _forget(self, resume_id: int) -> None:
+        with self._lock:
+            self._cache.pop(resume_id, None)
+
+    @staticmethod
+    def _to_dict(resume: Resume) -> Dict:
+        vector = deserialize_vector(resume.vector) if resume.vector else None
+        if vector is None or vector.shape[1] != vacancy_index.n_features:
+            # вектор посчитан другой версией векторизатора
+            vector = vectorize_resume(resume.content or "")
+        analysis = json.loads(resume.analysis) if resume.analysis else {}
+        return {
+            "text": resume.content,
+            "analysis": analysis,
+            # разметка секций хранится в анализе — текст повторно не размечается
+            "parsed": ParsedResume.from_outline(resume.content or "", analysis.get("sections")),
+            "uploaded_at": _timestamp(resume.uploaded_at),
+            "filename": resume.filename,
+            "vector": vector,
+        }
+
+    def get(self, resume_id: int) -> Optional[Dict]:
+        with self._lock:
+            cached = self._cache.get(resume_id)
+            if cached and time.time() - cached[0] < RESUME_CACHE_TTL:
+                self._cache.move_to_end(resume_id)
+                return cached[1]
+
+        db = SessionLocal()
+        try:
+            resume = db.get(Resume, resume_id)
+            if resume is None:
+                self._forget(resume_id)
+                return None
+            now = datetime.utcnow()
+            if resume.last_accessed_at is None or now - resume.last_accessed_at > TOUCH_INTERVAL:
+                resume.last_accessed_at = now
+                db.commit()
+            data = self._to_dict(resume)
+        finally:
+            db.close()
+
+        self._remember(resume_id, data)
+        return data
+
+    def find_by_hash(self, content_hash: str) -> Optional[int]:
+        """id уже сохраненного резюме с тем же sha256 исходного файла"""
+        db = SessionLocal()
+        try:
+            row = db.query(Resume.id).filter(Resume.content_hash == content_hash).first()
+            return row.id if row else None
+        finally:
+            db.close()
+
+    def put(self, text: str, analysis: Dict, filename: str, content_hash: Optional[str] = None) -> int:
+        """Сохраняет резюме и возвращает его id; повторный файл (тот же хэш) не дублируется"""
+        vector = vectorize_resume(text)
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            resume = Resume(
+                filename=filename,
+                content=text,
+                skills=json.dumps(analysis.get("skills", []), ensure_ascii=False),
+                experience_years=analysis.get("experience_years"),
+                analysis=json.dumps(analysis, ensure_ascii=False),
+                vector=serialize_vector(vector),
+                content_hash=content_hash,
+                uploaded_at=now,
+                last_accessed_at=now,
+            )
+            db.add(resume)
+            try:
+                db.commit()
+            except IntegrityError:
+                # тот же файл параллельно сохранил другой воркер
+                db.rollback()
+                existing = self.find_by_hash(content_hash)
+                if existing is None:
+                    raise
+                return existing
+            resume_id = resume.id
+        finally:
+            db.close()
+
+        data = {"text": text, "analysis": analysis,
+                "parsed": ParsedResume.from_outline(text, analysis.get("sections")),
+                "uploaded_at": _timestamp(now), "filename": filename, "vector": vector}
+        self._remember(resume_id, data)
+
+        self._puts += 1
+        if self._puts % EVICT_EVERY == 0:
+            self.evict()
+        return resume_id
+
+    def delete(self, resume_id: int) -> bool:
+        self._forget(resume_id)
+        db = SessionLocal()
+        try:
+            deleted = db.query(Resume).filter(Resume.id == resume_id).delete()
+            db.commit()
+            return bool(deleted)
+        finally:
+            db.close()
+
+    def list(self) -> List[Dict]:
+        db = SessionLocal()
+        try:
+            rows = db.query(Resume.id, Resume.filename, Resume.uploaded_at, Resume.skills,
+                            Resume.experience_years).order_by(Resume.uploaded_at.desc()).all()
+        finally:
+            db.close()
+        return [{
+            "resume_id": row.id,
+            "filename": row.filename,
+            "uploaded_at": _timestamp(row.uploaded_at),
+            "skills_count": len(json.loads(row.skills)) if row.skills else 0,
+            "experience_years": row.experience_years or 0,
+        } for row in rows]
+
+    def evict(self, max_stored: int = RESUME_MAX_STORED, max_age: timedelta = RESUME_MAX_AGE) -> int:
+        """Удаляет резюме, к которым давно не обращались, и самые старые сверх лимита"""
+        db = SessionLocal()
+        try:
+            deleted = db.query(Resume).filter(Resume.last_accessed_at < datetime.utcnow() - max_age).delete()
+            overflow = db.query(Resume).count() - max_stored
+            if overflow > 0:
+                oldest = [row.id for row in db.query(Resume.id).order_by(Resume.last_accessed_at).limit(overflow)]
+                deleted += db.query(Resume).filter(Resume.id.in_(oldest)).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+        if deleted:
+            logger.info(f"Evicted {deleted} stale resumes")
+            with self._lock:
+                self._cache.clear()
+        return deleted
+
+
+resume_store = ResumeStore()
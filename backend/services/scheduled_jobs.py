@@ -0,0 +1,65 @@
+"""
+Периодические задачи API при нескольких воркерах uvicorn.
+
+Цикл задачи (digest_loop, stats_loop) запускается в каждом процессе, но
+выполняет задачу только тот, кто взял аренду строки scheduled_jobs: условный
+UPDATE проходит, если задачу никто не выполняет и с прошлого запуска прошел
+интервал. Упавший процесс не держит задачу дольше interval.
+"""
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models.database import SessionLocal, ScheduledJob
+
+logger = logging.getLogger(__name__)
+
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}"
+EARLY_START = 0.1  # доля интервала: циклы процессов просыпаются не одновременно
+
+
+def claim_run(name: str, interval: timedelta, holder: str = PROCESS_ID) -> bool:
+    """True — задача наша: ее никто не выполняет и она не запускалась последние ~interval"""
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        db.execute(sqlite_insert(ScheduledJob.__table__).values(name=name).on_conflict_do_nothing())
+        updated = db.query(ScheduledJob).filter(
+            ScheduledJob.name == name,
+            or_(ScheduledJob.locked_until.is_(None), ScheduledJob.locked_until < now),
+            or_(ScheduledJob.last_run_at.is_(None),
+                ScheduledJob.last_run_at <= now - interval * (1 - EARLY_START)),
+        ).update({"holder": holder, "locked_until": now + interval, "last_run_at": now},
+                 synchronize_session=False)
+        db.commit()
+        return bool(updated)
+    finally:
+        db.close()
+
+
+def finish_run(name: str, holder: str = PROCESS_ID) -> None:
+    db = SessionLocal()
+    try:
+        db.query(ScheduledJob).filter(ScheduledJob.name == name, ScheduledJob.holder == holder).update(
+            {"holder": None, "locked_until": None}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def run_exclusive(name: str, interval: timedelta, job: Callable[[], object]) -> bool:
+    """Выполняет job в потоке, если задача досталась этому процессу; False — ее выполняет или выполнил другой"""
+    if not await asyncio.to_thread(claim_run, name, interval):
+        logger.debug(f"Scheduled job {name} skipped: taken by another process")
+        return False
+    try:
+        await asyncio.to_thread(job)
+    finally:
+        await asyncio.to_thread(finish_run, name)
+    return True
@@ -0,0 +1,268 @@
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import AbstractSet, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, case, func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models.database import SessionLocal, Vacancy, VacancyScore, VacancySearchHit
+from matcher import vacancy_text
+from vacancy_filters import VacancyFilter, experience_min_years, normalize_salary
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+# Поля, которые обновляются при повторной загрузке вакансии из поиска.
+# description не трогаем: в поиске есть только snippet.
+VACANCY_UPDATE_COLUMNS = ["name", "company", "salary_from", "salary_to", "salary_currency",
+                          "experience_required", "hh_url", "raw", "fetched_at",
+                          "area_id", "hh_created_at", "published_at",
+                          "salary_min_rub", "salary_max_rub", "experience_min_years"]
+
+
+def parse_hh_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Время HH («2025-07-01T10:00:00+0300») в naive UTC, как остальные даты в БД"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _chunks(rows: List[Dict], size: int = BATCH_SIZE) -> Iterable[List[Dict]]:
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def vacancy_row(item: Dict, fetched_at: datetime) -> Dict:
+    salary = item.get("salary") or {}
+    salary_min_rub, salary_max_rub = normalize_salary(salary)
+    return {
+        "id": str(item["id"]),
+        "name": item.get("name"),
+        "company": (item.get("employer") or {}).get("name"),
+        "salary_from": salary.get("from"),
+        "salary_to": salary.get("to"),
+        "salary_currency": salary.get("currency"),
+        "experience_required": (item.get("experience") or {}).get("id"),
+        "hh_url": item.get("alternate_url"),
+        "raw": json.dumps(item, ensure_ascii=False),
+        "fetched_at": fetched_at,
+        "area_id": (item.get("area") or {}).get("id"),
+        "hh_created_at": parse_hh_datetime(item.get("created_at")),
+        "published_at": parse_hh_datetime(item.get("published_at")),
+        "first_seen_at": fetched_at,
+        "reposts": 0,
+        "salary_min_rub": salary_min_rub,
+        "salary_max_rub": salary_max_rub,
+        "experience_min_years": experience_min_years(item.get("experience")),
+    }
+
+
+def upsert_vacancies(db: Session, items: List[Dict], query_key: Optional[str] = None) -> int:
+    """
+    Bulk upsert результатов поиска HH: один скомпилированный
+    INSERT ... ON CONFLICT DO UPDATE, выполняемый через executemany на пачку.
+    """
+    now = datetime.utcnow()
+    rows = [vacancy_row(item, now) for item in items]
+    stmt = sqlite_insert(Vacancy.__table__)
+    table = Vacancy.__table__
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={
+            **{column: stmt.excluded[column] for column in VACANCY_UPDATE_COLUMNS},
+            # SET видит старые значения строки: сравниваем с прежним published_at
+            "reposts": func.coalesce(table.c.reposts, 0) + case(
+                (stmt.excluded.published_at > table.c.published_at, 1), else_=0),
+        },
+    )
+    for batch in _chunks(rows):
+        db.execute(stmt, batch)
+
+    if query_key is not None:
+        hits = [{"query_key": query_key, "vacancy_id": row["id"], "seen_at": now} for row in rows]
+        stmt = sqlite_insert(VacancySearchHit.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["query_key", "vacancy_id"], set_={"seen_at": stmt.excluded.seen_at}
+        )
+        for batch in _chunks(hits):
+            db.execute(stmt, batch)
+
+    db.commit()
+    return len(rows)
+
+
+def _upsert_score_rows(db: Session, rows: List[Dict]) -> int:
+    stmt = sqlite_insert(VacancyScore.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["resume_id", "vacancy_id"],
+        set_={"score": stmt.excluded.score, "computed_at": stmt.excluded.computed_at,
+              "scored_on": stmt.excluded.scored_on},
+    )
+    for batch in _chunks(rows):
+        db.execute(stmt, batch)
+    db.commit()
+    return len(rows)
+
+
+def _score_row(resume_id: int, vacancy_id: str, score: float, now: datetime, described: AbstractSet[str]) -> Dict:
+    vacancy_id = str(vacancy_id)
+    return {"resume_id": resume_id, "vacancy_id": vacancy_id, "score": float(score), "computed_at": now,
+            "scored_on": "description" if vacancy_id in described else "snippet"}
+
+
+def upsert_scores(db: Session, resume_id: int, scores: Iterable[Tuple[str, float]],
+                  described: AbstractSet[str] = frozenset()) -> int:
+    """described — id вакансий, оцененных по полному описанию"""
+    now = datetime.utcnow()
+    return _upsert_score_rows(db, [_score_row(resume_id, v, s, now, described) for v, s in scores])
+
+
+def upsert_score_lists(db: Session, results: Iterable[Tuple[int, Iterable[Tuple[str, float]]]],
+                       described: AbstractSet[str] = frozenset()) -> int:
+    """Оценки нескольких резюме одной транзакцией: (resume_id, [(vacancy_id, score), ...])"""
+    now = datetime.utcnow()
+    return _upsert_score_rows(db, [_score_row(resume_id, v, s, now, described)
+                                   for resume_id, scores in results for v, s in scores])
+
+
+def load_fresh_matches(db: Session, resume_id: int, query_key: str, max_age: timedelta,
+                       vacancy_filter: Optional[VacancyFilter] = None) -> Optional[List[Tuple[Dict, float, str]]]:
+    """
+    Вакансии запроса с оценками для резюме (вакансия, score, scored_on), если
+    данные достаточно свежие. None — если поиск давно не выполнялся или для
+    резюме посчитаны не все оценки. vacancy_filter отбрасывает вакансии
+    до проверки оценок: оценки нужны только прошедшим фильтр.
+    """
+    cutoff = datetime.utcnow() - max_age
+    rows = db.execute(
+        select(Vacancy.raw, VacancyScore.score, VacancyScore.scored_on)
+        .join(VacancySearchHit, VacancySearchHit.vacancy_id == Vacancy.id)
+        .outerjoin(VacancyScore, (VacancyScore.vacancy_id == Vacancy.id) & (VacancyScore.resume_id == resume_id))
+        .where(VacancySearchHit.query_key == query_key, VacancySearchHit.seen_at >= cutoff,
+               *(vacancy_filter.conditions() if vacancy_filter else ()))
+    ).all()
+    if not rows and vacancy_filter is not None and vacancy_filter.active:
+        # поиск свежий, но фильтр отбросил все вакансии — это ответ, а не повод идти в HH
+        fresh = db.query(VacancySearchHit.vacancy_id).filter(
+            VacancySearchHit.query_key == query_key, VacancySearchHit.seen_at >= cutoff).first()
+        return [] if fresh is not None else None
+    if not rows or any(score is None or raw is None for raw, score, _ in rows):
+        return None
+    return [(json.loads(raw), score, scored_on) for raw, score, scored_on in rows]
+
+
+def save_search_results(query_key: str, vacancies: List[Dict], resume_id: int,
+                        scores: List[Tuple[str, float]], described: AbstractSet[str] = frozenset()) -> None:
+    db = SessionLocal()
+    try:
+        upsert_vacancies(db, vacancies, query_key)
+        upsert_scores(db, resume_id, scores, described)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to persist search results: {e}")
+    finally:
+        db.close()
+
+
+def get_fresh_matches(resume_id: int, query_key: str, max_age: timedelta,
+                      vacancy_filter: Optional[VacancyFilter] = None) -> Optional[List[Tuple[Dict, float, str]]]:
+    db = SessionLocal()
+    try:
+        return load_fresh_matches(db, resume_id, query_key, max_age, vacancy_filter)
+    finally:
+        db.close()
+
+
+def load_vacancy_texts(since: datetime) -> List[Tuple[str, str]]:
+    """(id, текст для матчинга) вакансий, полученных с HH не раньше since; с описанием, если оно загружено"""
+    db = SessionLocal()
+    try:
+        rows = (db.query(Vacancy.id, Vacancy.name, Vacancy.raw, Vacancy.description)
+                .filter(Vacancy.fetched_at >= since).all())
+    finally:
+        db.close()
+    return [(row.id, vacancy_text(json.loads(row.raw), row.description) if row.raw
+             else " ".join(filter(None, [row.name, row.description])))
+            for row in rows]
+
+
+def load_descriptions(vacancy_ids: Iterable[str]) -> Dict[str, str]:
+    """Загруженные полные описания вакансий: {id: текст}"""
+    vacancy_ids = [str(v) for v in vacancy_ids]
+    db = SessionLocal()
+    try:
+        descriptions = {}
+        for batch in _chunks(vacancy_ids):
+            descriptions.update(db.query(Vacancy.id, Vacancy.description)
+                                .filter(Vacancy.id.in_(batch), Vacancy.description.isnot(None)).all())
+        return descriptions
+    finally:
+        db.close()
+
+
+def filter_unenriched(vacancy_ids: Iterable[str]) -> List[str]:
+    """
+    Сохраненные вакансии, для которых полное описание еще не запрашивалось;
+    id без строки в vacancies отбрасываются — описание для них некуда записать
+    """
+    vacancy_ids = [str(v) for v in vacancy_ids]
+    db = SessionLocal()
+    try:
+        pending = set()
+        for batch in _chunks(vacancy_ids):
+            pending.update(vacancy_id for (vacancy_id,) in db.query(Vacancy.id)
+                           .filter(Vacancy.id.in_(batch), Vacancy.enriched_at.is_(None)))
+    finally:
+        db.close()
+    return [v for v in vacancy_ids if v in pending]
+
+
+def save_descriptions(descriptions: Dict[str, Optional[str]]) -> Set[str]:
+    """
+    Сохраняет описания (None — вакансия недоступна) и отмечает вакансии как обработанные;
+    возвращает id, для которых строка нашлась и описание записано
+    """
+    now = datetime.utcnow()
+    stmt = (update(Vacancy.__table__)
+            .where(Vacancy.__table__.c.id == bindparam("vacancy_id"))
+            .values(description=bindparam("description"), enriched_at=bindparam("enriched_at")))
+    db = SessionLocal()
+    try:
+        saved = set()
+        for batch in _chunks(list(descriptions)):
+            saved.update(vacancy_id for (vacancy_id,) in db.query(Vacancy.id).filter(Vacancy.id.in_(batch)))
+        rows = [{"vacancy_id": v, "description": descriptions[v], "enriched_at": now} for v in saved]
+        for batch in _chunks(rows):
+            db.execute(stmt, batch)
+        db.commit()
+    finally:
+        db.close()
+    return saved
+
+
+def load_vacancies(vacancy_ids: List[str]) -> Dict[str, Dict]:
+    """Сохраненные ответы HH по id вакансий"""
+    db = SessionLocal()
+    try:
+        rows = db.query(Vacancy.id, Vacancy.raw).filter(Vacancy.id.in_(vacancy_ids), Vacancy.raw.isnot(None)).all()
+    finally:
+        db.close()
+    return {row.id: json.loads(row.raw) for row in rows}
+
+
+def filter_vacancy_ids(vacancy_filter: VacancyFilter) -> List[str]:
+    """id сохраненных вакансий, прошедших фильтр (по индексам колонок зарплаты и опыта)"""
+    db = SessionLocal()
+    try:
+        return [v for (v,) in db.query(Vacancy.id).filter(*vacancy_filter.conditions())]
+    finally:
+        db.close()
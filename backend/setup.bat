@@ -19,7 +19,10 @@ if errorlevel 1 (
 
 echo [*] Installing dependencies...
 pip install --upgrade pip
-pip install fastapi uvicorn pdfplumber scikit-learn numpy requests python-multipart
+pip install -r requirements.txt
+
+echo [*] Downloading NLP resources...
+python nlp_resources.py --download
 
 echo [*] Starting FastAPI server...
 python -m uvicorn main:app --reload --workers 1
@@ -0,0 +1,102 @@
+"""
+Извлечение навыков из текста по таксономии data/skills.json.
+
+Все синонимы навыков компилируются в одно регулярное выражение в виде
+префиксного дерева, поэтому документ просматривается за один проход,
+а не отдельным regex на каждый навык.
+"""
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional
+
+SKILLS_TAXONOMY_PATH = os.environ.get(
+    "SKILLS_TAXONOMY_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "skills.json")
+)
+
+CYRILLIC_RE = re.compile(r'[а-яё]')
+# Падежные окончания для русских написаний: «питоне», «докером», «микросервисов»
+CYRILLIC_ENDINGS = r'(?:ами|ах|ов|ом|ой|ей|а|у|е|ы|и)?'
+# Границы навыка: \b не работает для «c#», «c++», поэтому + и # считаются частью слова
+SKILL_BOUNDARY_BEFORE = r'(?<![\w+#])'
+SKILL_BOUNDARY_AFTER = r'(?![\w+#])'
+
+
+def _normalize_alias(alias: str) -> str:
+    return " ".join(alias.lower().split())
+
+
+def _trie_pattern(aliases: Iterable[str]) -> str:
+    """Регулярное выражение-дерево: общие префиксы синонимов проверяются один раз"""
+    trie: Dict = {}
+    for alias in aliases:
+        node = trie
+        for char in alias:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        is_end = "" in node
+        branches = [(r'\s+' if char == " " else re.escape(char)) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not is_end:
+            return branches[0]
+        # жадный «?» предпочитает самый длинный синоним, при неудаче на границе — откат к короткому
+        return "(?:" + "|".join(branches) + ")" + ("?" if is_end else "")
+
+    return build(trie)
+
+
+class SkillExtractor:
+    """
+    Таксономия: {категория: {каноническое название: [синонимы]}}.
+    Возвращает канонические названия навыков в порядке первого упоминания.
+    """
+
+    def __init__(self, taxonomy: Optional[Dict[str, Dict[str, List[str]]]] = None):
+        if taxonomy is None:
+            with open(SKILLS_TAXONOMY_PATH, encoding="utf-8") as f:
+                taxonomy = json.load(f)
+
+        self.categories: Dict[str, str] = {}
+        self._aliases: Dict[str, str] = {}
+        for category, skills in taxonomy.items():
+            for name, aliases in skills.items():
+                self.categories[name] = category
+                for alias in [name, *aliases]:
+                    self._aliases.setdefault(_normalize_alias(alias), name)
+
+        latin = [alias for alias in self._aliases if not CYRILLIC_RE.search(alias)]
+        cyrillic = [alias for alias in self._aliases if CYRILLIC_RE.search(alias)]
+        self.pattern = re.compile(
+            SKILL_BOUNDARY_BEFORE
+            + f"(?:({_trie_pattern(latin)})|({_trie_pattern(cyrillic)}){CYRILLIC_ENDINGS})"
+            + SKILL_BOUNDARY_AFTER
+        )
+
+    def canonical(self, name: str) -> Optional[str]:
+        """Каноническое название для синонима («nodejs» → «Node.js») или None"""
+        return self._aliases.get(_normalize_alias(name))
+
+    def extract(self, text: str) -> List[str]:
+        found: Dict[str, None] = {}
+        for match in self.pattern.finditer(text.lower()):
+            alias = match.group(1) or match.group(2)
+            found[self._aliases[_normalize_alias(alias)]] = None
+        return list(found)
+
+    def extract_batch(self, texts: Iterable[str]) -> List[List[str]]:
+        return [self.extract(text) for text in texts]
+
+
+_extractor: Optional[SkillExtractor] = None
+
+
+def get_skill_extractor() -> SkillExtractor:
+    """Общий для процесса экстрактор (таксономия компилируется один раз)"""
+    global _extractor
+    if _extractor is None:
+        _extractor = SkillExtractor()
+    return _extractor
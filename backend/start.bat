@@ -4,11 +4,9 @@ setlocal
 REM Путь к виртуальному окружению
 call ..\.venv\Scripts\activate.bat
 
-REM Установка зависимостей, если надо
-pip show fastapi >nul 2>&1 || (
-    echo [INFO] Устанавливаю зависимости...
-    pip install fastapi uvicorn pymorphy2 nltk scikit-learn pdfplumber
-)
+REM Установка недостающих зависимостей (уже установленные pip пропускает)
+echo [INFO] Проверяю зависимости...
+pip install -q -r requirements.txt
 
 REM Запуск FastAPI сервера
 echo [INFO] Запуск FastAPI...
@@ -0,0 +1,109 @@
+"""
+Извлечение текста из резюме: PDF (PyMuPDF, при необходимости pdfplumber),
+DOCX и обычный текст.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+PARALLEL_PAGE_THRESHOLD = 64   # с какого числа страниц PDF разбирается параллельно
+EXTRACTION_PAGE_WORKERS = int(os.environ.get("EXTRACTION_PAGE_WORKERS", "0")) or (os.cpu_count() or 1)
+MIN_CHARS_PER_PAGE = 30        # меньше — вероятно, fitz не справился с разметкой
+MAX_BAD_CHAR_RATIO = 0.05      # доля нераспознанных символов (U+FFFD)
+
+TEXT_ENCODINGS = ("utf-8", "cp1251")
+
+
+def _fitz_page_range(path: str, start: int, stop: int) -> List[str]:
+    import fitz  # PyMuPDF
+
+    with fitz.open(path) as doc:
+        return [doc[i].get_text() for i in range(start, stop)]
+
+
+def _extract_fitz(path: str, workers: Optional[int] = None) -> tuple[str, int]:
+    import fitz
+
+    workers = workers or EXTRACTION_PAGE_WORKERS
+    with fitz.open(path) as doc:
+        page_count = doc.page_count
+        if page_count < PARALLEL_PAGE_THRESHOLD or workers <= 1:
+            pages = [page.get_text() for page in doc]
+            return "\n".join(pages), page_count
+
+    # Большой документ: страницы делятся на непрерывные диапазоны по числу процессов
+    # (PyMuPDF не потокобезопасен, каждый процесс открывает файл сам)
+    step = -(-page_count // workers)
+    ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+    with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+        chunks = pool.map(_fitz_page_range, [path] * len(ranges), *zip(*ranges))
+        pages = [page for chunk in chunks for page in chunk]
+    return "\n".join(pages), page_count
+
+
+def _extract_pdfplumber(path: str) -> str:
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        return "\n".join(page.extract_text() or "" for page in pdf.pages)
+
+
+def _fitz_text_is_usable(text: str, page_count: int) -> bool:
+    stripped = text.strip()
+    if len(stripped) < MIN_CHARS_PER_PAGE * max(page_count, 1):
+        return False
+    return stripped.count("�") / len(stripped) <= MAX_BAD_CHAR_RATIO
+
+
+def extract_pdf_text(path: str, engine: str = "auto", workers: Optional[int] = None) -> str:
+    """
+    engine: auto — PyMuPDF, с откатом на pdfplumber, если текст выглядит неполным;
+    fitz / pdfplumber — только указанный движок.
+    """
+    if engine == "pdfplumber":
+        return _extract_pdfplumber(path)
+
+    try:
+        text, page_count = _extract_fitz(path, workers)
+    except ImportError:
+        if engine == "fitz":
+            raise
+        return _extract_pdfplumber(path)
+
+    if engine == "fitz" or _fitz_text_is_usable(text, page_count):
+        return text
+
+    fallback = _extract_pdfplumber(path)
+    return fallback if len(fallback.strip()) > len(text.strip()) else text
+
+
+def extract_docx_text(path: str) -> str:
+    import docx  # python-docx
+
+    document = docx.Document(path)
+    parts = [paragraph.text for paragraph in document.paragraphs]
+    for table in document.tables:
+        for row in table.rows:
+            parts.append(" | ".join(cell.text for cell in row.cells))
+    return "\n".join(parts)
+
+
+def extract_plain_text(path: str) -> str:
+    with open(path, "rb") as f:
+        data = f.read()
+    for encoding in TEXT_ENCODINGS:
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("utf-8", errors="replace")
+
+
+def extract_text(path: str, engine: str = "auto", workers: Optional[int] = None) -> str:
+    """Текст документа; формат определяется по расширению файла (по умолчанию — PDF)"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".docx":
+        return extract_docx_text(path)
+    if extension in (".txt", ".md"):
+        return extract_plain_text(path)
+    return extract_pdf_text(path, engine, workers)
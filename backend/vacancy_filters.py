@@ -0,0 +1,94 @@
+"""
+Структурные фильтры вакансий: зарплата и требуемый опыт.
+
+Зарплата приводится к одной шкале — рубли до вычета НДФЛ — и хранится
+в индексированных колонках Vacancy.salary_min_rub / salary_max_rub, опыт —
+в Vacancy.experience_min_years. Фильтр применяется до текстового скоринга:
+к выдаче HH — на списке вакансий, к сохраненным вакансиям — условием SQL
+по этим колонкам, поэтому в векторизатор попадают только подходящие вакансии.
+"""
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import or_
+
+from models.database import Vacancy
+
+# Рублей за единицу валюты (коды HH). Переопределяются CURRENCY_RATES='{"USD": 95}'
+CURRENCY_RATES = {
+    "RUR": 1.0, "RUB": 1.0, "USD": 90.0, "EUR": 98.0, "KZT": 0.18, "BYR": 27.5, "UAH": 2.2,
+    "UZS": 0.0072, "KGS": 1.03, "AZN": 53.0, "GEL": 33.0,
+}
+CURRENCY_RATES.update(json.loads(os.environ.get("CURRENCY_RATES", "{}")))
+INCOME_TAX = 0.13  # НДФЛ: зарплата «на руки» / (1 - INCOME_TAX) = до вычета
+
+# Минимум лет опыта по справочнику HH experience
+EXPERIENCE_MIN_YEARS = {"noExperience": 0, "between1And3": 1, "between3And6": 3, "moreThan6": 6}
+
+
+def normalize_salary(salary: Optional[Dict]) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Вилка HH в рублях до вычета налогов: (нижняя, верхняя граница), каждая
+    заменяет отсутствующую другую. (None, None) — зарплата не указана или валюта неизвестна.
+    """
+    if not salary:
+        return None, None
+    rate = CURRENCY_RATES.get(salary.get("currency") or "RUR")
+    low, high = salary.get("from") or salary.get("to"), salary.get("to") or salary.get("from")
+    if rate is None or low is None:
+        return None, None
+    if salary.get("gross") is False:  # не указано — считаем, что до вычета
+        rate /= 1 - INCOME_TAX
+    return round(low * rate), round(high * rate)
+
+
+def experience_min_years(experience: Optional[Dict]) -> Optional[int]:
+    return EXPERIENCE_MIN_YEARS.get((experience or {}).get("id"))
+
+
+@dataclass(frozen=True)
+class VacancyFilter:
+    """
+    salary_min — вакансия может платить не меньше (верхняя граница вилки ≥ salary_min, RUB gross);
+    max_experience_years — требуемый опыт не больше; only_with_salary — без зарплаты не показывать.
+    Вакансии без зарплаты или с неизвестным опытом проходят соответствующий фильтр.
+    """
+    salary_min: Optional[int] = None
+    max_experience_years: Optional[int] = None
+    only_with_salary: bool = False
+
+    @property
+    def active(self) -> bool:
+        return self.salary_min is not None or self.max_experience_years is not None or self.only_with_salary
+
+    def matches(self, salary_max_rub: Optional[int], experience_years: Optional[int]) -> bool:
+        if salary_max_rub is None:
+            if self.only_with_salary:
+                return False
+        elif self.salary_min is not None and salary_max_rub < self.salary_min:
+            return False
+        if self.max_experience_years is not None and experience_years is not None:
+            return experience_years <= self.max_experience_years
+        return True
+
+    def apply(self, vacancies: Iterable[Dict]) -> List[Dict]:
+        """Вакансии из ответа HH, прошедшие фильтр"""
+        vacancies = list(vacancies)
+        if not self.active:
+            return vacancies
+        return [v for v in vacancies
+                if self.matches(normalize_salary(v.get("salary"))[1], experience_min_years(v.get("experience")))]
+
+    def conditions(self) -> list:
+        """Те же условия для SQL (индексы по salary_max_rub и experience_min_years)"""
+        conditions = []
+        if self.only_with_salary or self.salary_min is not None:
+            salary = (Vacancy.salary_max_rub >= self.salary_min if self.salary_min is not None
+                      else Vacancy.salary_max_rub.isnot(None))
+            conditions.append(salary if self.only_with_salary else or_(salary, Vacancy.salary_max_rub.is_(None)))
+        if self.max_experience_years is not None:
+            conditions.append(or_(Vacancy.experience_min_years <= self.max_experience_years,
+                                  Vacancy.experience_min_years.is_(None)))
+        return conditions
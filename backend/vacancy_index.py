@@ -0,0 +1,417 @@
+import hashlib
+import heapq
+import io
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+
+Resume = Union[str, sp.csr_matrix]  # текст резюме или его заранее посчитанные частоты термов
+
+
+def serialize_vector(counts: sp.csr_matrix) -> bytes:
+    buffer = io.BytesIO()
+    sp.save_npz(buffer, counts.tocsr(), compressed=True)
+    return buffer.getvalue()
+
+
+def deserialize_vector(data: bytes) -> sp.csr_matrix:
+    return sp.load_npz(io.BytesIO(data)).tocsr()
+
+
+def top_k_similarities(queries: sp.csr_matrix, matrix: sp.csr_matrix, k: int,
+                       query_chunk: int = 256,
+                       matrix_chunk: int = 20_000) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+    """
+    Top-k строк matrix для каждой строки queries (векторы уже нормированы,
+    скалярное произведение = cosine similarity).
+
+    Произведение считается блоками query_chunk × matrix_chunk, поэтому в памяти
+    не больше одного плотного блока; лучшие k на блок выбираются argpartition
+    и сливаются с текущими лучшими. Полностью сортируются только итоговые k.
+    Отдает (номер первой строки queries, индексы строк matrix, оценки) по блокам queries.
+    """
+    n_rows = matrix.shape[0]
+    k = min(k, n_rows)
+    for query_start in range(0, queries.shape[0], query_chunk):
+        query_block = queries[query_start:query_start + query_chunk]
+        best_scores = np.empty((query_block.shape[0], 0), dtype=np.float32)
+        best_rows = np.empty((query_block.shape[0], 0), dtype=np.int64)
+
+        for matrix_start in range(0, n_rows, matrix_chunk):
+            block = (query_block @ matrix[matrix_start:matrix_start + matrix_chunk].T).toarray()
+            if block.shape[1] > k:
+                rows = np.argpartition(block, -k, axis=1)[:, -k:]
+            else:
+                rows = np.broadcast_to(np.arange(block.shape[1]), block.shape)
+            scores = np.hstack([best_scores, np.take_along_axis(block, rows, axis=1)])
+            rows = np.hstack([best_rows, rows + matrix_start])
+            if scores.shape[1] > k:
+                keep = np.argpartition(scores, -k, axis=1)[:, -k:]
+                scores = np.take_along_axis(scores, keep, axis=1)
+                rows = np.take_along_axis(rows, keep, axis=1)
+            best_scores, best_rows = scores, rows
+
+        order = np.argsort(-best_scores, axis=1)
+        yield (query_start, np.take_along_axis(best_rows, order, axis=1),
+               np.take_along_axis(best_scores, order, axis=1))
+
+
+class VacancyIndex:
+    """
+    Долгоживущий TF-IDF индекс вакансий.
+
+    Вакансия векторизуется один раз при добавлении (HashingVectorizer не требует
+    обучения словаря), сырые частоты термов хранятся в разреженной матрице,
+    строки которой адресуются по HH id. Document frequency обновляется
+    инкрементально, IDF пересчитывается периодически. Резюме сравнивается со
+    всем индексом одним произведением разреженной матрицы на вектор.
+    """
+
+    def __init__(self,
+                 preprocessor: Callable[[str], str],
+                 batch_preprocessor: Optional[Callable[[List[str]], List[str]]] = None,
+                 n_features: int = 2 ** 18,
+                 max_df: float = 0.9,
+                 idf_refresh_every: int = 500,
+                 idf_refresh_seconds: float = 600.0,
+                 max_vacancies: int = 200_000,
+                 postings_rebuild_rows: int = 5_000):
+        self.preprocessor = preprocessor
+        self.batch_preprocessor = batch_preprocessor
+        self.max_df = max_df
+        self.idf_refresh_every = idf_refresh_every
+        self.idf_refresh_seconds = idf_refresh_seconds
+        self.max_vacancies = max_vacancies
+        self.postings_rebuild_rows = postings_rebuild_rows
+
+        self._vectorizer = HashingVectorizer(
+            n_features=n_features,
+            ngram_range=(1, 2),      # учитываем униграммы и биграммы
+            alternate_sign=False,
+            norm=None,
+            lowercase=False,         # текст уже нормализован в preprocessor
+        )
+        self._lock = threading.RLock()
+
+        self._rows: Dict[str, int] = {}           # HH id -> строка матрицы
+        self._row_ids: List[Optional[str]] = []   # строка -> HH id (None = удалена)
+        self._fingerprints: Dict[str, str] = {}   # HH id -> хэш текста
+        self._counts = sp.csr_matrix((0, n_features), dtype=np.float32)
+        self._df = np.zeros(n_features, dtype=np.int32)
+        self._n_docs = 0
+
+        self._idf = np.ones(n_features, dtype=np.float32)
+        self._weighted: Optional[sp.csr_matrix] = None
+        self._added_since_refresh = 0
+        self._idf_updated_at = 0.0
+
+        # Инвертированный индекс (терм -> строки) по первым _postings_rows строкам
+        # взвешенной матрицы; строки, добавленные позже, скорятся напрямую
+        self._postings: Optional[sp.csc_matrix] = None
+        self._term_max = np.zeros(n_features, dtype=np.float32)
+        self._postings_rows = 0
+
+    @property
+    def n_features(self) -> int:
+        return self._vectorizer.n_features
+
+    def __len__(self) -> int:
+        return self._n_docs
+
+    def __contains__(self, vacancy_id: str) -> bool:
+        return vacancy_id in self._rows
+
+    # --- векторизация ---
+
+    def vectorize(self, texts: List[str]) -> sp.csr_matrix:
+        """Сырые частоты термов (без IDF) для списка текстов"""
+        if self.batch_preprocessor is not None:
+            docs = self.batch_preprocessor([t or "" for t in texts])
+        else:
+            docs = [self.preprocessor(t or "") for t in texts]
+        return self._vectorizer.transform(docs).astype(np.float32)
+
+    def _query(self, resume: Resume) -> sp.csr_matrix:
+        counts = self.vectorize([resume]) if isinstance(resume, str) else resume
+        return self._apply_idf(counts)
+
+    def _apply_idf(self, counts: sp.csr_matrix) -> sp.csr_matrix:
+        weighted = counts @ sp.diags(self._idf, format="csr")
+        return normalize(weighted, norm="l2", copy=False)
+
+    def _refresh_idf(self) -> None:
+        n = max(self._n_docs, 1)
+        idf = np.log((1 + n) / (1 + self._df)) + 1.0  # smooth idf, как в sklearn
+        if self._n_docs >= 10:
+            idf[self._df > self.max_df * n] = 0.0     # игнорируем слишком частые
+        self._idf = idf.astype(np.float32)
+        self._weighted = None
+        self._added_since_refresh = 0
+        self._idf_updated_at = time.time()
+
+    def _idf_is_stale(self) -> bool:
+        return (self._added_since_refresh >= self.idf_refresh_every
+                or time.time() - self._idf_updated_at >= self.idf_refresh_seconds)
+
+    # --- обновление ---
+
+    def add(self, vacancies: Iterable[Tuple[str, str]]) -> int:
+        """
+        Добавляет (или обновляет) вакансии пар (id, текст).
+        Уже проиндексированные вакансии с тем же текстом пропускаются.
+        Возвращает количество векторизованных вакансий.
+        """
+        with self._lock:
+            new_ids, new_texts = [], []
+            seen = set()
+            for vacancy_id, text in vacancies:
+                vacancy_id = str(vacancy_id)
+                fingerprint = hashlib.sha1((text or "").encode()).hexdigest()
+                if vacancy_id in seen or self._fingerprints.get(vacancy_id) == fingerprint:
+                    continue
+                seen.add(vacancy_id)
+                if vacancy_id in self._rows:
+                    self._remove_row(vacancy_id)
+                new_ids.append(vacancy_id)
+                new_texts.append(text)
+                self._fingerprints[vacancy_id] = fingerprint
+
+            if not new_ids:
+                return 0
+
+            counts = self.vectorize(new_texts)
+            self._df += np.asarray((counts > 0).sum(axis=0), dtype=np.int32).ravel()
+            self._n_docs += len(new_ids)
+            self._added_since_refresh += len(new_ids)
+
+            start = self._counts.shape[0]
+            self._counts = sp.vstack([self._counts, counts], format="csr")
+            for offset, vacancy_id in enumerate(new_ids):
+                self._rows[vacancy_id] = start + offset
+                self._row_ids.append(vacancy_id)
+
+            if self._idf_is_stale():
+                self._refresh_idf()
+            elif self._weighted is not None:
+                # новые строки взвешиваем текущим IDF, без пересчета всей матрицы
+                self._weighted = sp.vstack([self._weighted, self._apply_idf(counts)], format="csr")
+
+            self._enforce_size_limit()
+            return len(new_ids)
+
+    def remove(self, vacancy_id: str) -> bool:
+        with self._lock:
+            if vacancy_id not in self._rows:
+                return False
+            self._remove_row(vacancy_id)
+            self._fingerprints.pop(vacancy_id, None)
+            self._weighted = None
+            return True
+
+    def _remove_row(self, vacancy_id: str) -> None:
+        row = self._rows.pop(vacancy_id)
+        row_counts = self._counts[row]
+        self._df[row_counts.indices] -= 1
+        self._n_docs -= 1
+        self._row_ids[row] = None
+        # обнуляем строку, чтобы она не участвовала в скоринге до компактизации
+        self._counts.data[self._counts.indptr[row]:self._counts.indptr[row + 1]] = 0
+        if self._weighted is not None and row < self._weighted.shape[0]:
+            self._weighted.data[self._weighted.indptr[row]:self._weighted.indptr[row + 1]] = 0
+
+    def _enforce_size_limit(self) -> None:
+        """Вытесняет самые старые вакансии и уплотняет матрицу от удаленных строк"""
+        overflow = self._n_docs - self.max_vacancies
+        if overflow > 0:
+            for vacancy_id in [v for v in self._row_ids if v is not None][:overflow]:
+                self._remove_row(vacancy_id)
+                self._fingerprints.pop(vacancy_id, None)
+
+        dead = len(self._row_ids) - self._n_docs
+        if dead and dead * 2 >= len(self._row_ids):
+            alive = [row for row, v in enumerate(self._row_ids) if v is not None]
+            self._counts = self._counts[alive]
+            self._counts.eliminate_zeros()
+            self._row_ids = [self._row_ids[row] for row in alive]
+            self._rows = {v: row for row, v in enumerate(self._row_ids)}
+            self._weighted = None
+
+    # --- скоринг ---
+
+    def _matrix(self) -> sp.csr_matrix:
+        if self._idf_updated_at == 0.0 or self._idf_is_stale():
+            self._refresh_idf()
+        if self._weighted is None:
+            self._weighted = self._apply_idf(self._counts)
+            self._postings = None
+        return self._weighted
+
+    def _inverted(self, matrix: sp.csr_matrix) -> None:
+        """Перестраивает постинги, если матрица пересчитана или накопилось много новых строк"""
+        if self._postings is None or matrix.shape[0] - self._postings_rows > self.postings_rebuild_rows:
+            self._postings = matrix.T.tocsr()  # строка — терм, столбцы — вакансии
+            # максимальный вес терма — верхняя граница его вклада в cosine similarity
+            self._term_max = np.asarray(self._postings.max(axis=1).todense(), dtype=np.float32).ravel()
+            self._postings_rows = matrix.shape[0]
+
+    def _accumulate(self, terms: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Сумма вкладов термов по их постингам: (строки, частичные оценки)"""
+        query = sp.csr_matrix((weights, (np.zeros(len(terms), dtype=np.int32), terms)),
+                              shape=(1, self.n_features))
+        partial = query @ self._postings
+        partial.sort_indices()
+        return partial.indices.astype(np.int64), partial.data
+
+    def score(self, resume: Resume) -> Dict[str, float]:
+        """Cosine similarity резюме со всеми вакансиями индекса"""
+        with self._lock:
+            if not self._n_docs:
+                return {}
+            matrix = self._matrix()
+            query = self._query(resume)
+            sims = (matrix @ query.T).toarray().ravel()
+            return {v: float(sims[row]) for v, row in self._rows.items()}
+
+    def score_ids(self, resume: Resume, vacancy_ids: List[str]) -> List[float]:
+        """Cosine similarity резюме с указанными вакансиями (0.0 для отсутствующих)"""
+        with self._lock:
+            if not self._n_docs:
+                return [0.0] * len(vacancy_ids)
+            matrix = self._matrix()
+            query = self._query(resume)
+            rows = [self._rows.get(v) for v in map(str, vacancy_ids)]
+            present = [row for row in rows if row is not None]
+            if not present:
+                return [0.0] * len(rows)
+            # только запрошенные строки, а не весь индекс
+            sims = dict(zip(present, (matrix[present] @ query.T).toarray().ravel().tolist()))
+            return [sims[row] if row is not None else 0.0 for row in rows]
+
+    def score_texts(self, resume: Resume, vacancy_texts: List[str]) -> List[float]:
+        """Скоринг текстов, не добавляя их в индекс (IDF берется из индекса)"""
+        with self._lock:
+            if self._idf_updated_at == 0.0 or self._idf_is_stale():
+                self._refresh_idf()
+            matrix = self._apply_idf(self.vectorize(vacancy_texts))
+            query = self._query(resume)
+        return (matrix @ query.T).toarray().ravel().tolist()
+
+    def top_k_batch(self, resumes: sp.csr_matrix, k: int = 50,
+                    vacancy_ids: Optional[Iterable[str]] = None,
+                    min_score: float = 0.0) -> Iterator[Tuple[int, List[Tuple[str, float]]]]:
+        """
+        Лучшие k вакансий для каждого резюме (R×V за один проход блоками).
+        resumes — частоты термов резюме построчно (vectorize / vectorize_resume);
+        vacancy_ids ограничивает скоринг подмножеством индекса.
+        Отдает (номер резюме, [(id вакансии, similarity), ...]) по убыванию similarity.
+        """
+        with self._lock:
+            if not self._n_docs:
+                return
+            matrix = self._matrix()
+            row_ids = list(self._row_ids)
+            if vacancy_ids is not None:
+                rows = sorted(self._rows[v] for v in map(str, vacancy_ids) if v in self._rows)
+                matrix = matrix[rows]
+                row_ids = [row_ids[row] for row in rows]
+            queries = self._apply_idf(resumes)
+
+        for start, top_rows, top_scores in top_k_similarities(queries, matrix, k):
+            for offset in range(top_rows.shape[0]):
+                yield start + offset, [
+                    (row_ids[row], float(score))
+                    for row, score in zip(top_rows[offset], top_scores[offset])
+                    if score > min_score and row_ids[row] is not None
+                ]
+
+    def search(self, resume: Resume, k: Optional[int] = 50, min_score: float = 0.0,
+               vacancy_ids: Optional[Iterable[str]] = None,
+               seed_terms: int = 8) -> List[Tuple[str, float]]:
+        """
+        Двухэтапный поиск (MaxScore): кандидаты из инвертированного индекса
+        с отсечением по порогу, точный cosine только для прошедших отсечение,
+        top-k через кучу. k=None — все вакансии с similarity >= min_score.
+        vacancy_ids ограничивает выдачу подмножеством индекса.
+
+        Термы запроса с наименьшими верхними границами вклада, сумма которых
+        меньше порога, «необязательные»: документ только с ними порог не пройдет.
+        Кандидаты — документы «обязательных» термов; их частичная оценка плюс
+        сумма границ необязательных термов отсекает остальных без точного скоринга.
+        """
+        with self._lock:
+            if not self._n_docs:
+                return []
+            matrix = self._matrix()
+            self._inverted(matrix)
+            query = self._query(resume)
+            if not query.nnz:
+                return []
+
+            bounds = query.data * self._term_max[query.indices]
+            order = np.argsort(bounds)
+            terms, weights, bounds = query.indices[order], query.data[order], bounds[order]
+
+            allowed = None
+            if vacancy_ids is not None:
+                # маска по строкам: проверка кандидата — обращение по индексу, а не поиск в списке
+                allowed = np.zeros(matrix.shape[0], dtype=bool)
+                allowed[[self._rows[v] for v in map(str, vacancy_ids) if v in self._rows]] = True
+            elif len(self._row_ids) > self._n_docs:
+                # удаленные строки остаются в постингах до компактизации — иначе их
+                # частичные оценки завысят порог и отсекут живые вакансии из top-k
+                allowed = np.fromiter((v is not None for v in self._row_ids), dtype=bool,
+                                      count=len(self._row_ids))
+
+            def restrict(rows: np.ndarray, *values: np.ndarray):
+                if allowed is None:
+                    return (rows, *values)
+                mask = allowed[rows]
+                return (rows[mask], *(v[mask] for v in values))
+
+            # Порог: min_score, а для top-k — еще k-я лучшая частичная оценка по самым
+            # сильным термам (частичная оценка не больше полной, поэтому порог безопасен)
+            threshold = min_score
+            if k:
+                rows, partial = restrict(*self._accumulate(terms[-seed_terms:], weights[-seed_terms:]))
+                if len(partial) >= k:
+                    threshold = max(threshold, float(np.partition(partial, -k)[-k]))
+
+            # небольшой запас на погрешность float32
+            threshold -= 1e-6
+            optional = int(np.searchsorted(np.cumsum(bounds), threshold, side="left"))
+            rows, scores = restrict(*self._accumulate(terms[optional:], weights[optional:]))
+            if optional:
+                keep = scores + bounds[:optional].sum() >= threshold
+                rows, scores = rows[keep], scores[keep]
+                if len(rows):
+                    # точная оценка: добавляем вклад необязательных термов только кандидатам
+                    rest_rows, rest_scores = self._accumulate(terms[:optional], weights[:optional])
+                    if len(rest_rows):
+                        positions = np.minimum(np.searchsorted(rest_rows, rows), len(rest_rows) - 1)
+                        found = rest_rows[positions] == rows
+                        scores = scores.copy()
+                        scores[found] += rest_scores[positions[found]]
+
+            # строки, добавленные после построения постингов, скорим напрямую
+            if matrix.shape[0] > self._postings_rows:
+                (delta,) = restrict(np.arange(self._postings_rows, matrix.shape[0]))
+                rows = np.concatenate([rows, delta])
+                scores = np.concatenate([scores, (matrix[delta] @ query.T).toarray().ravel()])
+
+            keep = (scores >= max(min_score, threshold)) & (scores > 0)
+            rows, scores = rows[keep], scores[keep]
+
+            row_ids = self._row_ids
+            matches = ((float(score), row_ids[row]) for row, score in zip(rows.tolist(), scores.tolist())
+                       if row_ids[row] is not None)
+            if k:
+                top = heapq.nlargest(k, matches)
+            else:
+                top = sorted(matches, reverse=True)
+            return [(vacancy_id, score) for score, vacancy_id in top]
@@ -1,35 +1,282 @@
-from fastapi import FastAPI, Query, HTTPException
-import requests
+"""
+Статистика вакансий по нашим данным.
 
-app = FastAPI()
+HH не отдает статистику откликов, поэтому она считается из своих таблиц:
+отклики на вакансию по дням — из applications, возраст и подъемы вакансии —
+из истории загрузок (first_seen_at, published_at, reposts), перцентили
+зарплат по региону и поисковому запросу — из vacancies и vacancy_search_hits.
 
-HH_VACANCY_URL = "https://api.hh.ru/vacancies/{}"
+Агрегаты пересчитываются по расписанию (stats_loop, раз в
+VACANCY_STATS_INTERVAL_MINUTES) в таблицы vacancy_stats и salary_stats;
+ряды хранятся упакованными массивами (uint16 по дням, float32 перцентили).
+Запрос статистики — чтение по первичному ключу, без обращения к HH.
 
-@app.get("/vacancy-stats")
-def vacancy_stats(vacancy_id: str = Query(...)):
-    # Запрос вакансии на hh.ru
-    resp = requests.get(HH_VACANCY_URL.format(vacancy_id))
+Пересчет вручную из папки backend:
+    python vacancy_stats.py
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from array import array
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
 
-    print(HH_VACANCY_URL.format(vacancy_id))
+import numpy as np
+from sqlalchemy import func, insert
 
-    if resp.status_code != 200:
-        raise HTTPException(status_code=404, detail="Vacancy not found")
+from models.database import (SessionLocal, engine, Application, ApplicationCounter, SalaryStats, Vacancy,
+                             VacancySearchHit, VacancyStats)
+from services.scheduled_jobs import run_exclusive
 
-    vacancy_data = resp.json()
+logger = logging.getLogger(__name__)
 
-    # В hh API нет прямой статистики откликов, поэтому возвращаем базовую инфу и мок-статистику
-    stats = {
-        "vacancy_id": vacancy_id,
-        "name": vacancy_data.get("name"),
-        "published_at": vacancy_data.get("published_at"),
-        "area": vacancy_data.get("area", {}).get("name"),
-        "employer": vacancy_data.get("employer", {}).get("name"),
-        "response_letter_required": vacancy_data.get("response_letter_required", False),
+VACANCY_STATS_INTERVAL_MINUTES = float(os.environ.get("VACANCY_STATS_INTERVAL_MINUTES", "60"))  # 0 — не запускать в API
+VACANCY_STATS_DAYS = 7             # длина ряда daily_applications
+SALARY_PERCENTILES = (10, 25, 50, 75, 90)
+SALARY_MIN_COUNT = 5               # меньше вакансий с зарплатой — перцентили не считаем
+SALARY_QUERY_DAYS = 30             # запросы, по которым вакансии находились за этот период
+ACCEPTANCE_PRIOR_WEIGHT = 5        # «виртуальных» откликов с общей долей принятых в оценке по вакансии
+BATCH_SIZE = 500
 
-        # Мок-статистика (для примера)
-        "total_applications": 120 + int(vacancy_id[-2:], 10) % 50,  # рандомно
-        "acceptance_chance": round(0.15 + (int(vacancy_id[-1]) / 10) * 0.5, 2),  # 15%-65%
-        "daily_applications": [5, 12, 15, 18, 20, 25, 15],
-    }
 
-    return stats
+def _pack_daily(counts: Iterable[int]) -> bytes:
+    return array("H", (min(c, 0xFFFF) for c in counts)).tobytes()
+
+
+def _unpack_daily(data: Optional[bytes]) -> List[int]:
+    if not data:
+        return [0] * VACANCY_STATS_DAYS
+    return array("H", data).tolist()
+
+
+def _unpack_percentiles(data: bytes) -> List[float]:
+    return np.frombuffer(data, dtype=np.float32).tolist()
+
+
+def salary_point(salary_from: Optional[int], salary_to: Optional[int]) -> Optional[float]:
+    """Одна цифра для вилки: середина, если заданы обе границы"""
+    if salary_from and salary_to:
+        return (salary_from + salary_to) / 2
+    return float(salary_from or salary_to) if (salary_from or salary_to) else None
+
+
+# --- пересчет ---
+
+def _application_rollup(db, since: datetime) -> Dict[str, Dict]:
+    """Отклики по вакансиям: всего отправлено/ошибок и отправленные по дням за период"""
+    rows: Dict[str, Dict] = defaultdict(lambda: {"sent": 0, "failed": 0, "daily": {}})
+    for vacancy_id, status, count in (db.query(Application.vacancy_id, Application.status, func.count())
+                                      .filter(Application.status.in_(("sent", "failed")))
+                                      .group_by(Application.vacancy_id, Application.status)):
+        rows[vacancy_id][status] = count
+    day = func.date(Application.applied_at)
+    for vacancy_id, date, count in (db.query(Application.vacancy_id, day, func.count())
+                                    .filter(Application.status == "sent", Application.applied_at >= since)
+                                    .group_by(Application.vacancy_id, day)):
+        rows[vacancy_id]["daily"][date] = count
+    return rows
+
+
+def _percentiles(values: np.ndarray) -> bytes:
+    return np.percentile(values, SALARY_PERCENTILES).astype(np.float32).tobytes()
+
+
+def build_vacancy_stats_rollup(now: Optional[datetime] = None) -> Dict:
+    """Пересчитывает vacancy_stats и salary_stats целиком; возвращает сводку"""
+    started = time.perf_counter()
+    now = now or datetime.utcnow()
+    first_day = (now - timedelta(days=VACANCY_STATS_DAYS - 1)).date()
+    days = [(first_day + timedelta(days=i)).isoformat() for i in range(VACANCY_STATS_DAYS)]
+
+    db = SessionLocal()
+    try:
+        applications = _application_rollup(db, datetime.combine(first_day, datetime.min.time()))
+        # зарплаты в рублях до вычета НДФЛ (см. vacancy_filters.normalize_salary)
+        salary_rows = (db.query(Vacancy.id, Vacancy.area_id, Vacancy.salary_min_rub, Vacancy.salary_max_rub)
+                       .filter(Vacancy.salary_max_rub.isnot(None)).all())
+        salaries = {row.id: salary_point(row.salary_min_rub, row.salary_max_rub) for row in salary_rows}
+        by_area: Dict[str, List[float]] = defaultdict(list)
+        for row in salary_rows:
+            if row.area_id:
+                by_area[row.area_id].append(salaries[row.id])
+        by_query: Dict[str, List[float]] = defaultdict(list)
+        for query_key, vacancy_id in (db.query(VacancySearchHit.query_key, VacancySearchHit.vacancy_id)
+                                      .filter(VacancySearchHit.seen_at >= now - timedelta(days=SALARY_QUERY_DAYS))):
+            if vacancy_id in salaries:
+                by_query[query_key].append(salaries[vacancy_id])
+    finally:
+        db.close()
+
+    salary_stats = []
+    area_sorted: Dict[str, np.ndarray] = {}
+    for scope, groups in (("area", by_area), ("query", by_query)):
+        for key, values in groups.items():
+            if len(values) < SALARY_MIN_COUNT:
+                continue
+            values = np.sort(np.asarray(values, dtype=np.float64))
+            if scope == "area":
+                area_sorted[key] = values
+            salary_stats.append({"scope": scope, "key": key, "count": len(values),
+                                 "percentiles": _percentiles(values), "computed_at": now})
+
+    area_of = {row.id: row.area_id for row in salary_rows}
+    vacancy_rows = []
+    for vacancy_id in set(applications) | set(salaries):
+        apps = applications.get(vacancy_id, {"sent": 0, "failed": 0, "daily": {}})
+        salary = salaries.get(vacancy_id)
+        percentile = None
+        area_values = area_sorted.get(area_of.get(vacancy_id))
+        if salary is not None and area_values is not None:
+            percentile = round(float(np.searchsorted(area_values, salary, side="right")) / len(area_values), 4)
+        vacancy_rows.append({
+            "vacancy_id": vacancy_id,
+            "total_applications": apps["sent"],
+            "sent_applications": apps["sent"],
+            "failed_applications": apps["failed"],
+            "daily_applications": _pack_daily(apps["daily"].get(day, 0) for day in days),
+            "salary": salary,
+            "salary_percentile": percentile,
+            "computed_at": now,
+        })
+
+    # замена целиком в одной транзакции: читатели видят либо старую, либо новую статистику
+    with engine.begin() as connection:
+        connection.execute(VacancyStats.__table__.delete())
+        connection.execute(SalaryStats.__table__.delete())
+        for i in range(0, len(vacancy_rows), BATCH_SIZE):
+            connection.execute(insert(VacancyStats.__table__), vacancy_rows[i:i + BATCH_SIZE])
+        for i in range(0, len(salary_stats), BATCH_SIZE):
+            connection.execute(insert(SalaryStats.__table__), salary_stats[i:i + BATCH_SIZE])
+
+    summary = {"vacancies": len(vacancy_rows), "salary_groups": len(salary_stats),
+               "seconds": round(time.perf_counter() - started, 2)}
+    logger.info(f"Vacancy stats rollup done: {summary}")
+    return summary
+
+
+async def stats_loop(interval_minutes: float = VACANCY_STATS_INTERVAL_MINUTES) -> None:
+    """
+    Пересчет при старте и затем раз в interval_minutes; из нескольких воркеров
+    uvicorn пересчитывает один, и при рестарте — только если интервал уже прошел
+    """
+    while True:
+        try:
+            await run_exclusive("vacancy_stats", timedelta(minutes=interval_minutes), build_vacancy_stats_rollup)
+        except Exception as e:
+            logger.error(f"Vacancy stats rollup failed: {e!r}")
+        await asyncio.sleep(interval_minutes * 60)
+
+
+# --- чтение ---
+
+def _acceptance_prior(db) -> float:
+    """Общая доля откликов, принятых HH (из счетчиков application_counters)"""
+    counts = dict(db.query(ApplicationCounter.status, ApplicationCounter.count)
+                  .filter(ApplicationCounter.status.in_(("sent", "failed"))))
+    sent, failed = counts.get("sent", 0), counts.get("failed", 0)
+    return (sent + 9) / (sent + failed + 10)  # без данных — 0.9
+
+
+def _select_fields(stats: Dict, fields: Optional[Iterable[str]]) -> Dict:
+    if not fields:
+        return stats
+    return {k: stats[k] for k in ("vacancy_id", *fields) if k in stats}
+
+
+def lookup_vacancy_stats(vacancy_ids: List[str], fields: Optional[List[str]] = None,
+                         now: Optional[datetime] = None) -> Dict[str, Dict]:
+    """Статистика сохраненных вакансий; вакансий, которых нет в БД, в ответе нет"""
+    now = now or datetime.utcnow()
+    db = SessionLocal()
+    try:
+        vacancies = (db.query(Vacancy.id, Vacancy.raw, Vacancy.area_id, Vacancy.first_seen_at, Vacancy.fetched_at,
+                              Vacancy.hh_created_at, Vacancy.published_at, Vacancy.reposts)
+                     .filter(Vacancy.id.in_(vacancy_ids)).all())
+        rollup = {row.vacancy_id: row for row in
+                  db.query(VacancyStats).filter(VacancyStats.vacancy_id.in_([v.id for v in vacancies]))}
+        areas = {v.area_id for v in vacancies if v.area_id}
+        area_salaries = {row.key: row for row in
+                         db.query(SalaryStats).filter(SalaryStats.scope == "area", SalaryStats.key.in_(areas))}
+        prior = _acceptance_prior(db)
+    finally:
+        db.close()
+
+    result = {}
+    for vacancy in vacancies:
+        raw = json.loads(vacancy.raw) if vacancy.raw else {}
+        stats = rollup.get(vacancy.id)
+        sent = stats.sent_applications if stats else 0
+        failed = stats.failed_applications if stats else 0
+        created = vacancy.hh_created_at or vacancy.first_seen_at or vacancy.fetched_at
+        area_salary = area_salaries.get(vacancy.area_id)
+        result[vacancy.id] = _select_fields({
+            "vacancy_id": vacancy.id,
+            "name": raw.get("name"),
+            "published_at": raw.get("published_at"),
+            "area": (raw.get("area") or {}).get("name"),
+            "employer": (raw.get("employer") or {}).get("name"),
+            "response_letter_required": raw.get("response_letter_required", False),
+
+            # отклики наших пользователей; acceptance_chance — доля принятых HH,
+            # сглаженная к общей доле, пока откликов на вакансию мало
+            "total_applications": stats.total_applications if stats else 0,
+            "failed_applications": failed,
+            "acceptance_chance": round((sent + ACCEPTANCE_PRIOR_WEIGHT * prior)
+                                       / (sent + failed + ACCEPTANCE_PRIOR_WEIGHT), 2),
+            "daily_applications": _unpack_daily(stats.daily_applications if stats else None),
+
+            "age_days": round((now - created).total_seconds() / 86400, 1) if created else None,
+            "first_seen_at": vacancy.first_seen_at.isoformat() if vacancy.first_seen_at else None,
+            "last_seen_at": vacancy.fetched_at.isoformat() if vacancy.fetched_at else None,
+            "reposts": vacancy.reposts or 0,
+            "republished": bool(vacancy.published_at and vacancy.hh_created_at
+                                and vacancy.published_at > vacancy.hh_created_at + timedelta(hours=1)),
+
+            "salary": stats.salary if stats else None,
+            "salary_percentile": stats.salary_percentile if stats else None,
+            "area_salary": {
+                "count": area_salary.count,
+                **{f"p{p}": round(v) for p, v in zip(SALARY_PERCENTILES, _unpack_percentiles(area_salary.percentiles))},
+            } if area_salary else None,
+            "computed_at": stats.computed_at.isoformat() if stats else None,
+        }, fields)
+    return result
+
+
+def query_salary_stats(query_key: str) -> Optional[Dict]:
+    """Перцентили зарплат вакансий, найденных по запросу (ключ — normalize_params)"""
+    db = SessionLocal()
+    try:
+        row = db.query(SalaryStats).filter(SalaryStats.scope == "query", SalaryStats.key == query_key).first()
+    finally:
+        db.close()
+    if row is None:
+        return None
+    return {"count": row.count, "computed_at": row.computed_at.isoformat(),
+            **{f"p{p}": round(v) for p, v in zip(SALARY_PERCENTILES, _unpack_percentiles(row.percentiles))}}
+
+
+async def get_vacancy_stats(vacancy_id: str, fields: Optional[List[str]] = None) -> Dict:
+    """
+    Статистика вакансии из предрасчитанных таблиц. fields — подмножество
+    полей ответа (None = все). LookupError — вакансии нет в БД.
+    """
+    stats = await asyncio.to_thread(lookup_vacancy_stats, [vacancy_id], fields)
+    if vacancy_id not in stats:
+        raise LookupError(vacancy_id)
+    return stats[vacancy_id]
+
+
+async def get_vacancy_stats_many(vacancy_ids: List[str],
+                                 fields: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """Статистика для нескольких вакансий одним запросом к БД; неизвестные — {}"""
+    stats = await asyncio.to_thread(lookup_vacancy_stats, vacancy_ids, fields)
+    return {vacancy_id: stats.get(vacancy_id, {}) for vacancy_id in vacancy_ids}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(build_vacancy_stats_rollup())
@@ -0,0 +1,269 @@
+"""
+Воркер очереди автооткликов: отдельный процесс, отправляет отклики из таблицы
+applications, когда наступает их scheduled_at (см. services.application_queue).
+
+Отклик проходит конвейер стадий с ограниченными очередями между ними:
+select (забрать из БД) → render (письмо) → apply (отклик в HH) → record
+(статус в БД). Стадии работают параллельно: пока один отклик ждет токена
+бакета «apply» своего резюме, следующие уже получают письма. Метрики стадий пишутся
+в worker_status и доступны через /bot/worker-metrics.
+
+Запуск из папки backend (процессов может быть несколько):
+    python worker.py [--concurrency 4] [--poll 5]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+from services.application_queue import APPLY_LOCK_TIMEOUT, application_queue
+from services.auto_applier import AutoApplier
+from services.hh_client import close_hh_client
+
+logger = logging.getLogger("worker")
+
+WORKER_CONCURRENCY = int(os.environ.get("APPLY_WORKER_CONCURRENCY", "4"))
+WORKER_POLL_SECONDS = float(os.environ.get("APPLY_WORKER_POLL_SECONDS", "5"))  # максимум между проверками очереди
+METRICS_EVERY = 10.0  # секунд между записями метрик в worker_status
+
+
+class StageMetrics:
+    """Пропускная способность и задержки стадии конвейера в текущем процессе"""
+
+    def __init__(self, window: int = 1000):
+        self.processed = 0
+        self.failed = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self._recent = deque(maxlen=window)  # (время завершения, задержка)
+
+    def record(self, latency: float, ok: bool = True) -> None:
+        if ok:
+            self.processed += 1
+        else:
+            self.failed += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self._recent.append((time.monotonic(), latency))
+
+    def snapshot(self, queued: int = 0) -> Dict:
+        now = time.monotonic()
+        recent = sorted(latency for _, latency in self._recent)
+        last_minute = sum(1 for finished, _ in self._recent if now - finished <= 60)
+        count = self.processed + self.failed
+
+        def percentile(p: float) -> float:
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))], 4) if recent else 0.0
+
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "queued": queued,
+            "per_minute": last_minute,
+            "avg_latency": round(self.total_latency / count, 4) if count else 0.0,
+            "p50_latency": percentile(0.5),
+            "p95_latency": percentile(0.95),
+            "max_latency": round(self.max_latency, 4),
+        }
+
+
+class ApplicationWorker:
+    """
+    Конвейер откликов. Одновременно в работе не больше concurrency откликов
+    (взятых из БД и еще не записанных), поэтому память процесса не зависит
+    от длины очереди.
+    """
+
+    def __init__(self, concurrency: int = WORKER_CONCURRENCY, poll: float = WORKER_POLL_SECONDS,
+                 applier: Optional[AutoApplier] = None):
+        self.concurrency = concurrency
+        self.poll = poll
+        self.applier = applier or AutoApplier()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._render_queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+        self._apply_queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+        self._record_queue: asyncio.Queue = asyncio.Queue()
+        self._claimed: Set[int] = set()           # взяты из БД, результат еще не записан
+        self._sending: Set[asyncio.Task] = set()  # отклики, которые уже отправляются в HH
+        self._wakeup = asyncio.Event()
+        self._stop = asyncio.Event()
+        self.metrics = {stage: StageMetrics() for stage in ("select", "render", "apply", "record")}
+
+    # --- стадии ---
+
+    async def _sleep(self) -> None:
+        """Ждет ближайший scheduled_at, освобождения слота или poll секунд (новые отклики из API)"""
+        timeout = self.poll
+        if len(self._claimed) < self.concurrency:
+            due = await asyncio.to_thread(application_queue.next_due_at)
+            if due is not None:
+                timeout = min(timeout, max(0.0, (due - datetime.utcnow()).total_seconds()))
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _select(self) -> None:
+        recovered_at = 0.0
+        while True:
+            if time.monotonic() - recovered_at > APPLY_LOCK_TIMEOUT.total_seconds() / 2:
+                await asyncio.to_thread(application_queue.recover_stale)
+                recovered_at = time.monotonic()
+
+            free = self.concurrency - len(self._claimed)
+            claimed = []
+            if free > 0:
+                started = time.monotonic()
+                claimed = await asyncio.to_thread(application_queue.claim, self.worker_id, free)
+                if claimed:
+                    self.metrics["select"].record(time.monotonic() - started)
+            for application in claimed:
+                self._claimed.add(application["id"])
+                await self._render_queue.put(application)
+            if not claimed:
+                await self._sleep()
+
+    async def _render(self) -> None:
+        while True:
+            application = await self._render_queue.get()
+            started = time.monotonic()
+            try:
+                cover_letter = await self.applier.render(application)
+            except Exception as e:
+                self.metrics["render"].record(time.monotonic() - started, ok=False)
+                await self._record_queue.put((application, None, e))
+            else:
+                self.metrics["render"].record(time.monotonic() - started)
+                await self._apply_queue.put((application, cover_letter))
+            finally:
+                self._render_queue.task_done()
+
+    async def _apply(self) -> None:
+        while True:
+            application, cover_letter = await self._apply_queue.get()
+            try:
+                try:
+                    await self.applier.wait_turn(application)
+                except Exception as e:
+                    await self._record_queue.put((application, cover_letter, e))
+                    continue
+                # ожидание токена может быть дольше APPLY_LOCK_TIMEOUT — проверяем, что отклик
+                # все еще наш, уже после него, непосредственно перед отправкой
+                if not await asyncio.to_thread(application_queue.touch, application["id"], self.worker_id):
+                    # отклик вернулся в очередь по таймауту (и мог быть взят другим воркером) — не отправляем
+                    self._claimed.discard(application["id"])
+                    self._wakeup.set()
+                    continue
+                # отправку не прерываем при остановке: ответ HH должен попасть в БД
+                task = asyncio.create_task(self._send(application, cover_letter))
+                self._sending.add(task)
+                task.add_done_callback(self._sending.discard)
+                await asyncio.shield(task)
+            finally:
+                self._apply_queue.task_done()
+
+    async def _send(self, application: Dict, cover_letter: str) -> None:
+        started = time.monotonic()
+        try:
+            await self.applier.send(application, cover_letter)
+        except Exception as e:
+            self.metrics["apply"].record(time.monotonic() - started, ok=False)
+            await self._record_queue.put((application, cover_letter, e))
+        else:
+            self.metrics["apply"].record(time.monotonic() - started)
+            await self._record_queue.put((application, cover_letter, None))
+
+    async def _record(self) -> None:
+        while True:
+            application, cover_letter, error = await self._record_queue.get()
+            started = time.monotonic()
+            try:
+                if error is None:
+                    await asyncio.to_thread(application_queue.mark_sent, application["id"], self.worker_id,
+                                            cover_letter)
+                else:
+                    logger.warning(f"Application {application['id']} failed: {error!r}")
+                    await asyncio.to_thread(application_queue.mark_failed, application["id"], self.worker_id,
+                                            application["attempts"], str(error) or repr(error))
+                self.metrics["record"].record(time.monotonic() - started)
+            except Exception as e:
+                self.metrics["record"].record(time.monotonic() - started, ok=False)
+                logger.error(f"Failed to record application {application['id']}: {e!r}")
+            finally:
+                self._claimed.discard(application["id"])
+                self._wakeup.set()  # освободился слот
+                self._record_queue.task_done()
+
+    # --- метрики и жизненный цикл ---
+
+    def snapshot(self) -> Dict:
+        queued = {"select": 0, "render": self._render_queue.qsize(),
+                  "apply": self._apply_queue.qsize(), "record": self._record_queue.qsize()}
+        result = {
+            "in_flight": len(self._claimed),
+            "stages": {stage: metrics.snapshot(queued[stage]) for stage, metrics in self.metrics.items()},
+        }
+        if getattr(self.applier, "limiter", None) is not None:
+            result["apply_wait"] = self.applier.limiter.wait_stats["apply"].snapshot()
+        return result
+
+    async def _report(self) -> None:
+        while True:
+            await asyncio.sleep(METRICS_EVERY)
+            try:
+                await asyncio.to_thread(application_queue.report_metrics, self.worker_id, self.snapshot())
+            except Exception as e:
+                logger.warning(f"Failed to report worker metrics: {e!r}")
+
+    async def run(self) -> None:
+        logger.info(f"Application worker {self.worker_id} started (concurrency {self.concurrency})")
+        stages = [asyncio.create_task(self._select()), asyncio.create_task(self._report())]
+        stages += [asyncio.create_task(self._render()) for _ in range(self.concurrency)]
+        stages += [asyncio.create_task(self._apply()) for _ in range(self.concurrency)]
+        recorder = asyncio.create_task(self._record())
+        try:
+            await self._stop.wait()
+        finally:
+            for task in stages:
+                task.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            # начатые отправки дорабатываем и записываем, остальное — обратно в очередь
+            await asyncio.gather(*self._sending, return_exceptions=True)
+            await self._record_queue.join()
+            recorder.cancel()
+            released = await asyncio.to_thread(application_queue.release, list(self._claimed), self.worker_id)
+            if released:
+                logger.info(f"Released {released} applications back to the queue")
+            await asyncio.to_thread(application_queue.report_metrics, self.worker_id, self.snapshot())
+            await close_hh_client()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+async def main(concurrency: int, poll: float) -> None:
+    worker = ApplicationWorker(concurrency, poll)
+    try:
+        import signal
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, worker.stop)
+    except (ImportError, NotImplementedError):  # Windows: остановка по Ctrl+C
+        pass
+    await worker.run()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    parser = argparse.ArgumentParser(description="Send queued job applications")
+    parser.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY)
+    parser.add_argument("--poll", type=float, default=WORKER_POLL_SECONDS)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.poll))
@@ -21,6 +21,7 @@ interface VacancyMatch {
   vacancy: any;
   similarity: number;
   match_score: number;
+  scored_on?: 'snippet' | 'description';
 }
 
 interface BotStatus {
@@ -115,7 +116,19 @@ function App() {
       formData.append("file", file);
 
       console.log('Uploading resume...');
-      const response = await axios.post("http://localhost:8000/upload-resume", formData);
+      const uploadResponse = await axios.post("http://localhost:8000/upload-resume", formData);
+
+      // Извлечение текста идет в фоне — опрашиваем статус задачи
+      // (для уже загруженного файла сервер сразу отвечает status: 'done')
+      const jobId = uploadResponse.data.job_id;
+      let response = uploadResponse;
+      while (response.data.status === 'queued' || response.data.status === 'running') {
+        await new Promise(resolve => setTimeout(resolve, 500));
+        response = await axios.get(`http://localhost:8000/upload-resume/${jobId}`);
+      }
+      if (response.data.status === 'failed') {
+        throw { response: { data: { detail: response.data.error || "Не удалось обработать резюме" } } };
+      }
 
       console.log('Resume uploaded:', response.data);
 
@@ -187,10 +200,12 @@ function App() {
     if (!resumeId) return;
 
     try {
-      await axios.post("http://localhost:8000/bot/start-auto-apply", {
-        resume_id: resumeId,
-        min_similarity: minSimilarity,
-        max_applications: botStatus.daily_limit
+      await axios.post("http://localhost:8000/bot/start-auto-apply", null, {
+        params: {
+          resume_id: resumeId,
+          min_similarity: minSimilarity,
+          max_applications: botStatus.daily_limit
+        }
       });
 
       setBotStatus(prev => ({ ...prev, is_running: true }));
@@ -204,7 +219,7 @@ function App() {
   // Stop auto application
   const stopBot = async () => {
     try {
-      await axios.post("http://localhost:8000/bot/stop-auto-apply");
+      await axios.post("http://localhost:8000/bot/stop-auto-apply", null, { params: { resume_id: resumeId } });
       setBotStatus(prev => ({ ...prev, is_running: false }));
       stopStatusPolling();
     } catch (e: any) {